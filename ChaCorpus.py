@@ -0,0 +1,322 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Parse and analyze many CHA files at once using every core.
+"""
+
+import os
+import copy
+import shutil
+import tempfile
+from glob import glob
+from collections import deque
+from functools import partial
+from operator import methodcaller
+from concurrent.futures import ProcessPoolExecutor
+
+from ChaFile import *
+
+def _processFile(path, options, task):
+	"""Internal use. Runs in a worker process. Only the result of task and the stats go back to the main process
+
+	Args:
+		path (string): Path to the CHA file
+		options (dict): ChaFile constructor options
+		task (callable): Receives the ChaFile and returns something small (a number, a dict, ...)
+
+	Returns:
+		tuple: (result of task, Stats of the file)
+	"""
+	cha = ChaFile(path, verbose = False, **options)
+	result = task(cha)
+	return ( result, cha.stats() )
+
+def _getColumns(cha, categories, countCopAux, processLightVerbs):
+	"""Internal use. Runs in a worker process. Same as ChaFile.getColumns populating the categories first
+
+	Returns:
+		ChaColumns: Columns without lazy ones so they can be sent back
+	"""
+	for category in categories:
+		if category == LINE_VERBS:
+			cha.populateVerbs(countCopAux = countCopAux, processLightVerbs = processLightVerbs)
+		elif category == LINE_NOUNS:
+			cha.populateNouns(countCopAux = countCopAux, processLightVerbs = processLightVerbs)
+		elif category == LINE_ADJECTIVES:
+			cha.populateAdjectives()
+
+	return cha.getColumns(*categories).materialize()
+
+class ChaCorpus:
+
+	def __init__(self, paths, ignoreSpeakers = [ SPEAKER_SILENCE ], onlyCDS = False,
+				 language = None, processes = None, cacheDir = None, emptyWords = None, lazy = False,
+				 tiers = None, ignoreTiers = [], instrument = False):
+		"""Constructor. Files are parsed when a method is called, one process per core
+
+		Args:
+			paths (string or list): Paths to CHA files or glob patterns (i.e. "corpus/*.cha")
+			ignoreSpeakers (list, optional): Same as ChaFile. Defaults to [ SPEAKER_SILENCE ].
+			onlyCDS (bool, optional): Same as ChaFile. Defaults to False.
+			language (string, optional): Same as ChaFile. Defaults to None.
+			processes (int, optional): Number of worker processes. 1 runs everything in this process. Defaults to None (number of cores).
+			cacheDir (string, optional): Same as ChaFile. Workers share it safely. Defaults to None.
+			emptyWords (list, optional): Same as ChaFile. Defaults to None.
+			lazy (bool, optional): Same as ChaFile. Defaults to False.
+			tiers (list, optional): Same as ChaFile. Defaults to None.
+			ignoreTiers (list, optional): Same as ChaFile. Defaults to [].
+			instrument (bool, optional): Same as ChaFile. Stats of every file are added up in stats(). Defaults to False.
+
+		Raises:
+			FileNotFoundError: A path does not exist or a pattern matches no file
+		"""
+		if isinstance(paths, str):
+			paths = [ paths ]
+
+		self.paths = []
+		for p in paths:
+			matches = sorted(glob(p))
+			if len(matches) == 0:
+				raise FileNotFoundError(p)
+			self.paths.extend(matches)
+
+		self.options = {
+			"ignoreSpeakers" : ignoreSpeakers,
+			"onlyCDS" : onlyCDS,
+			"language" : language,
+			"cacheDir" : cacheDir,
+			"emptyWords" : emptyWords,
+			"lazy" : lazy,
+			"tiers" : tiers,
+			"ignoreTiers" : ignoreTiers,
+			"instrument" : instrument
+		}
+
+		self.processes = processes if processes else os.cpu_count()
+		self.morIndex = None
+		self.statistics = Stats()
+
+	def getPaths(self):
+		"""Files in this corpus
+
+		Returns:
+			list: Paths
+		"""
+		return self.paths
+
+	def filter(self, condition):
+		"""Files whose header meets a condition. Only the headers are read
+
+		Args:
+			condition (callable): Receives a ChaHeader and returns True for keeping the file,
+				i.e. lambda h: h.getLanguage() == LANGUAGE_SPANISH
+
+		Returns:
+			ChaCorpus: New corpus with the same options
+		"""
+		corpus = copy.copy(self)
+		corpus.paths = [ p for p in self.paths if condition( ChaFile.readHeader(p) ) ]
+		corpus.morIndex = None
+		corpus.statistics = Stats()
+		return corpus
+
+	def map(self, task):
+		"""Runs task on every file in parallel. task must be picklable (i.e. a module level function)
+		and should return small results since they are sent back from the worker processes
+
+		Args:
+			task (callable): Receives a ChaFile
+
+		Returns:
+			dict: Path and result of task
+		"""
+		if self.processes == 1 or len(self.paths) <= 1:
+			results = [ _processFile(p, self.options, task) for p in self.paths ]
+		else:
+			workers = min(self.processes, len(self.paths))
+			with ProcessPoolExecutor(max_workers = workers) as executor:
+				results = list( executor.map(_processFile, self.paths, [self.options] * len(self.paths), [task] * len(self.paths)) )
+
+		for _, stats in results:
+			self.statistics.merge(stats)
+
+		return { path : result for path, (result, _) in zip(self.paths, results) }
+
+	def stats(self):
+		"""Same as ChaFile.stats added up for every file parsed by this corpus so far.
+		Files are parsed again for each method called so they are counted once per call
+
+		Returns:
+			Stats: Totals
+		"""
+		return self.statistics.copy()
+
+	def countUtterances(self, addressee=ADDRESSEE_ALL, ignoreEmptyUtterances = True):
+		"""Same as ChaFile.countUtterances for the whole corpus
+
+		Returns:
+			tuple: (total, dict with the result for each path)
+		"""
+		byFile = self.map( methodcaller("countUtterances", addressee, ignoreEmptyUtterances) )
+		return ( sum(byFile.values()), byFile )
+
+	def count(self, what=LINE_UTTERANCE, addressee=ADDRESSEE_ALL, countType=COUNT_TYPE_TOKENS, countCopAux = False, processLightVerbs = True):
+		"""Same as ChaFile.count for the whole corpus. Types are counted once even if they appear in many files
+
+		Returns:
+			tuple: (total, dict with the result for each path)
+		"""
+		frequencies = self.map( methodcaller("countByType", what, addressee, countCopAux, processLightVerbs) )
+
+		if countType == COUNT_TYPE_TOKENS:
+			byFile = { p : sum(f.values()) for p, f in frequencies.items() }
+			return ( sum(byFile.values()), byFile )
+
+		types = set()
+		for f in frequencies.values():
+			types.update(f.keys())
+
+		return ( len(types), { p : len(f) for p, f in frequencies.items() } )
+
+	def getLinguisticProductivity(self, addressee=ADDRESSEE_ALL, metric=LINGUISTIC_PRODUCTIVITY_MLU):
+		"""Same as ChaFile.getLinguisticProductivity for the whole corpus
+
+		Returns:
+			tuple: ((utterance count, morpheme count, MLU), dict with the result for each path)
+		"""
+		byFile = self.map( methodcaller("getLinguisticProductivity", addressee, metric) )
+
+		countUtts = sum( r[0] for r in byFile.values() )
+		countMor = sum( r[1] for r in byFile.values() )
+
+		return ( (countUtts, countMor, countMor / countUtts), byFile )
+
+	def countTurns(self, addressee, allowIntervining = True):
+		"""Same as ChaFile.countTurns for the whole corpus
+
+		Returns:
+			tuple: (total, dict with the result for each path)
+		"""
+		byFile = self.map( methodcaller("countTurns", addressee, allowIntervining) )
+		return ( sum(byFile.values()), byFile )
+
+	def getColumns(self, *categories, countCopAux = False, processLightVerbs = True):
+		"""Same as ChaFile.getColumns for every file joined with ChaColumns.concatenate, so totals by addressee,
+		speaker or file are computed for the whole corpus at once. Categories are populated in the worker processes
+
+		Args:
+			*categories: LINE_NOUNS, LINE_ADJECTIVES or LINE_VERBS columns to add
+			countCopAux (bool, optional): Same as ChaFile.populateVerbs. Defaults to False.
+			processLightVerbs (bool, optional): Same as ChaFile.populateVerbs. Defaults to True.
+
+		Returns:
+			ChaColumns: Lines of every file in the order of getPaths(). File names are the paths
+		"""
+		byFile = self.map( partial(_getColumns, categories = categories, countCopAux = countCopAux, processLightVerbs = processLightVerbs) )
+
+		for path, columns in byFile.items():
+			columns.fileNames = [ path ]
+
+		return ChaColumns.concatenate( [ byFile[p] for p in self.paths ] )
+
+	def summary(self, addressees = SUMMARY_ADDRESSEES, metrics = None, countCopAux = False, processLightVerbs = True):
+		"""Same as ChaFile.summary for every file
+
+		Returns:
+			list: One record for each path (with the path in SUMMARY_FILE), i.e. the rows of a table
+		"""
+		byFile = self.map( methodcaller("summary", addressees, metrics, countCopAux, processLightVerbs) )
+
+		records = []
+		for path in self.paths:
+			record = byFile[path]
+			record[SUMMARY_FILE] = path
+			records.append(record)
+		return records
+
+	def export(self, utterancesPath = None, morUnitsPath = None, format = None, batchSize = None, countCopAux = False, processLightVerbs = True):
+		"""Same as export.exportTables for every file. Each worker process writes the tables of its files to temporary
+		Arrow files, batch by batch, and this process appends them to the output in the order of getPaths().
+		Record batches are never sent between processes so memory doesn't depend on the size of the files
+
+		Args:
+			utterancesPath (str, optional): Same as export.exportTables. Defaults to None.
+			morUnitsPath (str, optional): Same as export.exportTables. Defaults to None.
+			format (str, optional): Same as export.exportTables. Defaults to None.
+			batchSize (int, optional): Same as export.exportTables. Defaults to None (export.BATCH_SIZE).
+			countCopAux (bool, optional): Same as export.exportTables. Defaults to False.
+			processLightVerbs (bool, optional): Same as export.exportTables. Defaults to True.
+		"""
+		import export #needs pyarrow
+
+		if batchSize is None:
+			batchSize = export.BATCH_SIZE
+
+		outputs = [ p for p in [ utterancesPath, morUnitsPath ] if p ]
+		if len(outputs) == 0:
+			return
+
+		# next to the output so parts are not written to another disk
+		partsDir = tempfile.mkdtemp( prefix = ".export-", dir = os.path.dirname( os.path.abspath(outputs[0]) ) )
+
+		def getParts(i):
+			return ( os.path.join(partsDir, f"{i}.utterances.arrow") if utterancesPath else None,
+					 os.path.join(partsDir, f"{i}.morunits.arrow") if morUnitsPath else None )
+
+		def getTask(i, path):
+			# the path identifies the file in the tables, same as summary()
+			return partial( export.writePart, utterancesPath = getParts(i)[0], morUnitsPath = getParts(i)[1], batchSize = batchSize,
+							fileName = path, countCopAux = countCopAux, processLightVerbs = processLightVerbs )
+
+		utterances = export.TableWriter(utterancesPath, export.UTTERANCE_SCHEMA, format) if utterancesPath else None
+		morUnits = export.TableWriter(morUnitsPath, export.MOR_UNIT_SCHEMA, format) if morUnitsPath else None
+
+		def append(i, result):
+			_, stats = result
+			self.statistics.merge(stats)
+			for part, writer in zip( getParts(i), [ utterances, morUnits ] ):
+				if writer:
+					export.appendPart(part, writer)
+					os.remove(part)
+
+		try:
+			if self.processes == 1 or len(self.paths) <= 1:
+				for i, p in enumerate(self.paths):
+					append( i, _processFile(p, self.options, getTask(i, p)) )
+			else:
+				workers = min(self.processes, len(self.paths))
+				with ProcessPoolExecutor(max_workers = workers) as executor:
+					pending = deque()
+					for i, p in enumerate(self.paths):
+						if len(pending) >= workers * 2:
+							done, future = pending.popleft()
+							append( done, future.result() )
+						pending.append( ( i, executor.submit(_processFile, p, self.options, getTask(i, p)) ) )
+					while pending:
+						i, future = pending.popleft()
+						append( i, future.result() )
+		finally:
+			for writer in [ utterances, morUnits ]:
+				if writer:
+					writer.close()
+			shutil.rmtree(partsDir, ignore_errors = True)
+
+	def getMorIndex(self):
+		"""Inverted index of the MOR units of every file. It is built the first time and kept in memory
+		so many searches can be done without parsing the files again
+
+		Returns:
+			MorIndex: Index. File names are the paths
+		"""
+		if self.morIndex is None:
+			byFile = self.map( methodcaller("getMorIndex") )
+			self.morIndex = MorIndex.concatenate( [ byFile[p] for p in self.paths ] )
+		return self.morIndex
+
+	def findLinesByMorCriteria(self, criteria, criteriaType=MOR_UNIT_CATEGORIA, addressee=ADDRESSEE_ALL):
+		"""Same as ChaFile.findLinesByMorCriteria for the whole corpus using getMorIndex()
+
+		Returns:
+			list: (path, LINE_NUMBER, position of the first word in the MOR tier) for each match
+		"""
+		return self.getMorIndex().find(criteria, criteriaType, addressee)
@@ -8,11 +8,18 @@ Created on Mon Oct 29 14:59:04 2018
 """
 
 import os
+import gc
 from subprocess import getstatusoutput
 import re
+import hashlib
+from array import array
+from bisect import bisect_left
 from log import Log
+from cache import Cache
+from stats import Stats
+import diversity
 
-from lexical_diversity import lex_div as ld
+import numpy as np
 
 # LINE constants. Use these for getting data from each line
 LINE_UTTERANCE = "emisión"
@@ -51,6 +58,12 @@ COUNT_TYPE_TOKENS = "tokens"
 COUNT_TYPE_TYPES = "types"
 ###############################################
 
+# Column constants. Use these with getColumns(). LINE_NOUNS, LINE_ADJECTIVES and LINE_VERBS are also columns
+COLUMN_WORDS = "palabras"
+COLUMN_MOR_UNITS = "unidades_mor"
+COLUMN_EMPTY = "vacía"
+###############################################
+
 # Lexical diversity constants.
 LEXICAL_DIVERSITY_TTR = "ttr"
 LEXICAL_DIVERSITY_MATTR = "mattr"
@@ -63,11 +76,58 @@ LEXICAL_DIVERSITY_MTLD = "mtld"
 LINGUISTIC_PRODUCTIVITY_MLU = "mlu"
 ###############################################
 
+# Summary constants. Use these with summary() along with LINE_UTTERANCE, LINE_VERBS, LINE_NOUNS, LINE_ADJECTIVES,
+# LINGUISTIC_PRODUCTIVITY_MLU and the LEXICAL_DIVERSITY constants
+SUMMARY_FILE = "file"
+SUMMARY_UTTERANCES = "utterances"
+SUMMARY_MORPHEMES = "morphemes"
+SUMMARY_TURNS = "turns"
+SUMMARY_ADDRESSEES = [ ADDRESSEE_ALL, ADDRESSEE_CHILD_DIRECTED, ADDRESSEE_CHILD_PRODUCED, ADDRESSEE_OVER_HEARD ]
+SUMMARY_METRICS = [ SUMMARY_UTTERANCES, LINE_UTTERANCE, LINE_VERBS, LINE_NOUNS, LINE_ADJECTIVES, LINGUISTIC_PRODUCTIVITY_MLU,
+					LEXICAL_DIVERSITY_TTR, LEXICAL_DIVERSITY_MATTR, LEXICAL_DIVERSITY_MAAS, LEXICAL_DIVERSITY_HDD, LEXICAL_DIVERSITY_MTLD,
+					SUMMARY_TURNS ]
+SUMMARY_METRICS_WITHOUT_MOR = [ SUMMARY_UTTERANCES, SUMMARY_TURNS ]
+###############################################
+
+# Stats constants. Stages (timed only with instrument=True) and counters of stats()
+STATS_PROCESS_LINES = "processLines"
+STATS_LOAD_CACHE = "loadCache"
+STATS_RECORDS = "records" #splitting the file in main and dependent tiers
+STATS_BUILD_LINE = "buildLine"
+STATS_PARSE_MOR = "parseMor"
+STATS_PARSE_MOR_UNIT = "parseMorUnit" #only different MOR units are parsed
+STATS_SET_ADDRESSEE = "setAddressee"
+STATS_POPULATE_VERBS = "populateVerbs"
+STATS_LIGHT_VERBS = "lightVerbs" #lines where a light verb rule could match
+STATS_TURNS = "turns"
+STATS_MOR_TO_WORDS = "morToWords"
+STATS_FILES = "files"
+STATS_LINES = "lines"
+STATS_AMBIGUOUS_LINES = "ambiguousLines"
+STATS_MALFORMED_MOR_UNITS = "malformedMorUnits" #MOR units that don't match MOR_UNIT_REGEX (every time they are found) in the MOR tiers parsed
+STATS_MOR_TO_WORDS_FAILURES = "morToWordsFailures" #lines where words and MOR tier don't align
+###############################################
+
 # Language constants
 LANGUAGE_SPANISH = "spa"
 LANGUAGE_ENGLISH = "eng"
 ######################
 
+# Participant constants. Use these for getting data from ChaHeader.getParticipants()
+# i.e. header.getParticipants()["CHI"][PARTICIPANT_AGE]
+PARTICIPANT_CODE = "código"
+PARTICIPANT_NAME = "nombre"
+PARTICIPANT_ROLE = "rol"
+PARTICIPANT_LANGUAGE = "idioma"
+PARTICIPANT_CORPUS = "corpus"
+PARTICIPANT_AGE = "edad"
+PARTICIPANT_SEX = "sexo"
+PARTICIPANT_GROUP = "grupo"
+PARTICIPANT_SES = "ses"
+PARTICIPANT_EDUCATION = "educación"
+PARTICIPANT_CUSTOM = "custom"
+###############################################
+
 # MOR constants. 
 # i.e line[TIER_MOR][0][MOR_UNIT_LEXEMA] will store the lexeme of the first word 
 ERROR_NO_MOR_FOUND = 1
@@ -97,10 +157,29 @@ MOR_REPLACEMENTS = { #reemplazo de palabras que está agarrando mal el MOR, ej:
 ###############################
 
 BULLET_TAG = "\x15"
+READ_BUFFER_SIZE = 64 * 1024 #chars read at once when parsing the CHA file
+MOR_UNIT_CACHE_MAX_SIZE = 100000 #parsed MOR units kept when streaming (iterLines). Usually only a few thousand are different
+
+PARSER_VERSION = 7 #change it whenever parsing output changes so cached files are parsed again
+CACHE_MAX_SIZE = 1024 ** 3 #bytes. Least recently used files are removed from cacheDir after this
+
+## Internal use only. Compiled once for the lexer
+HEADER_REGEX = re.compile(r"@\w*:\t")
+TIER_NAME_REGEX = re.compile(r"([\w-]*):")
+AGE_REGEX = re.compile(r"(\d+);(\d*)\.?(\d*)")
+BULLET_REGEX = re.compile(r"\x15(\d*)_(\d*)\x15")
+MOR_UNIT_REGEX = re.compile(r"([A-zÀ-ú:#\?']*)\|([A-zÀ-ú]*)(.*)")
+MAIN_TIER_TOKEN_REGEX = re.compile(r"\[([^\]]*)\]|([<>])|([^\s<>\[\]]+)") #[annotation], < or > and words
+FOREIGN_WORD_REGEX = re.compile(r"@\w*:") #i.e daddy@s:spa
+PAUSE_REGEX = re.compile(r"\A\([\d.:]*\)\Z") #(.) (..) (1.5)
+MOR_PUNCTUATION_REGEX = re.compile(r"\A\W*\Z") #. ? ! +... +/. „ and other MOR units that are not words
+###############
 
 # TIER constants
 TIER_MOR = "mor"
 TIER_XDS = "xds"
+TIER_SND = "snd" #bullets, stored in LINE_BULLET
+TIERS_REQUIRED = [ TIER_XDS, TIER_SND ] #always parsed, see ChaFile tiers and ignoreTiers
 ###############################
 
 ## Internal use only. Use SPEAKER_*
@@ -125,393 +204,2249 @@ ADDRESSEE_CORRESPOND = {
 	ADDRESSEE_XDS_PET : SPEAKER_PET
 }
 
+# Internal use. Turn detection, see ChaFile.getTurnsBySpeaker
+TURN_CDS_MAX_INTERVENING_CHILD = 1 # cuantas intervenciones del CHI
+TURN_CDS_MAX_INTERVENING_OTHER = 3 # cuantas intervenciones de otros hablantes
+TURN_ADS_MAX_INTERVENING_OTHER = 3 # cuantas intervenciones de otros hablantes
+TURN_MAX_TIME = 5000 #ms 
+###############
+
 CATEGORIAS_VERBOS = ["v","ger","part","imp","inf","cop", "aux"] #"cop" and "aux" are removed by default when counting verbs
 CATEGORIAS_ADJETIVOS = ["adj"]
 CATEGORIAS_SUSTANTIVOS = ["n", "n:gerund"] #n:gerund was found in english and want to count it as a noun
 
+# Light verb rules. Internal use, see LightVerbRules. They are applied in order and each one is
+# a tuple (criteria, criteriaType, index in the match of the word counted as verb)
+
+# V1 SÍ AUX: ir a, tener que, poder, haber, estar, dejar de, deber, acabar de,
+# terminar de, haber que, estar por, empezar a, empezar por, comenzar a, poner a, volver a
+
+#1) Cuando es auxiliar + infinitivos, contar el infinitivo
+#2) Cuando es auxiliar + gerundio, contar el gerundio
+#3) Cuando es auxiliar + participio, contar el participio
+RAICES_AUXILIARES = [
+	[["i"],["a"]],
+	[["tene"],["que"]],
+	[["pode"]],
+	[["habe"]],
+	[["esta"]],
+	[["debe"]],
+	[["habe"],["que"]],
+	[["esta"],["por"]],
+	
+	#[["deja"],["de"]],    #estos que comenté son los que cambiamos cuando hicimos aclew completo
+	
+	#[["acaba"],["de"]],
+	#[["termina"],["de"]],
+
+	#[["empeza"],["a"]],
+	#[["empeza"],["por"]],
+
+	#[["comienzo"],["a"]],
+	#[["comenza"],["a"]],
+
+	#[["pone"],["a"]],
+	#[["volve"],["a"]]
+]
+SIGUIENTE_PALABRA_DE_AUXILIAR = [ "inf", "ger", "part" ]
+
+LIGHT_VERB_RULES_SPANISH = [
+	( raiz + [SIGUIENTE_PALABRA_DE_AUXILIAR], [ MOR_UNIT_LEXEMA for c in raiz ] + [MOR_UNIT_CATEGORIA], -1, True ) for raiz in RAICES_AUXILIARES
+] + [
+	#4) Cuando es copulativo + gerundio contar el gerundio
+	#5) Cuando es copulativo + participio contar el participio.
+	# aca habría que mirar si el segundo termina en ando o endo, en tal caso se hace como se está haciendo,
+	# en caso contrario habría que retirarlo, es adjetivo, entonces también habría que tocar la parte de adjetivos
+	( [ ["cop"],["ger","part"] ], MOR_UNIT_CATEGORIA, 1, True )
+]
+
+#6) No contar el copula o auxiliar si está solo (1versión) / contar el cópula o el auxiliar si esta sólo (2 versión)
+#7) En los casos de 2 o 3 Verbos (verbos conjugado, infinitivo, gerundio o participio), contar el que no es ni auxiliar, ni copula.
+#estoy contando frase verbal + verbo final
+#8) si hay 2 o más verbos conjugados coordinados en una emisión se toman todos.
+
+CRITERIAS_LIGHT_VERBS_ENGLISH = [
+	[["part|go"], ["to"], ["n", *CATEGORIAS_VERBOS]],
+	[["part|go"], ["n", *CATEGORIAS_VERBOS]], #gonna
+	[["go"], [*CATEGORIAS_VERBOS]],
+	[["have"], ["to"], [*CATEGORIAS_VERBOS]],
+	[["do"], [*CATEGORIAS_VERBOS]],
+	[["do"],["not"],[*CATEGORIAS_VERBOS]],
+	[["use"], ["to"], [*CATEGORIAS_VERBOS]],
+
+	# [["like"], ["to"], [*CATEGORIAS_VERBOS]], # se decidió no agregarla
+	# [["want"], ["to"], [*CATEGORIAS_VERBOS]], # se decidió no agregarla
+	# [["try"], ["to"], [*CATEGORIAS_VERBOS]], # se decidió no agregarla
+]
+
+# part|go rules are applied once per utterance: after the first match they were searched again with the
+# criteria type computed from the whole step ('"|" not in c' on a list) so they never matched twice
+LIGHT_VERB_RULES_ENGLISH = [
+	( criteria, [ MOR_UNIT_LEXEMA if "|" not in c[0] else MOR_UNIT_CATEGORIA_LEXEMA for c in criteria[:-1] ] + [MOR_UNIT_CATEGORIA], -1,
+	  not any( "|" in c[0] for c in criteria[:-1] ) ) for criteria in CRITERIAS_LIGHT_VERBS_ENGLISH
+]
+
+# Don't count LET'S as a verb
+LIGHT_VERB_STOP_WORDS_ENGLISH = [
+	{MOR_UNIT_CATEGORIA: 'v', MOR_UNIT_LEXEMA: 'let', MOR_UNIT_EXTRA: '~pro:obj|us'}
+]
+
+# Utterances without MOR that have any of these words are considered empty. See ChaFile.isUtteranceEmpty
+EMPTY_WORDS_SPANISH = [
+	"ríe",
+	"rie",
+	"llora",
+	"besa",
+	"tose",
+	"silba",
+	"silva",
+	"aplaude",
+	"camina",
+	"llorisquea",
+	"chasquea",
+	"sopla",
+	"lloriqueo",
+	"zapatea",
+	"bosteza",
+	"suspira"
+]
+EMPTY_WORDS_ENGLISH = [
+	"laughs",
+	"whistles",
+	"cries",
+	"sobs",
+	"giggles",
+	"chuckles",
+	"whines",
+	"yawns",
+	"squeals",
+	"kisses",
+	"toots",
+	"claps",
+	"blowskisses",
+	"wagglestongue",
+	"clickstongue",
+	"clicks",
+	"sighs"
+]
+EMPTY_WORDS = {
+	LANGUAGE_SPANISH : EMPTY_WORDS_SPANISH,
+	LANGUAGE_ENGLISH : EMPTY_WORDS_ENGLISH
+}
+
 MISSING_VALUE = "?"
 WORD_XXX = "xxx" #the word wasn't understood by the transcriber
 ###############################################
 
-log = Log()
+class SymbolTable:
+	"""Interned strings. MOR categories, lexemes and extras are stored by id
+	and MOR_SYMBOLS is shared by every ChaFile so ids can be compared between files
+	"""
 
-class ChaFile:
+	def __init__(self):
+		self.ids = {}
+		self.strings = []
 
-	def __init__(self, chaFilePath,
-				 ignoreSpeakers = [ SPEAKER_SILENCE ], onlyCDS = False, includeLines = [],
-				 verbose = True, language = None):
-		"""Constructor. Loads the CHA file and parse it
+	def intern(self, string):
+		"""Returns the id for string, adding it if it is new
 
 		Args:
-			chaFilePath (string): Path to the CHA file
-			ignoreSpeakers (list, optional): Utterances from these speakers won't be parsed. Defaults to [ SPEAKER_SILENCE ].
-			onlyCDS (bool, optional): Only child directed utterances will be parsed. Defaults to False.
-			includeLines (list, optional): Only these line numbers will be parsed. Defaults to [] which means all lines.
-			verbose (bool, optional): Extra information will be printed when processing. Defaults to False.
-			language (string, optional): Use one of the LANGUAGE constants or None for parsing it from the CHA file. Defaults to None.
+			string (string): Any string
+
+		Returns:
+			int: Id
 		"""
+		symbolId = self.ids.get(string)
+		if symbolId is None:
+			symbolId = len(self.strings)
+			self.ids[string] = symbolId
+			self.strings.append(string)
+		return symbolId
 
-		self.noBullets = True
-		self.lines = []
-		self.speakers = []
-		self.language = None
-		self.morAmbiguousLines = []
+	def getId(self, string):
+		"""Returns the id for string without adding it
 
-		self.processedVerbs = False
-		self.processedNouns = False
-		self.processedAdjectives = False
+		Args:
+			string (string): Any string
 
-		self.morFound = False #true if MOR was found in at least one line
+		Returns:
+			int: Id or -1 if string was never interned
+		"""
+		return self.ids.get(string, -1)
 
-		self.chaFilePath = chaFilePath
-		self.ignoreSpeakers = ignoreSpeakers
-		self.onlyCDS = onlyCDS
-		self.includeLines = includeLines
+	def __getitem__(self, symbolId):
+		return self.strings[symbolId]
 
-		log.setVerbose(verbose)
+	def __len__(self):
+		return len(self.strings)
 
-		self.filename = os.path.basename(chaFilePath)
-		self.filename = self.filename[0:self.filename.rfind(".")]
+	def export(self, *idArrays):
+		"""Strings for the ids used in some arrays. Ids only make sense in this process
+		so these are saved along with them (i.e. in the cache or when sent to another process)
 
-		self.setLanguage(language)
-		self.processLines()
+		Args:
+			idArrays: Arrays of ids (array or numpy.ndarray)
 
-	def processLines(self):
-		"""Internal use. Main function that parses the CHA file
+		Returns:
+			dict: Id and string
+		"""
+		ids = np.unique( np.concatenate( [ np.asarray(ids, dtype=np.int32) for ids in idArrays ] ) ) if idArrays else []
+		return { int(i) : self.strings[i] for i in ids }
 
-		Raises:
-			FileNotFoundError: The path to the CHA file does not exist
+	def getTranslation(self, symbols):
+		"""Translates ids exported by another process to the ids of this table
+
+		Args:
+			symbols (dict): Result of export
+
+		Returns:
+			numpy.ndarray: New id for each old id. Use it as translation[oldIds]
 		"""
+		translation = np.full( max(symbols, default=-1) + 1, -1, dtype=np.int32 )
+		for i, string in symbols.items():
+			translation[i] = self.intern(string)
+		return translation
+
+MOR_SYMBOLS = SymbolTable()
+
+class MorStorage:
+	"""MOR units of a whole file as parallel arrays of MOR_SYMBOLS ids.
+	Each line's TIER_MOR is a MorTier view over a range of these arrays
+	"""
+
+	__slots__ = ( "categorias", "lexemas", "extras", "ambiguous" )
+
+	def __init__(self):
+		self.categorias = array("i")
+		self.lexemas = array("i")
+		self.extras = array("i")
+		self.ambiguous = {} #index -> list of alternative analysis
+
+	def __len__(self):
+		return len(self.categorias)
+
+class MorUnit:
+	"""View of one MOR unit. Behaves like the dict used in previous versions,
+	i.e. morUnit[MOR_UNIT_LEXEMA]
+	"""
+
+	__slots__ = ( "storage", "index" )
+
+	# MOR_UNIT constant -> array in MorStorage
+	FIELDS = {
+		MOR_UNIT_CATEGORIA : "categorias",
+		MOR_UNIT_LEXEMA : "lexemas",
+		MOR_UNIT_EXTRA : "extras"
+	}
+
+	def __init__(self, storage, index):
+		self.storage = storage
+		self.index = index
+
+	def __getitem__(self, key):
+		field = MorUnit.FIELDS.get(key)
+		if field is not None:
+			return MOR_SYMBOLS[ getattr(self.storage, field)[self.index] ]
+		if key == MOR_UNIT_AMBIGUOUS and self.index in self.storage.ambiguous:
+			return self.storage.ambiguous[self.index]
+		raise KeyError(key)
+
+	def __setitem__(self, key, value):
+		field = MorUnit.FIELDS.get(key)
+		if field is not None:
+			getattr(self.storage, field)[self.index] = MOR_SYMBOLS.intern(value)
+		elif key == MOR_UNIT_AMBIGUOUS:
+			self.storage.ambiguous[self.index] = value
+		else:
+			raise KeyError(key)
 
-		if not os.path.isfile(self.chaFilePath):
-			raise FileNotFoundError()
+	def __contains__(self, key):
+		return key in MorUnit.FIELDS or (key == MOR_UNIT_AMBIGUOUS and self.index in self.storage.ambiguous)
 
-		with open(self.chaFilePath,"r") as f:
-			txtCHA = f.read()
+	def __eq__(self, other):
+		if isinstance(other, MorUnit):
+			other = other.toDict()
+		if isinstance(other, dict):
+			return self.toDict() == other
+		return NotImplemented
 
-		prog = re.compile(r"[\*%@]\w*:\t.*?(?=\*\w*:\t|@End|\Z)", re.S)#, re.X)
-		parsedCHA = prog.findall(txtCHA)
+	def __iter__(self):
+		return iter(self.keys())
 
-		self.lines = []
-		self.speakers = []
-		lineNumber = 1
-		utteranceNumber = 0
+	def __len__(self):
+		return len(self.keys())
 
-		for r in parsedCHA:
-			#is header
-			if r[0] == "@":
-				lineNumber += r.count("\n") + 2 #2= utf8 and begin 
-				continue
-			
-			prog = re.compile(r"(?P<tier>[\*%][\w-]*):[\s]*(?P<content>.*?)(?=[\*%][\w-]*:[\s]*|@End|\Z)", re.S)
-			
-			line = {
-				LINE_NUMBER : lineNumber,
-				LINE_UTTERANCE_NUMBER : 0
-			}
-			
-			skipLine = False
-
-			#build line
-			for m in prog.finditer(r):
-				tier = m.group("tier")
-				content = m.group("content").replace("\t"," ").replace("\n", "")
-
-				if m.group("tier")[0] == "*": #is speaker
-					speaker = tier[1:]
-					if not speaker in self.ignoreSpeakers:
-						if not speaker in self.speakers:
-							self.speakers.append(speaker)
-
-						line[LINE_SPEAKER] = speaker
-						line[LINE_UTTERANCE] = content
-
-						if BULLET_TAG in content:
-							regexBullet = r"\x15(?P<from>\d*)_(?P<to>\d*)\x15"
-							progBullet = re.compile(regexBullet)#, re.S)
-							parsedBullet = list(progBullet.finditer(content))
-
-							if len(parsedBullet) > 0 :
-								bulletFrom = int(parsedBullet[0].group("from"))
-								bulletTo = int(parsedBullet[-1].group("to"))
-								line[ LINE_BULLET ] = [bulletFrom, bulletTo]
-								line[ LINE_UTTERANCE ] = progBullet.sub("", line[ LINE_UTTERANCE ])
-							else:
-								#esto sucede cuando los bullets son de la forma %snd:"filename"_from_to
-								line[ LINE_UTTERANCE ] = line[ LINE_UTTERANCE ].replace(BULLET_TAG, "").strip()
-					else:
-						skipLine = True
-						break
+	def __repr__(self):
+		return repr(self.toDict())
+
+	def get(self, key, default = None):
+		"""Same as dict.get
+		"""
+		try:
+			return self[key]
+		except KeyError:
+			return default
+
+	def keys(self):
+		"""Returns the MOR_UNIT constants present in this unit
+
+		Returns:
+			list: Keys
+		"""
+		keys = list(MorUnit.FIELDS.keys())
+		if self.index in self.storage.ambiguous:
+			keys.append(MOR_UNIT_AMBIGUOUS)
+		return keys
+
+	def items(self):
+		"""Same as dict.items
+
+		Returns:
+			list: List of (key, value)
+		"""
+		return [ (key, self[key]) for key in self.keys() ]
+
+	def toDict(self):
+		"""Returns a dict version of this MOR unit
+
+		Returns:
+			dict: MOR unit
+		"""
+		return dict(self.items())
+
+class MorTier:
+	"""View of the MOR units of a line. Behaves like the list of dicts used in previous versions
+	"""
+
+	__slots__ = ( "storage", "start", "end" )
+
+	def __init__(self, storage, start, end):
+		self.storage = storage
+		self.start = start
+		self.end = end
+
+	def __reduce__(self):
+		return ( MorTier, (self.storage, self.start, self.end) )
+
+	def __len__(self):
+		return self.end - self.start
+
+	def __getitem__(self, i):
+		if isinstance(i, slice):
+			start, stop, step = i.indices(len(self))
+			if step != 1:
+				return [ self[j] for j in range(start, stop, step) ]
+			return MorTier(self.storage, self.start + start, self.start + max(start, stop))
+
+		if i < 0:
+			i += len(self)
+		if i < 0 or i >= len(self):
+			raise IndexError("MOR unit index out of range")
+
+		return MorUnit(self.storage, self.start + i)
+
+	def __iter__(self):
+		for i in range(self.start, self.end):
+			yield MorUnit(self.storage, i)
+
+	def __eq__(self, other):
+		if isinstance(other, (list, MorTier)):
+			return len(self) == len(other) and all( a == b for a, b in zip(self, other) )
+		return NotImplemented
+
+	def __repr__(self):
+		return repr(self.toList())
+
+	def categoriaIds(self):
+		"""Ids in MOR_SYMBOLS of the categories of this line
+
+		Returns:
+			array: Ids
+		"""
+		return self.storage.categorias[self.start:self.end]
+
+	def lexemaIds(self):
+		"""Ids in MOR_SYMBOLS of the lexemes of this line
+
+		Returns:
+			array: Ids
+		"""
+		return self.storage.lexemas[self.start:self.end]
+
+	def extraIds(self):
+		"""Ids in MOR_SYMBOLS of the extras of this line
+
+		Returns:
+			array: Ids
+		"""
+		return self.storage.extras[self.start:self.end]
+
+	def toList(self):
+		"""Returns a list of dicts version of this MOR tier
+
+		Returns:
+			list: MOR units
+		"""
+		return [ morUnit.toDict() for morUnit in self ]
+
+class MorPattern:
+	"""Compiled MOR criteria (see ChaFile.findLinesByMorCriteria). Compile it once and use it for every line.
+	Each step of the criteria is a bit so a MOR unit is checked against all of them at once (shift-and)
+	and every match, overlapping ones included, is found in one pass over the line
+	"""
+
+	__slots__ = ( "length", "categorias", "lexemas", "extras", "pairs", "unknown", "symbolsSize" )
+
+	def __init__(self, criteria, criteriaType = MOR_UNIT_CATEGORIA, addSymbols = False):
+		"""Constructor. Strings that are not in MOR_SYMBOLS (no parsed file has them) never match
+
+		Args:
+			criteria (list): Same as ChaFile.findLinesByMorCriteria
+			criteriaType (str or list, optional): Same as ChaFile.findLinesByMorCriteria. Defaults to MOR_UNIT_CATEGORIA.
+			addSymbols (bool, optional): Add unknown strings to MOR_SYMBOLS so they match files parsed later.
+				Only for fixed criteria such as the light verb rules. Defaults to False.
+
+		Raises:
+			Exception: MOR_UNIT_CATEGORIA_LEXEMA criteria without | symbol
+		"""
+		self.length = len(criteria)
+		self.unknown = False #some string was not in MOR_SYMBOLS
+		self.symbolsSize = len(MOR_SYMBOLS)
+
+		getId = MOR_SYMBOLS.intern if addSymbols else MOR_SYMBOLS.getId
+
+		# MOR_SYMBOLS id -> bit mask of the steps it matches
+		self.categorias = {}
+		self.lexemas = {}
+		self.extras = {}
+		self.pairs = {} #(categoria id, lexema id) -> bit mask
+
+		masks = { MOR_UNIT_CATEGORIA : self.categorias, MOR_UNIT_LEXEMA : self.lexemas, MOR_UNIT_EXTRA : self.extras }
+
+		for i, options in enumerate(criteria):
+			bit = 1 << i
+			currentCriteriaType = criteriaType[i] if isinstance(criteriaType, list) else criteriaType
+			for c in options:
+				if currentCriteriaType == MOR_UNIT_CATEGORIA_LEXEMA:
+					if not "|" in c:
+						raise Exception("Criteria type is MOR_UNIT_CATEGORIA_LEXEMA but criteria doesn't include | symbol")
+					arrCriteria = c.split("|")
+					key = ( getId(arrCriteria[0]), getId(arrCriteria[1]) )
+					if -1 in key:
+						self.unknown = True
+						continue
+					self.pairs[key] = self.pairs.get(key, 0) | bit
 				else:
-					tierName = tier[1:]
-					line[tierName] = content
-
-					if tierName == "mor":
-						self.morFound = True
-
-					#no es realmente un tier
-					#esto sucede cuando los bullets son de la forma %snd:"filename"_from_to
-					if tierName == "snd":
-						del line[tierName]
-						lstContent = content.replace(BULLET_TAG, "").split("_")
-						line[ LINE_BULLET ] = [int(lstContent[-2]), int(lstContent[-1])]
-
-					if hasattr(self, f"_parse{tierName.capitalize()}" ):
-						tierProcessFunction = getattr(self, f"_parse{tierName.capitalize()}" )
-						line[tierName] = tierProcessFunction( line[tierName], line[LINE_NUMBER] )
-			
-			
-			if not skipLine:
-				self._setAddressee(line)
-
-				if not (self.onlyCDS and line[LINE_ADDRESSEE] not in [SPEAKER_TARGET_CHILD, SPEAKER_BOTH]):
-					if not speaker in self.ignoreSpeakers:
-						if len(self.includeLines) == 0 or line[ LINE_NUMBER ] in self.includeLines:
-							utteranceNumber += 1
-							line[LINE_UTTERANCE_NUMBER] = utteranceNumber
-							self.lines.append(line)
-			
-			lineNumber += r.count("\n")
+					mask = masks[currentCriteriaType]
+					key = getId(c)
+					if key == -1:
+						self.unknown = True
+						continue
+					mask[key] = mask.get(key, 0) | bit
 
-		#if MOR is found on file all lines should have at least an empty TIER_MOR
-		if self.morFound:
-			for l in self.getLines():
-				if TIER_MOR not in l:
-					l[TIER_MOR] = []
+	def __len__(self):
+		return self.length
 
-	def getLines(self, addressee=ADDRESSEE_ALL):
-		"""Get an array of parsed utterances
+	def isStale(self):
+		"""Some string was unknown when compiling but files parsed since then could have it
 
 		Returns:
-			list: Utterances. Access data using the LINE constants
+			bool: True if it should be compiled again
 		"""
+		return self.unknown and len(MOR_SYMBOLS) != self.symbolsSize
 
-		lines = []
+	def iterEnds(self, mor):
+		"""Position of the last MOR unit of each match
 
-		if addressee == ADDRESSEE_ALL:
-			lines = self.lines[:]
-		elif addressee == ADDRESSEE_CHILD_DIRECTED:
-			for l in self.lines:
-				if l[LINE_ADDRESSEE] == SPEAKER_TARGET_CHILD:
-					lines.append(l)
-		elif addressee == ADDRESSEE_CHILD_PRODUCED:
-			for l in self.lines:
-				if l[LINE_SPEAKER] == SPEAKER_TARGET_CHILD:
-					lines.append(l)
-		elif addressee == ADDRESSEE_OVER_HEARD:
-			for l in self.lines:
-				if l[LINE_ADDRESSEE] != SPEAKER_TARGET_CHILD and l[LINE_SPEAKER] != SPEAKER_TARGET_CHILD :
-					lines.append(l)
-		
-		return lines
+		Args:
+			mor (MorTier or list): MOR tier or a list of MorUnit
 
-	def getLine(self, lineNumber):
-		"""Get a line by its number
+		Yields:
+			int: Index in mor
+		"""
+		if self.length == 0 or mor == MISSING_VALUE or len(mor) == 0:
+			return
+
+		if isinstance(mor, MorTier):
+			storage = mor.storage
+			storageIndexes = range(mor.start, mor.end)
+		else:
+			storage = mor[0].storage
+			storageIndexes = [ morUnit.index for morUnit in mor ]
+
+		categoriaIds, lexemaIds, extraIds = storage.categorias, storage.lexemas, storage.extras
+		categorias, lexemas, extras, pairs = self.categorias, self.lexemas, self.extras, self.pairs
+		last = 1 << (self.length - 1)
+
+		state = 0 #bit i is set if the last i+1 units match the first i+1 steps
+		for position, s in enumerate(storageIndexes):
+			mask = 0
+			if categorias:
+				mask = categorias.get(categoriaIds[s], 0)
+			if lexemas:
+				mask |= lexemas.get(lexemaIds[s], 0)
+			if extras:
+				mask |= extras.get(extraIds[s], 0)
+			if pairs:
+				mask |= pairs.get( (categoriaIds[s], lexemaIds[s]), 0 )
+
+			state = ( (state << 1) | 1 ) & mask
+			if state & last:
+				yield position
+
+	def getMask(self, storage, storageIndex):
+		"""Steps matched by a MOR unit
 
 		Args:
-			lineNumber (int): Line number
+			storage (MorStorage): MOR units of a ChaFile
+			storageIndex (int): Index of the MOR unit in storage
 
 		Returns:
-			dict: Utterance
+			int: Bit i is set if the unit matches step i
 		"""
-		for line in self.lines:
-			if line[LINE_NUMBER] == lineNumber:
-				return line
+		categoriaId = storage.categorias[storageIndex]
+		lexemaId = storage.lexemas[storageIndex]
 
-		return None
+		mask = self.categorias.get(categoriaId, 0) | self.lexemas.get(lexemaId, 0)
+		if self.extras:
+			mask |= self.extras.get(storage.extras[storageIndex], 0)
+		if self.pairs:
+			mask |= self.pairs.get( (categoriaId, lexemaId), 0 )
+		return mask
 
-	def getLinesFromTo(self, lineFrom, lineTo):
-		"""Get a range of utterances
+	def getMasks(self, storage):
+		"""Same as getMask for every MOR unit in storage at once using NumPy
 
 		Args:
-			lineFrom (int): Line number from
-			lineTo (int): Line number to
+			storage (MorStorage): MOR units of a ChaFile
 
 		Returns:
-			list: Utterances. Access data using the LINE constants
+			numpy.ndarray: Mask of each unit
 		"""
-		linesToReturn = []
+		categoriaIds = np.frombuffer(storage.categorias, dtype=np.int32)
+		lexemaIds = np.frombuffer(storage.lexemas, dtype=np.int32)
+		extraIds = np.frombuffer(storage.extras, dtype=np.int32)
 
-		for line in self.lines:
-			if line[LINE_NUMBER] >= lineFrom and line[LINE_NUMBER] < lineTo:
-				linesToReturn.append(line)
+		mask = np.zeros(len(storage), dtype=object if self.length > 62 else np.int64)
+		for ids, masks in [ (categoriaIds, self.categorias), (lexemaIds, self.lexemas), (extraIds, self.extras) ]:
+			if masks:
+				lookup = np.zeros(len(MOR_SYMBOLS), dtype=mask.dtype)
+				for symbolId, bits in masks.items():
+					lookup[symbolId] = bits
+				mask |= lookup[ids]
+		for (categoriaId, lexemaId), bits in self.pairs.items():
+			mask[ (categoriaIds == categoriaId) & (lexemaIds == lexemaId) ] |= bits
 
-		return linesToReturn
+		return mask
 
-	def getLinesBySpeakers(self):
-		"""Get all parsed utterance grouped by speaker
+	def findStarts(self, storage):
+		"""Every match in a whole MorStorage at once using NumPy. Matches may go across lines
+
+		Args:
+			storage (MorStorage): MOR units of a ChaFile
 
 		Returns:
-			list: Utterances. Access data using the LINE constants
+			numpy.ndarray: Storage index of the first MOR unit of each match
 		"""
-		linesBySpeakers = {}
+		count = len(storage) - self.length + 1
+		if self.length == 0 or count <= 0:
+			return np.zeros(0, dtype=np.int64)
 
-		for line in self.lines:
-			if not line[LINE_SPEAKER] in linesBySpeakers:
-				linesBySpeakers[ line[LINE_SPEAKER] ] = []
+		mask = self.getMasks(storage)
 
-			linesBySpeakers[ line[LINE_SPEAKER] ].append(line)
+		matched = np.ones(count, dtype=bool)
+		for k in range(self.length):
+			matched &= ( (mask[k:k+count] >> k) & 1 ) == 1
 
-		return linesBySpeakers
+		return np.flatnonzero(matched)
 
-	def getSpeakers(self):
-		"""Get all speakers involved in this transcription
+	def search(self, mor):
+		"""First match
+
+		Args:
+			mor (MorTier or list): MOR tier or a list of MorUnit
 
 		Returns:
-			list: Speakers
+			list: Indexes of the matching MOR units or [] if there is no match
 		"""
-		return self.speakers
+		for end in self.iterEnds(mor):
+			return list( range(end - self.length + 1, end + 1) )
+		return []
 
-	def setLanguage(self, lang=None):
-		"""Set language for this transcription. It will be used for processing light verbs
+	def findAll(self, mor):
+		"""Every match, overlapping ones included
 
 		Args:
-			lang (string, optional): Use LANGUAGE constant or None for parsing it from the CHA file. Defaults to None.
+			mor (MorTier or list): MOR tier or a list of MorUnit
 
-		Raises:
-			FileNotFoundError: -
+		Returns:
+			list: For each match the indexes of the matching MOR units
 		"""
-		if lang == None:
-			LANGUAGE_RE = "@Languages:.(.+)"
-
-			if not os.path.isfile(self.chaFilePath):
-				raise FileNotFoundError()
-
-			with open(self.chaFilePath, "r") as f:
-				loop = True
-				while loop:
-					line = f.readline()
-					if line:
-						x = re.match(LANGUAGE_RE, line)
-						if x is not None:
-							language = x.group(1)
-							if language in [LANGUAGE_SPANISH, LANGUAGE_ENGLISH]:
-								self.language = language
-
-							loop = False
-					else:
-						loop = False
+		return [ list( range(end - self.length + 1, end + 1) ) for end in self.iterEnds(mor) ]
+
+class LightVerbRules:
+	"""Light verb rules of a language compiled once. Each rule is applied until it doesn't match anymore (or once):
+	the matching MOR units are removed, one of them is counted as verb and the units at both sides become adjacent.
+	Units are matched from left to right and a unit that doesn't match the next step starts over from the first step
+	without checking it against the first step (so "v|debe v|debe inf|come" doesn't match "debe inf").
+	Units before a match are left at the first step, so after a removal the search goes on from there
+	instead of starting over, and each rule goes through the line once
+	"""
+
+	def __init__(self, rules, stopWords = []):
+		"""Constructor
+
+		Args:
+			rules (list): (criteria, criteriaType, index in the match of the word counted as verb, applied until it doesn't match
+				or only to the first match) in the order they are applied
+			stopWords (list): MOR units (dict) removed after the rules without counting them as verbs
+		"""
+		self.rules = [ ( MorPattern(criteria, criteriaType, addSymbols = True), verbIndex, repeat ) for criteria, criteriaType, verbIndex, repeat in rules ]
+
+		# every step of every rule in one pattern so a MOR unit is looked up once for all the rules.
+		# Rule i uses the bits from offsets[i]
+		allCriteria = []
+		allCriteriaTypes = []
+		self.offsets = []
+		for criteria, criteriaType, verbIndex, repeat in rules:
+			self.offsets.append( len(allCriteria) )
+			allCriteria += criteria
+			allCriteriaTypes += criteriaType if isinstance(criteriaType, list) else [ criteriaType ] * len(criteria)
+		self.allRules = MorPattern(allCriteria, allCriteriaTypes, addSymbols = True)
+
+		self.stopWords = set( ( MOR_SYMBOLS.intern(w[MOR_UNIT_CATEGORIA]), MOR_SYMBOLS.intern(w[MOR_UNIT_LEXEMA]), MOR_SYMBOLS.intern(w[MOR_UNIT_EXTRA]) ) for w in stopWords )
+
+	def getLinesToProcess(self, storage, tierStarts, tierEnds):
+		"""Lines where a rule matches or a stop word is found, computed for every line at once using NumPy.
+		Units are only removed when something matches so rules can't match in any other line
+
+		Args:
+			storage (MorStorage): MOR units of a ChaFile
+			tierStarts (numpy.ndarray): Storage index where each MOR tier starts. Sorted, empty tiers not included
+			tierEnds (numpy.ndarray): Storage index where each MOR tier ends
+
+		Returns:
+			numpy.ndarray: True for each line that should go through apply
+		"""
+		toProcess = np.zeros(len(tierStarts), dtype=bool)
+		if len(tierStarts) == 0:
+			return toProcess
+
+		for pattern, verbIndex, repeat in self.rules:
+			matchStarts = pattern.findStarts(storage)
+			lineIndexes = np.searchsorted(tierStarts, matchStarts, side="right") - 1
+			valid = (lineIndexes >= 0) & (matchStarts + len(pattern) <= tierEnds[lineIndexes])
+			toProcess[ lineIndexes[valid] ] = True
+
+		if self.stopWords:
+			categoriaIds = np.frombuffer(storage.categorias, dtype=np.int32)
+			lexemaIds = np.frombuffer(storage.lexemas, dtype=np.int32)
+			extraIds = np.frombuffer(storage.extras, dtype=np.int32)
+			isStopWord = np.zeros(len(storage), dtype=bool)
+			for categoriaId, lexemaId, extraId in self.stopWords:
+				isStopWord |= (categoriaIds == categoriaId) & (lexemaIds == lexemaId) & (extraIds == extraId)
+
+			stopWordIndexes = np.flatnonzero(isStopWord)
+			lineIndexes = np.searchsorted(tierStarts, stopWordIndexes, side="right") - 1
+			valid = (lineIndexes >= 0) & (stopWordIndexes < tierEnds[lineIndexes])
+			toProcess[ lineIndexes[valid] ] = True
+
+		return toProcess
+
+	def apply(self, mor):
+		"""Finds light verbs in a MOR tier
+
+		Args:
+			mor (MorTier): MOR tier
+
+		Returns:
+			tuple: (indexes of the verbs found by the rules, indexes of the units left)
+		"""
+		storage = mor.storage
+		verbs = []
+		remaining = range(mor.start, mor.end)
+
+		masks = [ self.allRules.getMask(storage, s) for s in remaining ]
+		lineMask = 0
+		for mask in masks:
+			lineMask |= mask
+
+		for (pattern, verbIndex, repeat), offset in zip(self.rules, self.offsets):
+			length = len(pattern)
+			full = (1 << length) - 1
+			# some step is not matched by any unit
+			if (lineMask >> offset) & full != full:
+				continue
+
+			left = []
+			match = []
+			for position, s in enumerate(remaining):
+				if ( masks[s - mor.start] >> ( offset + len(match) ) ) & 1:
+					match.append(s)
+					if len(match) == length:
+						verbs.append( match[verbIndex] - mor.start )
+						match = []
+						if not repeat:
+							left += remaining[ position + 1 : ]
+							break
+				else:
+					left += match
+					left.append(s)
+					match = []
+			remaining = left + match
+
+		if self.stopWords:
+			remaining = [ s for s in remaining if s in storage.ambiguous or
+						  ( storage.categorias[s], storage.lexemas[s], storage.extras[s] ) not in self.stopWords ]
+
+		return verbs, [ s - mor.start for s in remaining ]
+
+LIGHT_VERB_RULES = {
+	LANGUAGE_SPANISH : LightVerbRules(LIGHT_VERB_RULES_SPANISH),
+	LANGUAGE_ENGLISH : LightVerbRules(LIGHT_VERB_RULES_ENGLISH, LIGHT_VERB_STOP_WORDS_ENGLISH)
+}
+
+class MainTierTokenizer:
+	"""Splits the main tier into the words parsed by MOR, so they map one to one with TIER_MOR.
+	The utterance is read once from left to right: annotations ([: x], [=! x], [/], ...) apply to the
+	word or <group> before them, which is always at the end of the words found so far
+	"""
+
+	def __init__(self, stopWords = STOP_WORDS):
+		"""Constructor
+
+		Args:
+			stopWords (list): Words removed because they are removed from the MOR tier too. Defaults to STOP_WORDS
+		"""
+		self.stopWords = set(stopWords)
+		self.stopWords.add(WORD_XXX) # the transcriber couldn't understand it so it isn't parsed by MOR
+
+	def tokenize(self, utterance):
+		"""Words of the utterance parsed by MOR
+
+		Args:
+			utterance (str): Main tier, i.e. line[LINE_UTTERANCE]
+
+		Returns:
+			list: Words
+		"""
+		words = []
+
+		# everything is removed if utterance is in a foreign language
+		if utterance.startswith("[- "):
+			return words
+
+		groupStarts = [] # where each open <group> starts in words
+		lastStart = 0 # where the last word or group starts in words, annotations apply to it
+
+		for m in MAIN_TIER_TOKEN_REGEX.finditer(utterance):
+			annotation, bracket, word = m.groups()
+
+			if word is not None:
+				lastStart = len(words)
+				self.addWord(word, words)
+			elif bracket == "<":
+				groupStarts.append( len(words) )
+			elif bracket == ">":
+				if groupStarts:
+					lastStart = groupStarts.pop()
+			elif annotation.startswith(": "):
+				# <slang_word> [: some_replacing_word] keeps some_replacing_word
+				del words[lastStart:]
+				for w in annotation[2:].split():
+					self.addWord(w, words)
+			elif annotation.startswith("/"):
+				# [/], [//], ... mean repetition or retracing. Words before won't be parsed by MOR
+				del words[lastStart:]
+
+			# any other annotation ([=! x], [+ x], [* x], ...) is removed keeping what it refers to
+
+		return words
+
+	def addWord(self, word, words):
+		"""Appends word to words if it is parsed by MOR. Commas are parsed by MOR so they are split apart
+
+		Args:
+			word (str): Word from the main tier
+			words (list): Words found so far
+		"""
+		# Remove words that starts with -
+		if word[0] == "-":
+			return
+
+		if "," not in word:
+			if self.isWord(word):
+				words.append(word)
+			return
+
+		for i, w in enumerate( word.split(",") ):
+			if i > 0:
+				words.append(",")
+			if self.isWord(w):
+				words.append(w)
+
+	def isWord(self, word):
+		"""Only words that start with a letter or a number different to 0 are parsed by MOR,
+		except for foreign words (with @ and :), stop words, xxx and pauses
+
+		Args:
+			word (str): Word without commas
+
+		Returns:
+			bool: True if MOR parses it
+		"""
+		if len(word) == 0:
+			return False
+
+		first = word[0]
+		if not ( first.isalpha() or first in "'(" or (first.isdigit() and first != "0") ):
+			return False
+
+		if word in self.stopWords:
+			return False
+
+		if first == "(" and PAUSE_REGEX.match(word):
+			return False
+
+		return "@" not in word or FOREIGN_WORD_REGEX.search(word) is None
+
+MAIN_TIER_TOKENIZER = MainTierTokenizer()
+
+class Line:
+	"""Parsed utterance. Use the LINE constants to access its data, i.e. line[LINE_SPEAKER],
+	the same way as if it was a dict. Tiers other than TIER_MOR and TIER_XDS are kept by name.
+	Tiers set with setLazy are parsed the first time they are read.
+	"""
+
+	__slots__ = ( "number", "utteranceNumber", "speaker", "utterance", "bullet", "mor", "xds",
+				  "addressee", "nouns", "adjectives", "verbs", "lightVerbs", "morToWords", "tiers", "empty", "lazyParsers", "lazyTiers" )
+
+	# LINE constant -> slot
+	FIELDS = {
+		LINE_NUMBER : "number",
+		LINE_UTTERANCE_NUMBER : "utteranceNumber",
+		LINE_SPEAKER : "speaker",
+		LINE_UTTERANCE : "utterance",
+		LINE_BULLET : "bullet",
+		TIER_MOR : "mor",
+		TIER_XDS : "xds",
+		LINE_ADDRESSEE : "addressee",
+		LINE_NOUNS : "nouns",
+		LINE_ADJECTIVES : "adjectives",
+		LINE_VERBS : "verbs",
+		LINE_LIGHT_VERBS : "lightVerbs",
+		LINE_MOR_TO_WORDS : "morToWords"
+	}
+
+	def __init__(self, number, utteranceNumber = 0):
+		self.number = number
+		self.utteranceNumber = utteranceNumber
+		self.tiers = None
+		self.empty = None #see ChaFile.isUtteranceEmpty
+		self.lazyParsers = None #see setLazy
+		self.lazyTiers = None
+
+	def __getstate__(self):
+		# parsers can't be pickled so lazy tiers are parsed first
+		self.parseLazy()
+
+		# a tuple pickles much faster than the default dict of slots. Unset slots are saved as Ellipsis
+		return tuple( getattr(self, field, Ellipsis) for field in Line.__slots__ )
+
+	def __setstate__(self, state):
+		for field, value in zip(Line.__slots__, state):
+			if value is not Ellipsis:
+				setattr(self, field, value)
+
+	def __getitem__(self, key):
+		field = Line.FIELDS.get(key)
+		if field is None:
+			if self.tiers is not None and key in self.tiers:
+				return self.tiers[key]
+			if self.lazyTiers is not None and key in self.lazyTiers:
+				return self._parseLazy(key)
+			raise KeyError(key)
+
+		try:
+			return getattr(self, field)
+		except AttributeError:
+			if self.lazyTiers is not None and key in self.lazyTiers:
+				return self._parseLazy(key)
+			raise KeyError(key) from None
+
+	def __setitem__(self, key, value):
+		if self.lazyTiers is not None:
+			self.lazyTiers.pop(key, None)
+
+		field = Line.FIELDS.get(key)
+		if field is None:
+			if self.tiers is None:
+				self.tiers = {}
+			self.tiers[key] = value
 		else:
-			self.language = lang
+			setattr(self, field, value)
 
-		if self.language is None:
-			log.log("Warning: no language found")
-	def getLanguage(self):
-		"""Return current language
+	def __delitem__(self, key):
+		if self.lazyTiers is not None and self.lazyTiers.pop(key, None) is not None:
+			return
+
+		field = Line.FIELDS.get(key)
+		try:
+			if field is None:
+				del self.tiers[key]
+			else:
+				delattr(self, field)
+		except (AttributeError, KeyError, TypeError):
+			raise KeyError(key) from None
+
+	def __contains__(self, key):
+		if self.lazyTiers is not None and key in self.lazyTiers:
+			return True
+
+		field = Line.FIELDS.get(key)
+		if field is None:
+			return self.tiers is not None and key in self.tiers
+		return hasattr(self, field)
+
+	def __iter__(self):
+		return iter(self.keys())
+
+	def __len__(self):
+		return len(self.keys())
+
+	def __repr__(self):
+		return repr(self.toDict())
+
+	def get(self, key, default = None):
+		"""Same as dict.get
+		"""
+		try:
+			return self[key]
+		except KeyError:
+			return default
+
+	def keys(self):
+		"""Returns the LINE constants and tier names present in this line
+
+		Returns:
+			list: Keys
+		"""
+		lazyTiers = self.lazyTiers if self.lazyTiers is not None else {}
+
+		keys = [ key for key, field in Line.FIELDS.items() if hasattr(self, field) or key in lazyTiers ]
+		if self.tiers is not None:
+			keys.extend(self.tiers.keys())
+		keys.extend( key for key in lazyTiers if key not in Line.FIELDS )
+		return keys
+
+	def items(self):
+		"""Same as dict.items
+
+		Returns:
+			list: List of (key, value)
+		"""
+		return [ (key, self[key]) for key in self.keys() ]
+
+	def setLazy(self, parsers, tiers):
+		"""Sets tiers that are parsed the first time they are read. The result is kept in the line.
+		Only strings are kept per line so the garbage collector doesn't need to go through them
+
+		Args:
+			parsers (dict): Tier name and parser(content, line number). The same dict is shared by every line
+			tiers (dict): Tier name and content
+		"""
+		self.lazyParsers = parsers
+		self.lazyTiers = tiers
+
+	def parseLazy(self):
+		"""Parses every tier set with setLazy that wasn't read yet
+		"""
+		while self.lazyTiers:
+			self._parseLazy( next(iter(self.lazyTiers)) )
+
+	def _parseLazy(self, key):
+		"""Internal use. Parses a lazy tier and keeps the result
+
+		Returns:
+			any: Parsed tier
+		"""
+		content = self.lazyTiers.pop(key)
+		parser = self.lazyParsers[key]
+		if not self.lazyTiers:
+			self.lazyTiers = None
+			self.lazyParsers = None
+
+		value = parser(content, self.number)
+		self[key] = value
+		return value
+
+	def toDict(self):
+		"""Returns a dict version of this line, i.e. for serializing it with json
+
+		Returns:
+			dict: Utterance
+		"""
+		lineDict = dict(self.items())
+		if isinstance(lineDict.get(TIER_MOR), MorTier):
+			lineDict[TIER_MOR] = lineDict[TIER_MOR].toList()
+		return lineDict
+
+class ChaHeader:
+	"""Headers of a CHA file (the @ lines before the first utterance)
+	"""
+
+	# @ID fields in order
+	ID_FIELDS = [ PARTICIPANT_LANGUAGE, PARTICIPANT_CORPUS, PARTICIPANT_CODE, PARTICIPANT_AGE, PARTICIPANT_SEX,
+				  PARTICIPANT_GROUP, PARTICIPANT_SES, PARTICIPANT_ROLE, PARTICIPANT_EDUCATION, PARTICIPANT_CUSTOM ]
+
+	def __init__(self, headerLines):
+		"""Constructor
+
+		Args:
+			headerLines (list): Lines of the CHA file before the first utterance
+		"""
+		self.headers = {} #name without @ -> list of values
+
+		name = None
+		for l in headerLines:
+			if l.startswith("@"):
+				name, _, value = l[1:].partition(":")
+				name = name.strip()
+				self.headers.setdefault(name, []).append( value.strip() )
+			elif l.startswith("\t") and name is not None:
+				# multi-line header
+				self.headers[name][-1] = (self.headers[name][-1] + " " + l.strip()).strip()
+
+		self.participants = {}
+
+		for participant in self.getAll("Participants"):
+			for p in participant.split(","):
+				p = p.split()
+				if len(p) > 0:
+					self._getParticipant(p[0])[PARTICIPANT_ROLE] = p[-1]
+					if len(p) > 2:
+						self.participants[p[0]][PARTICIPANT_NAME] = " ".join(p[1:-1])
+
+		for idHeader in self.getAll("ID"):
+			fields = idHeader.split("|")
+			if len(fields) > 2 and fields[2] != "":
+				participant = self._getParticipant(fields[2])
+				for field, value in zip(ChaHeader.ID_FIELDS, fields):
+					if value != "":
+						participant[field] = value
+
+	def _getParticipant(self, code):
+		if code not in self.participants:
+			self.participants[code] = { PARTICIPANT_CODE : code }
+		return self.participants[code]
+
+	def get(self, name, default = None):
+		"""Value of a header
+
+		Args:
+			name (string): Header name without @, i.e. "Languages"
+			default (any, optional): Returned if the header is not present. Defaults to None.
+
+		Returns:
+			string: Value of the first header with that name
+		"""
+		values = self.headers.get(name)
+		return values[0] if values else default
+
+	def getAll(self, name):
+		"""Values of a header that can appear many times (i.e. "ID")
+
+		Returns:
+			list: Values
+		"""
+		return self.headers.get(name, [])[:]
+
+	def getLanguages(self):
+		"""Languages listed in @Languages
+
+		Returns:
+			list: Language codes
+		"""
+		return [ l.strip() for l in self.get("Languages", "").split(",") if l.strip() != "" ]
+
+	def getLanguage(self):
+		"""Language as used by ChaFile
+
+		Returns:
+			string: LANGUAGE constant or None if @Languages is missing or it is not supported
+		"""
+		language = self.get("Languages")
+		return language if language in [LANGUAGE_SPANISH, LANGUAGE_ENGLISH] else None
+
+	def getParticipants(self):
+		"""Participants from @Participants and @ID
+
+		Returns:
+			dict: Speaker code -> dict. Use PARTICIPANT constants as keys. Missing fields are not present
+		"""
+		return { code : dict(p) for code, p in self.participants.items() }
+
+	def getSpeakersByRole(self, role):
+		"""Speakers with this role
+
+		Args:
+			role (string): i.e. "Target_Child" or "Mother"
+
+		Returns:
+			list: Speaker codes
+		"""
+		return [ code for code, p in self.participants.items() if p.get(PARTICIPANT_ROLE) == role ]
+
+	def getAgeInMonths(self, speaker = SPEAKER_TARGET_CHILD):
+		"""Age of a participant as written in @ID (years;months.days)
+
+		Args:
+			speaker (string, optional): Speaker code. Defaults to SPEAKER_TARGET_CHILD.
+
+		Returns:
+			float: Age in months or None if it is not present
+		"""
+		age = self.participants.get(speaker, {}).get(PARTICIPANT_AGE)
+		if age is None:
+			return None
+
+		m = AGE_REGEX.match(age)
+		if m is None:
+			return None
+
+		years, months, days = [ int(x) if x else 0 for x in m.groups() ]
+		return years * 12 + months + days / 30
+
+class TurnDetector:
+	"""Internal use. Turns of every speaker for one configuration of ChaFile.getTurnsBySpeaker.
+	Utterances are fed one at a time and only speakers in the middle of a turn are updated,
+	so every configuration can be computed in the same pass over the file
+	"""
+
+	def __init__(self, speakers, target, maxInterveningChild, maxInterveningOther):
+		"""Constructor
+
+		Args:
+			speakers (list): Speakers whose turns are detected
+			target (str): Addressee of the utterances in a turn (LINE_ADDRESSEE)
+			maxInterveningChild (int): Utterances from the target child allowed in the middle of a turn. None for counting them as any other speaker
+			maxInterveningOther (int): Utterances from other speakers allowed in the middle of a turn
+		"""
+		self.target = target
+		self.maxInterveningChild = maxInterveningChild
+		self.maxInterveningOther = maxInterveningOther
+
+		self.turnos = { speaker : [] for speaker in speakers }
+		self.active = {} #speaker -> [turno, qtyIntervencionChild, qtyIntervencionOther, end of the last bullet]
+
+	def feed(self, l):
+		"""Next utterance. Empty utterances should be skipped
+
+		Args:
+			l (Line): Utterance
+		"""
+		speaker = l.speaker
+		addressee = l.addressee
+		bullet = getattr(l, "bullet", None)
+		tiempoActual = bullet[0] if bullet is not None else None
+		wasActive = speaker in self.active
+
+		for s, state in list(self.active.items()): # turno existente
+			tiempoAnterior = state[3]
+
+			if tiempoActual and tiempoAnterior is not None and (tiempoActual - tiempoAnterior >= TURN_MAX_TIME):
+				self._endTurno(s)
+			elif speaker == s: #el hablante es correcto
+				if addressee == self.target:
+					state[0].append(l)
+					state[3] = bullet[1] if bullet is not None else None
+				else:
+					self._endTurno(s)
+			elif self.maxInterveningChild is not None and speaker == SPEAKER_TARGET_CHILD:
+				state[1] += 1
+				if state[1] > self.maxInterveningChild:
+					self._endTurno(s)
+			else: #el hablante cambió
+				state[2] += 1
+				if state[2] > self.maxInterveningOther:
+					self._endTurno(s)
+
+		# nuevo turno. An utterance that ended a turn doesn't start the next one
+		if not wasActive and speaker in self.turnos and addressee == self.target:
+			self.active[speaker] = [ [l], 0, 0, bullet[1] if bullet is not None else None ]
+
+	def _endTurno(self, speaker):
+		self.turnos[speaker].append( self.active.pop(speaker)[0] )
+
+class ChaColumns:
+	"""Per line values of a file (or a batch of files) as NumPy columns.
+	Totals by addressee or by speaker are a single np.bincount over them
+	"""
+
+	def __init__(self, addressees, speakers, addresseeNames, speakerNames, files = None, fileNames = None):
+		"""Constructor. Use ChaFile.getColumns() or ChaColumns.concatenate()
+
+		Args:
+			addressees (np.ndarray): Addressee code of each line
+			speakers (np.ndarray): Speaker code of each line
+			addresseeNames (list): Addressee of each code
+			speakerNames (list): Speaker of each code
+			files (np.ndarray, optional): File code of each line. Defaults to None (all lines from the same file).
+			fileNames (list, optional): File of each code. Defaults to None.
+		"""
+		self.addressees = addressees
+		self.speakers = speakers
+		self.addresseeNames = addresseeNames
+		self.speakerNames = speakerNames
+		self.files = files if files is not None else np.zeros(len(addressees), dtype=np.int32)
+		self.fileNames = fileNames if fileNames is not None else [None]
+		self.columns = {}
+		self.lazyColumns = {}
+
+	def __len__(self):
+		return len(self.addressees)
+
+	def __contains__(self, name):
+		return name in self.columns or name in self.lazyColumns
+
+	def __getitem__(self, name):
+		if name not in self.columns and name in self.lazyColumns:
+			self[name] = self.lazyColumns.pop(name)()
+		return self.columns[name]
+
+	def __setitem__(self, name, values):
+		values = np.asarray(values)
+		assert len(values) == len(self), "column length doesn't match number of lines"
+		self.columns[name] = values
+		self.lazyColumns.pop(name, None)
+
+	def __delitem__(self, name):
+		self.columns.pop(name, None)
+		self.lazyColumns.pop(name, None)
+
+	def setLazy(self, name, function):
+		"""Column computed the first time it is used
+
+		Args:
+			name (str): Column
+			function (callable): Returns the values of the column
+		"""
+		self.lazyColumns[name] = function
+
+	def materialize(self):
+		"""Computes every lazy column. Lazy columns hold functions of the ChaFile so they can't be pickled,
+		i.e. for sending the columns back from a worker process
+
+		Returns:
+			ChaColumns: self
+		"""
+		for name in list(self.lazyColumns):
+			self[name]
+		return self
+
+	def __getstate__(self):
+		self.materialize()
+		return self.__dict__
+
+	def byAddressee(self, name = None, where = None):
+		"""Total of a column grouped by addressee
+
+		Args:
+			name (str, optional): Column. Defaults to None which counts lines.
+			where (np.ndarray, optional): Boolean mask of the lines to include. Defaults to None (all lines).
+
+		Returns:
+			dict: Addressee and total. Only addressees with at least one included line are returned
+		"""
+		return self._groupBy(self.addressees, self.addresseeNames, name, where)
+
+	def bySpeaker(self, name = None, where = None):
+		"""Total of a column grouped by speaker
+
+		Args:
+			name (str, optional): Column. Defaults to None which counts lines.
+			where (np.ndarray, optional): Boolean mask of the lines to include. Defaults to None (all lines).
+
+		Returns:
+			dict: Speaker and total. Only speakers with at least one included line are returned
+		"""
+		return self._groupBy(self.speakers, self.speakerNames, name, where)
+
+	def byFile(self, name = None, where = None):
+		"""Total of a column grouped by file
+
+		Args:
+			name (str, optional): Column. Defaults to None which counts lines.
+			where (np.ndarray, optional): Boolean mask of the lines to include. Defaults to None (all lines).
+
+		Returns:
+			dict: File and total. Only files with at least one included line are returned
+		"""
+		return self._groupBy(self.files, self.fileNames, name, where)
+
+	def _groupBy(self, codes, names, name, where):
+		"""Internal use. One bincount for the totals and one for knowing which groups are present
+		"""
+		weights = self[name] if name is not None else None
+
+		if where is not None:
+			codes = codes[where]
+			if weights is not None:
+				weights = weights[where]
+
+		present = np.bincount(codes, minlength=len(names))
+		if weights is None:
+			totals = present
+		else:
+			totals = np.bincount(codes, weights=weights, minlength=len(names))
+
+		return { names[code] : int(totals[code]) for code in np.flatnonzero(present) }
+
+	@staticmethod
+	def concatenate(columnsList):
+		"""Join the columns of several files so totals can be computed for the whole batch.
+		Only columns present in every file are kept
+
+		Args:
+			columnsList (list): List of ChaColumns
+
+		Returns:
+			ChaColumns: All lines
+		"""
+		addresseeNames = []
+		speakerNames = []
+		fileNames = []
+		addressees = []
+		speakers = []
+		files = []
+
+		def remap(codes, oldNames, newNames):
+			translation = np.empty(len(oldNames), dtype=np.int32)
+			for i, n in enumerate(oldNames):
+				if n not in newNames:
+					newNames.append(n)
+				translation[i] = newNames.index(n)
+			return translation[codes] if len(codes) else codes.astype(np.int32)
+
+		for columns in columnsList:
+			addressees.append( remap(columns.addressees, columns.addresseeNames, addresseeNames) )
+			speakers.append( remap(columns.speakers, columns.speakerNames, speakerNames) )
+			files.append( columns.files + len(fileNames) )
+			fileNames.extend(columns.fileNames)
+
+		joined = ChaColumns( np.concatenate(addressees) if addressees else np.zeros(0, dtype=np.int32),
+							 np.concatenate(speakers) if speakers else np.zeros(0, dtype=np.int32),
+							 addresseeNames, speakerNames,
+							 np.concatenate(files) if files else np.zeros(0, dtype=np.int32), fileNames )
+
+		if columnsList:
+			for name in list(columnsList[0].columns) + list(columnsList[0].lazyColumns):
+				if all( name in columns for columns in columnsList ):
+					joined[name] = np.concatenate( [ columns[name] for columns in columnsList ] )
+
+		return joined
+
+class MorIndex:
+	"""Inverted index of MOR units: for each categoria, lexema, extra and categoria|lexema the sorted list
+	of units where it appears. Units are numbered in order so the unit at position p of a line is next to p + 1.
+	Criteria with many words are answered intersecting the postings of each step, shifted to their position.
+	Built by ChaFile.getMorIndex() or ChaCorpus.getMorIndex(). Postings are built the first time they are needed
+	"""
+
+	ADDRESSEES = [ ADDRESSEE_CHILD_DIRECTED, ADDRESSEE_CHILD_PRODUCED, ADDRESSEE_OVER_HEARD ]
+
+	def __init__(self, categorias, lexemas, extras, unitLines, unitPositions, lineNumbers, lineAddressees, lineFiles = None, fileNames = None):
+		"""Constructor
+
+		Args:
+			categorias (numpy.ndarray): MOR_SYMBOLS id of each unit
+			lexemas (numpy.ndarray): MOR_SYMBOLS id of each unit
+			extras (numpy.ndarray): MOR_SYMBOLS id of each unit
+			unitLines (numpy.ndarray): Line of each unit (index in lineNumbers)
+			unitPositions (numpy.ndarray): Position of each unit in its MOR tier
+			lineNumbers (numpy.ndarray): LINE_NUMBER of each line
+			lineAddressees (dict): For each of MorIndex.ADDRESSEES a boolean array, True for the lines in that group
+			lineFiles (numpy.ndarray, optional): File of each line (index in fileNames). Defaults to None (all lines from the same file).
+			fileNames (list, optional): Defaults to [None].
+		"""
+		self.categorias = categorias
+		self.lexemas = lexemas
+		self.extras = extras
+		self.unitLines = unitLines
+		self.unitPositions = unitPositions
+		self.lineNumbers = lineNumbers
+		self.lineAddressees = lineAddressees
+		self.lineFiles = lineFiles if lineFiles is not None else np.zeros(len(lineNumbers), dtype=np.int32)
+		self.fileNames = fileNames if fileNames is not None else [None]
+
+		self.postings = {} #field -> (sorted keys, unit of each key)
+
+	def __len__(self):
+		return len(self.categorias)
+
+	def __getstate__(self):
+		# ids only make sense in this process
+		state = { k : v for k, v in self.__dict__.items() if k != "postings" }
+		state["symbols"] = MOR_SYMBOLS.export(self.categorias, self.lexemas, self.extras)
+		return state
+
+	def __setstate__(self, state):
+		translation = MOR_SYMBOLS.getTranslation( state.pop("symbols") )
+		for field in [ "categorias", "lexemas", "extras" ]:
+			state[field] = translation[ state[field] ] if len(state[field]) else state[field]
+		self.__dict__.update(state)
+		self.postings = {}
+
+	def _getPostings(self, field):
+		"""Internal use. Builds the postings of a field the first time
+
+		Args:
+			field (string): MOR_UNIT_CATEGORIA, MOR_UNIT_LEXEMA, MOR_UNIT_EXTRA or MOR_UNIT_CATEGORIA_LEXEMA
+
+		Returns:
+			tuple: (sorted keys, unit of each key)
+		"""
+		if field not in self.postings:
+			if field == MOR_UNIT_CATEGORIA_LEXEMA:
+				keys = (self.categorias.astype(np.int64) << 32) | self.lexemas.astype(np.int64)
+			else:
+				keys = { MOR_UNIT_CATEGORIA : self.categorias, MOR_UNIT_LEXEMA : self.lexemas, MOR_UNIT_EXTRA : self.extras }[field]
+
+			# stable so units of the same key stay sorted
+			order = np.argsort(keys, kind="stable")
+			self.postings[field] = ( keys[order], order )
+
+		return self.postings[field]
+
+	def getPostings(self, field, key):
+		"""Units where a value appears
+
+		Args:
+			field (string): MOR_UNIT_CATEGORIA, MOR_UNIT_LEXEMA, MOR_UNIT_EXTRA or MOR_UNIT_CATEGORIA_LEXEMA
+			key (string): Value, i.e. "n", "mamá" or "n|mamá"
+
+		Returns:
+			numpy.ndarray: Sorted units
+		"""
+		if field == MOR_UNIT_CATEGORIA_LEXEMA:
+			categoria, lexema = key.split("|")[:2]
+			keyId = ( MOR_SYMBOLS.getId(categoria) << 32 ) | MOR_SYMBOLS.getId(lexema)
+		else:
+			keyId = MOR_SYMBOLS.getId(key)
+
+		return self._getPostingsById(field, keyId)
+
+	def _getPostingsById(self, field, keyId):
+		sortedKeys, order = self._getPostings(field)
+		return order[ np.searchsorted(sortedKeys, keyId, side="left") : np.searchsorted(sortedKeys, keyId, side="right") ]
+
+	def findStarts(self, criteria, criteriaType = MOR_UNIT_CATEGORIA, addressee = ADDRESSEE_ALL):
+		"""First unit of every match, overlapping ones included
+
+		Args:
+			criteria (list or MorPattern): Same as ChaFile.findLinesByMorCriteria
+			criteriaType (str or list, optional): Same as ChaFile.findLinesByMorCriteria. Defaults to MOR_UNIT_CATEGORIA.
+			addressee (str, optional): ADDRESSEE_ALL, ADDRESSEE_CHILD_DIRECTED, ADDRESSEE_CHILD_PRODUCED or ADDRESSEE_OVER_HEARD. Defaults to ADDRESSEE_ALL.
+
+		Returns:
+			numpy.ndarray: Sorted units
+		"""
+		pattern = criteria if isinstance(criteria, MorPattern) else MorPattern(criteria, criteriaType)
+		if len(pattern) == 0:
+			return np.zeros(0, dtype=np.int64)
+
+		starts = None
+		for step in range(len(pattern)):
+			bit = 1 << step
+			postings = []
+			for field, masks in [ (MOR_UNIT_CATEGORIA, pattern.categorias), (MOR_UNIT_LEXEMA, pattern.lexemas),
+								  (MOR_UNIT_EXTRA, pattern.extras), (MOR_UNIT_CATEGORIA_LEXEMA, pattern.pairs) ]:
+				for key, bits in masks.items():
+					if bits & bit:
+						keyId = (key[0] << 32) | key[1] if field == MOR_UNIT_CATEGORIA_LEXEMA else key
+						postings.append( self._getPostingsById(field, keyId) )
+
+			# units matching this step, moved to where the match would start
+			units = np.unique( np.concatenate(postings) ) - step if postings else np.zeros(0, dtype=np.int64)
+			starts = units if starts is None else np.intersect1d(starts, units, assume_unique=True)
+			if len(starts) == 0:
+				return starts
+
+		# every unit of the match in the same line
+		starts = starts[ self.unitLines[starts] == self.unitLines[starts + len(pattern) - 1] ]
+
+		if addressee != ADDRESSEE_ALL:
+			inAddressee = self.lineAddressees.get(addressee)
+			if inAddressee is None:
+				return np.zeros(0, dtype=np.int64)
+			starts = starts[ inAddressee[ self.unitLines[starts] ] ]
+
+		return starts
+
+	def find(self, criteria, criteriaType = MOR_UNIT_CATEGORIA, addressee = ADDRESSEE_ALL):
+		"""Every match, overlapping ones included
+
+		Args:
+			criteria (list or MorPattern): Same as ChaFile.findLinesByMorCriteria
+			criteriaType (str or list, optional): Same as ChaFile.findLinesByMorCriteria. Defaults to MOR_UNIT_CATEGORIA.
+			addressee (str, optional): Same as findStarts. Defaults to ADDRESSEE_ALL.
+
+		Returns:
+			list: (file name, LINE_NUMBER, position of the first word in the MOR tier) for each match
+		"""
+		starts = self.findStarts(criteria, criteriaType, addressee)
+		lines = self.unitLines[starts]
+
+		return list( zip( [ self.fileNames[f] for f in self.lineFiles[lines].tolist() ],
+						  self.lineNumbers[lines].tolist(), self.unitPositions[starts].tolist() ) )
+
+	@staticmethod
+	def concatenate(indexes):
+		"""Join the indexes of several files
+
+		Args:
+			indexes (list): List of MorIndex
+
+		Returns:
+			MorIndex: Index with every unit
+		"""
+		def join(arrays, dtype):
+			return np.concatenate(arrays) if arrays else np.zeros(0, dtype=dtype)
+
+		unitLines = []
+		lineFiles = []
+		fileNames = []
+		countLines = 0
+		for index in indexes:
+			unitLines.append( index.unitLines + countLines )
+			lineFiles.append( index.lineFiles + len(fileNames) )
+			countLines += len(index.lineNumbers)
+			fileNames.extend(index.fileNames)
+
+		return MorIndex( join([ i.categorias for i in indexes ], np.int32),
+						 join([ i.lexemas for i in indexes ], np.int32),
+						 join([ i.extras for i in indexes ], np.int32),
+						 join(unitLines, np.int64),
+						 join([ i.unitPositions for i in indexes ], np.int64),
+						 join([ i.lineNumbers for i in indexes ], np.int64),
+						 { a : join([ i.lineAddressees[a] for i in indexes ], bool) for a in MorIndex.ADDRESSEES },
+						 join(lineFiles, np.int32), fileNames )
+
+class ChaFile:
+
+	def __init__(self, chaFilePath,
+				 ignoreSpeakers = [ SPEAKER_SILENCE ], onlyCDS = False, includeLines = [],
+				 verbose = True, language = None, stream = False, cacheDir = None, emptyWords = None, lazy = False,
+				 tiers = None, ignoreTiers = [], instrument = False):
+		"""Constructor. Loads the CHA file and parse it
+
+		Args:
+			chaFilePath (string): Path to the CHA file
+			ignoreSpeakers (list, optional): Utterances from these speakers won't be parsed. Defaults to [ SPEAKER_SILENCE ].
+			onlyCDS (bool, optional): Only child directed utterances will be parsed. Defaults to False.
+			includeLines (list, optional): Only these line numbers will be parsed. Defaults to [] which means all lines.
+			verbose (bool, optional): Extra information will be printed when processing. Defaults to False.
+			language (string, optional): Use one of the LANGUAGE constants or None for parsing it from the CHA file. Defaults to None.
+			stream (bool, optional): Don't load the utterances in memory. Use iterLines() to go through them. Defaults to False.
+			cacheDir (string, optional): Parsed files are saved here and loaded next time unless the CHA file or the options changed. Defaults to None (no cache).
+			emptyWords (list, optional): Utterances without MOR that have any of these words are considered empty. Defaults to None (EMPTY_WORDS for the language).
+			lazy (bool, optional): Dependent tiers with a parser (i.e. TIER_MOR) are parsed the first time they are read. Faster when only speakers, addressees or bullets are needed. Defaults to False.
+			tiers (list, optional): Only these dependent tiers will be parsed (i.e. [ TIER_MOR ]). Defaults to None which means all tiers.
+			ignoreTiers (list, optional): These dependent tiers won't be parsed. TIERS_REQUIRED are always parsed. Defaults to [].
+			instrument (bool, optional): Time each stage of the parsing and analysis (see stats()). Defaults to False.
+		"""
+
+		self.noBullets = True
+		self.lines = []
+		self.speakers = []
+		self.language = None
+		self.languageOverride = language #language given to the constructor, None for the one in the header
+		self.header = None
+		self.morAmbiguousLines = []
+		self.morUnitCache = {}
+		self.morStorage = MorStorage()
+		self.criteriaCache = {}
+		self.columns = None
+		self.morIndex = None
+		self.turns = None
+		self.emptyWords = emptyWords
+		self.emptyRegex = None
+		self.linesByAddressee = {}
+		self.linesBySpeaker = {}
+		self.linesByNumber = { LINE_NUMBER : {}, LINE_UTTERANCE_NUMBER : {} }
+		self.sortedNumbers = { LINE_NUMBER : [], LINE_UTTERANCE_NUMBER : [] }
+
+		self.posAnnotations = {} #(countCopAux, processLightVerbs) -> verbs, light verbs and nouns of every line
+		self.processedVerbs = None #options of the verbs currently in the lines
+		self.processedNouns = None #options of the verbs the nouns in the lines were found with
+		self.processedAdjectives = False
+
+		self.morFound = False #true if MOR was found in at least one line
+
+		self.chaFilePath = chaFilePath
+		self.ignoreSpeakers = ignoreSpeakers
+		self.onlyCDS = onlyCDS
+		self.includeLines = includeLines
+		self.lazy = lazy
+		self.stream = stream
+		self.tiers = tiers
+		self.ignoreTiers = ignoreTiers
+		self.lazyParsers = {} #tier name -> parser, shared by every line with lazy tiers
+
+		self.statistics = Stats()
+		for counter in [ STATS_MALFORMED_MOR_UNITS, STATS_MOR_TO_WORDS_FAILURES ]:
+			self.statistics.count(counter, 0)
+		if instrument:
+			self._instrument()
+
+		self.log = Log(printToTerminal = verbose)
+
+		self.filename = os.path.basename(chaFilePath)
+		self.filename = self.filename[0:self.filename.rfind(".")]
+
+		# tier handlers. Any _parse<Tiername> method will be used for parsing that tier
+		self.tierParsers = { name[len("_parse"):] : getattr(self, name) for name in dir(self) if name.startswith("_parse") }
+
+		if not stream:
+			if cacheDir is None:
+				self.processLines()
+			else:
+				self._processLinesCached( Cache(cacheDir, CACHE_MAX_SIZE) )
+
+		# after parsing so the header read by the lexer is used
+		self.setLanguage(language)
+
+	def _instrument(self):
+		"""Internal use. Replaces the methods of each stage with timed ones for this instance.
+		Called before anything else so tier parsers are the timed ones too
+		"""
+		stages = {
+			STATS_PROCESS_LINES : "processLines",
+			STATS_LOAD_CACHE : "_setCacheState",
+			STATS_BUILD_LINE : "_buildLine",
+			STATS_PARSE_MOR : "_parseMor",
+			STATS_PARSE_MOR_UNIT : "_parseMorUnit",
+			STATS_SET_ADDRESSEE : "_setAddressee",
+			STATS_POPULATE_VERBS : "_getVerbAnnotations",
+			STATS_LIGHT_VERBS : "_findVerbsInLine",
+			STATS_TURNS : "_getTurns",
+			STATS_MOR_TO_WORDS : "processMorToWordsInLine"
+		}
+		for stage, method in stages.items():
+			setattr( self, method, self.statistics.wrap(stage, getattr(self, method)) )
+
+		self._iterRecords = self.statistics.wrapGenerator(STATS_RECORDS, self._iterRecords)
+
+	def stats(self):
+		"""Time and calls of each stage (only if instrument was set) and counters: lines, ambiguous lines,
+		malformed MOR units and lines where processMorToWords found that words and MOR tier don't align.
+		Malformed MOR units are counted every time they are found, in the MOR tiers parsed so far (lazy tiers
+		are parsed when they are first used). Use Stats.concatenate() for the totals of many files
+
+		Returns:
+			Stats: Copy of the stats of this file. Use STATS constants, i.e. stats.times[STATS_PARSE_MOR] or stats.counters[STATS_LINES]
+		"""
+		stats = self.statistics.copy()
+		stats.count(STATS_FILES)
+		stats.count(STATS_LINES, len(self.lines))
+		stats.count(STATS_AMBIGUOUS_LINES, len(self.morAmbiguousLines))
+		return stats
+
+	def processLines(self):
+		"""Internal use. Main function that parses the CHA file
+
+		Raises:
+			FileNotFoundError: The path to the CHA file does not exist
+		"""
+
+		# lines are built from many small objects and none of them is garbage so the collector is paused meanwhile
+		gcEnabled = gc.isenabled()
+		gc.disable()
+		try:
+			self.lines = list(self._iterLines())
+		finally:
+			if gcEnabled:
+				gc.enable()
+		self.columns = None
+
+		#if MOR is found on file all lines should have at least an empty TIER_MOR
+		if self.morFound:
+			for l in self.getLines():
+				if TIER_MOR not in l:
+					l[TIER_MOR] = MorTier(self.morStorage, 0, 0)
+
+		self._buildIndexes()
+
+	def _processLinesCached(self, cache):
+		"""Internal use. Same as processLines but the parsed lines are loaded from cache when possible
+
+		Args:
+			cache (Cache): Where parsed files are stored
+		"""
+		key, description = self._getCacheKey()
+
+		entry = cache.get(key)
+		if entry is not None and entry["description"] == description:
+			self._setCacheState(entry["state"])
+			self._buildIndexes()
+		else:
+			self.processLines()
+			cache.set(key, { "description" : description, "state" : self._getCacheState() })
+
+	def _getCacheKey(self):
+		"""Internal use. Cache entries depend on the file, its size and modification time, the parser version and the options,
+		the language given to the constructor included
+
+		Returns:
+			tuple: (key, description). description is stored with the entry and checked when loading it
+		"""
+		stat = os.stat(self.chaFilePath)
+		description = ( os.path.abspath(self.chaFilePath), stat.st_size, stat.st_mtime_ns, PARSER_VERSION,
+						self.languageOverride, list(self.ignoreSpeakers), self.onlyCDS, list(self.includeLines),
+						sorted(self.tiers) if self.tiers is not None else None, sorted(self.ignoreTiers) )
+
+		return hashlib.sha1( repr(description).encode("utf-8") ).hexdigest(), description
+
+	def _getCacheState(self):
+		"""Internal use. Parsed data to be saved in the cache.
+		MOR ids only make sense in this process so the strings they stand for are saved too
+
+		Returns:
+			dict: State
+		"""
+		# MOR units of lazy tiers must be in the storage before exporting the symbols
+		for l in self.lines:
+			l.parseLazy()
+
+		storage = self.morStorage
+
+		return {
+			"lines" : self.lines,
+			"header" : self.header,
+			"speakers" : self.speakers,
+			"morStorage" : storage,
+			"morSymbols" : MOR_SYMBOLS.export(storage.categorias, storage.lexemas, storage.extras),
+			"morAmbiguousLines" : self.morAmbiguousLines,
+			"morFound" : self.morFound,
+			"malformedMorUnits" : self.statistics.counters[STATS_MALFORMED_MOR_UNITS]
+		}
+
+	def _setCacheState(self, state):
+		"""Internal use. Restores the data saved by _getCacheState
+
+		Args:
+			state (dict): State
+		"""
+		storage = state["morStorage"]
+		symbols = state["morSymbols"]
+
+		# ids saved by another process are changed to the ones of this process
+		translation = MOR_SYMBOLS.getTranslation(symbols)
+
+		for field in [ "categorias", "lexemas", "extras" ]:
+			ids = array("i")
+			ids.frombytes( translation[ np.frombuffer(getattr(storage, field), dtype=np.int32) ].tobytes() )
+			setattr(storage, field, ids)
+
+		self.lines = state["lines"]
+		self.header = state["header"]
+		self.speakers = state["speakers"]
+		self.morStorage = storage
+		self.morAmbiguousLines = state["morAmbiguousLines"]
+		self.morFound = state["morFound"]
+		self.statistics.count(STATS_MALFORMED_MOR_UNITS, state["malformedMorUnits"])
+		self.columns = None
+
+	def _buildIndexes(self):
+		"""Internal use. Groups lines by addressee and by speaker once so getLines doesn't need to scan them.
+		Lines are shared with self.lines so changes made by populate* or processMorToWords are seen here too
+		"""
+		self.morIndex = None
+		self.turns = None
+
+		self.linesByAddressee = {
+			ADDRESSEE_CHILD_DIRECTED : [],
+			ADDRESSEE_CHILD_PRODUCED : [],
+			ADDRESSEE_OVER_HEARD : []
+		}
+		self.linesBySpeaker = {}
+
+		# slots are read directly, this runs for every line each time a file is loaded
+		for l in self.lines:
+			addressee = l.addressee
+			speaker = l.speaker
+
+			if addressee == SPEAKER_TARGET_CHILD:
+				self.linesByAddressee[ADDRESSEE_CHILD_DIRECTED].append(l)
+			if speaker == SPEAKER_TARGET_CHILD:
+				self.linesByAddressee[ADDRESSEE_CHILD_PRODUCED].append(l)
+			if addressee != SPEAKER_TARGET_CHILD and speaker != SPEAKER_TARGET_CHILD :
+				self.linesByAddressee[ADDRESSEE_OVER_HEARD].append(l)
+
+			if not speaker in self.linesBySpeaker:
+				self.linesBySpeaker[speaker] = []
+			self.linesBySpeaker[speaker].append(l)
+
+		# lines are parsed in order so both numbers are already sorted
+		self.sortedNumbers[LINE_NUMBER] = [ l.number for l in self.lines ]
+		self.sortedNumbers[LINE_UTTERANCE_NUMBER] = [ l.utteranceNumber for l in self.lines ]
+		for by in [ LINE_NUMBER, LINE_UTTERANCE_NUMBER ]:
+			self.linesByNumber[by] = dict( zip(self.sortedNumbers[by], self.lines) )
+
+	def iterLines(self):
+		"""Parse the CHA file one utterance at a time. The file is read in chunks
+		so memory stays flat no matter how long the transcription is (with stream=True).
+		Note that lines without %mor tier won't have TIER_MOR and that morAmbiguousLines is not filled when streaming.
+		Without stream=True lines were already parsed by the constructor so the same ones as getLines() are returned
+
+		Raises:
+			FileNotFoundError: The path to the CHA file does not exist
+
+		Returns:
+			iterator: Lines. Access data using the LINE constants
+		"""
+		if not self.stream:
+			return iter(self.lines)
+
+		return self._iterLines()
+
+	def _iterLines(self):
+		"""Internal use. Parses the lines one at a time. See iterLines
+
+		Yields:
+			Line: Utterance
+		"""
+		self.speakers = []
+		utteranceNumber = 0
+
+		for lineNumber, speaker, utterance, tiers in self._iterRecords():
+			if speaker in self.ignoreSpeakers:
+				continue
+
+			if self.stream:
+				# each line keeps its own MOR units so nothing is left behind once the line is dropped
+				self.morStorage = MorStorage()
+				if len(self.morUnitCache) > MOR_UNIT_CACHE_MAX_SIZE:
+					self.morUnitCache.clear()
+
+			line = self._buildLine(lineNumber, speaker, utterance, tiers)
+			self._setAddressee(line)
+
+			if not (self.onlyCDS and line.addressee not in [SPEAKER_TARGET_CHILD, SPEAKER_BOTH]):
+				if len(self.includeLines) == 0 or line.number in self.includeLines:
+					utteranceNumber += 1
+					line.utteranceNumber = utteranceNumber
+					yield line
+
+	def _iterRecords(self):
+		"""Internal use. Lexer for the CHA file. Goes through the file once splitting
+		headers, main tiers and dependent tiers (including multi-line ones)
+
+		Raises:
+			FileNotFoundError: The path to the CHA file does not exist
+
+		Yields:
+			tuple: (line number, speaker, utterance, list of (tier name, content))
+		"""
+
+		if not os.path.isfile(self.chaFilePath):
+			raise FileNotFoundError()
+
+		recordLine = 0 #physical line of the current record
+		offset = None
+		headerStart = None
+
+		# "\n" so that a transcription with no headers also starts with a separator
+		pending = "\n"
+		isHeader = True
+		ended = False
+
+		with open(self.chaFilePath,"r") as f:
+			while not ended:
+				chunk = f.read(READ_BUFFER_SIZE)
+				if chunk:
+					pending += chunk
+					records = pending.split("\n*")
+					if len(records) == 1:
+						continue
+					# last one could be incomplete
+					pending = "\n*" + records.pop()
+				else:
+					records = pending.split("\n*")
+					ended = True
+
+				# first piece is the headers block or the empty string before a pending record
+				if isHeader:
+					headerLines = records[0].split("\n")
+					for j, header in enumerate(headerLines):
+						if header.startswith("@End"):
+							self.header = ChaHeader(headerLines[:j])
+							return
+						if headerStart is None and HEADER_REGEX.match(header):
+							headerStart = recordLine + j
+					self.header = ChaHeader(headerLines)
+					isHeader = False
+					recordLine += records[0].count("\n")
+
+				for record in records[1:]:
+					recordLine += 1
+					lineNumber = recordLine
+					recordLine += record.count("\n")
+
+					if "\n@" in record:
+						# headers found between utterances
+						keep = []
+						for l in record.split("\n"):
+							if l.startswith("@End"):
+								ended = True
+								break
+							if not l.startswith("@"):
+								keep.append(l)
+						record = "\n".join(keep)
+
+					tiers = record.replace("\t"," ").split("\n%")
+					m = TIER_NAME_REGEX.match(tiers[0])
+
+					if m:
+						if offset is None:
+							# the header block counts as if it started at line 3 (after @UTF8 and @Begin)
+							offset = 3 - headerStart if headerStart is not None else 1 - lineNumber
+
+						dependentTiers = []
+						for t in tiers[1:]:
+							mt = TIER_NAME_REGEX.match(t)
+							if mt and self._isTierWanted( mt.group(1) ):
+								dependentTiers.append( (mt.group(1), t[mt.end():].replace("\n", "").lstrip()) )
+
+						yield ( lineNumber + offset, m.group(1), tiers[0][m.end():].replace("\n", "").lstrip(), dependentTiers )
+
+					if ended:
+						return
+
+	def _isTierWanted(self, tierName):
+		"""Internal use. Tiers not wanted are skipped by the lexer (see tiers and ignoreTiers)
+
+		Args:
+			tierName (string): Dependent tier name
+
+		Returns:
+			bool: True if the tier should be parsed
+		"""
+		if tierName in TIERS_REQUIRED:
+			return True
+
+		if self.tiers is not None and tierName not in self.tiers:
+			return False
+
+		return tierName not in self.ignoreTiers
+
+	def _buildLine(self, lineNumber, speaker, utterance, tiers):
+		"""Internal use. Builds a line from a record given by the lexer
+
+		Args:
+			lineNumber (int): Line number
+			speaker (string): Speaker
+			utterance (string): Main tier content
+			tiers (list): List of (tier name, content) for each dependent tier
+
+		Returns:
+			Line: Utterance
+		"""
+		
+		line = Line(lineNumber)
+
+		if not speaker in self.speakers:
+			self.speakers.append(speaker)
+
+		line.speaker = speaker
+		line.utterance = utterance
+
+		if BULLET_TAG in utterance:
+			# [text, from, to, text, from, to, ..., text]
+			parsedBullet = BULLET_REGEX.split(utterance)
+
+			if len(parsedBullet) > 1 :
+				bulletFrom = int(parsedBullet[1])
+				bulletTo = int(parsedBullet[-2])
+				line.bullet = [bulletFrom, bulletTo]
+				line.utterance = "".join(parsedBullet[::3])
+			else:
+				#esto sucede cuando los bullets son de la forma %snd:"filename"_from_to
+				line.utterance = utterance.replace(BULLET_TAG, "").strip()
+
+		lazyTiers = None
+
+		for tierName, content in tiers:
+			#no es realmente un tier
+			#esto sucede cuando los bullets son de la forma %snd:"filename"_from_to
+			if tierName == TIER_SND:
+				lstContent = content.replace(BULLET_TAG, "").split("_")
+				line.bullet = [int(lstContent[-2]), int(lstContent[-1])]
+				continue
+
+			if tierName == "mor":
+				self.morFound = True
+				if "^" in content and not self.stream:
+					self.morAmbiguousLines.append(lineNumber)
+
+			tierProcessFunction = self.tierParsers.get( tierName.capitalize() )
+			if tierProcessFunction:
+				if self.lazy:
+					self.lazyParsers[tierName] = tierProcessFunction
+					if lazyTiers is None:
+						lazyTiers = {}
+					lazyTiers[tierName] = content
+				else:
+					line[tierName] = tierProcessFunction( content, lineNumber )
+			else:
+				line[tierName] = content
+
+		if lazyTiers is not None:
+			line.setLazy(self.lazyParsers, lazyTiers)
+
+		return line
+
+	def getLines(self, addressee=ADDRESSEE_ALL):
+		"""Get an array of parsed utterances
+
+		Returns:
+			list: Utterances. Access data using the LINE constants
+		"""
+
+		if addressee == ADDRESSEE_ALL:
+			return self.lines[:]
+
+		return self.linesByAddressee.get(addressee, [])[:]
+
+	def getLine(self, lineNumber, by=LINE_NUMBER):
+		"""Get a line by its number
+
+		Args:
+			lineNumber (int): Line number
+			by (str, optional): LINE_NUMBER or LINE_UTTERANCE_NUMBER. Defaults to LINE_NUMBER.
+
+		Returns:
+			Line: Utterance
+		"""
+		return self.linesByNumber[by].get(lineNumber)
+
+	def getLinesFromTo(self, lineFrom, lineTo, by=LINE_NUMBER):
+		"""Get a range of utterances
+
+		Args:
+			lineFrom (int): Line number from
+			lineTo (int): Line number to
+			by (str, optional): LINE_NUMBER or LINE_UTTERANCE_NUMBER. Defaults to LINE_NUMBER.
+
+		Returns:
+			list: Utterances. Access data using the LINE constants
+		"""
+		i = bisect_left(self.sortedNumbers[by], lineFrom)
+		j = bisect_left(self.sortedNumbers[by], lineTo)
+
+		return self.lines[i:max(i, j)]
+
+	def getLinesBySpeakers(self):
+		"""Get all parsed utterance grouped by speaker
+
+		Returns:
+			list: Utterances. Access data using the LINE constants
+		"""
+		return { speaker : lines[:] for speaker, lines in self.linesBySpeaker.items() }
+
+	def getSpeakers(self):
+		"""Get all speakers involved in this transcription
+
+		Returns:
+			list: Speakers
+		"""
+		return self.speakers
+
+	def setLanguage(self, lang=None):
+		"""Set language for this transcription. It will be used for processing light verbs
+
+		Args:
+			lang (string, optional): Use LANGUAGE constant or None for parsing it from the CHA file. Defaults to None.
+
+		Raises:
+			FileNotFoundError: -
+		"""
+		if lang == None:
+			self.language = self.getHeader().getLanguage()
+		else:
+			self.language = lang
+
+		# empty utterances depend on language
+		self.setEmptyWords(self.emptyWords)
+
+		if self.language is None:
+			self.log.warning("Warning: no language found")
+
+	def getHeader(self):
+		"""Headers of this transcription. They are read along with the utterances, or on their own if the file wasn't parsed yet
+
+		Raises:
+			FileNotFoundError: The path to the CHA file does not exist
+
+		Returns:
+			ChaHeader: Header
+		"""
+		if self.header is None:
+			self.header = ChaFile.readHeader(self.chaFilePath)
+		return self.header
+
+	@staticmethod
+	def readHeader(chaFilePath):
+		"""Reads only the headers of a CHA file, stopping at the first utterance. Useful for choosing files
+		by language, age or participants without parsing them
+
+		Args:
+			chaFilePath (string): Path to the CHA file
+
+		Raises:
+			FileNotFoundError: The path to the CHA file does not exist
+
+		Returns:
+			ChaHeader: Header
+		"""
+		headerLines = []
+		with open(chaFilePath, "r") as f:
+			for l in f:
+				if l.startswith("*") or l.startswith("@End"):
+					break
+				headerLines.append( l.rstrip("\n") )
+
+		return ChaHeader(headerLines)
+
+	def getLanguage(self):
+		"""Return current language
+
+		Returns:
+			string: Language
+		"""
+		return self.language
+
+	def getColumns(self, *categories):
+		"""Per line NumPy columns: addressee, speaker, COLUMN_WORDS, COLUMN_MOR_UNITS and COLUMN_EMPTY.
+		They are built once and used for every count by addressee or speaker. COLUMN_WORDS, COLUMN_MOR_UNITS
+		and COLUMN_EMPTY are computed the first time they are used so lazy MOR tiers are not parsed if not needed
+
+		Args:
+			*categories: LINE_NOUNS, LINE_ADJECTIVES or LINE_VERBS columns to add. They must be populated first
 
 		Returns:
-			string: Language
+			ChaColumns: Columns for this file
 		"""
-		return self.language
+		if self.columns is None:
+			addresseeNames = []
+			speakerNames = []
+			addresseeCodes = {}
+			speakerCodes = {}
 
-	def processMorToWords(self):
-		"""Adds a new field to each line containing a clean version
-		of the utterance that maps one to one with MOR tier
-		"""
-		for l in self.getLines():
-			self.processMorToWordsInLine(l)
+			addressees = np.empty(len(self.lines), dtype=np.int32)
+			speakers = np.empty(len(self.lines), dtype=np.int32)
 
-	def processMorToWordsInLine(self,line):
-		"""Adds a new field to line containing a clean version
-		of the utterance that maps one to one with MOR tier
+			for i, l in enumerate(self.lines):
+				addressee = l[LINE_ADDRESSEE]
+				if addressee not in addresseeCodes:
+					addresseeCodes[addressee] = len(addresseeNames)
+					addresseeNames.append(addressee)
+				addressees[i] = addresseeCodes[addressee]
 
-		Args:
-			line (dict): The line to process
-		"""
-		utt = line[LINE_UTTERANCE]
+				speaker = l[LINE_SPEAKER]
+				if speaker not in speakerCodes:
+					speakerCodes[speaker] = len(speakerNames)
+					speakerNames.append(speaker)
+				speakers[i] = speakerCodes[speaker]
 
-		# remove everything if utterance is in a foreign language
-		if re.match(r"^\[\- .*?\]", utt):
-			utt = ""
+			columns = ChaColumns(addressees, speakers, addresseeNames, speakerNames, fileNames = [self.filename])
 
-		# remove [+ TARGET]		
-		utt = re.sub(r"\[\+.*\]", "", utt)
+			columns.setLazy( COLUMN_WORDS, lambda: self._setMorColumns(columns)[COLUMN_WORDS] )
+			columns.setLazy( COLUMN_MOR_UNITS, lambda: self._setMorColumns(columns)[COLUMN_MOR_UNITS] )
+			columns.setLazy( COLUMN_EMPTY, lambda: np.array( [ self.isUtteranceEmpty(l) for l in self.lines ], dtype=bool ) )
 
-		# remove words with @ and : (usually for foreign words inside a utt)
-		utt = re.sub(r"[\w'`´]*?@\w*?:\w*", "", utt)
+			self.columns = columns
 
-		# deletes all <slang_word> [: some_replacing_word] and keeps some_replacing_word
-		replacingRegEx = r"(?:\<&?=?[\w\s'@,\-&]*\>|\w*)\s*?\[\: ([\w\s'@,-]*)\]"
-		prog = re.compile(replacingRegEx)
-		while prog.search(utt):
-			m = prog.search(utt)
+		for category in categories:
+			if category not in self.columns:
+				self.columns[category] = np.array( [ len(l[category]) for l in self.lines ], dtype=np.int64 )
 
-			replaceBy = ""
-			if m.group(1):
-				replaceBy = m.group(1)
+		return self.columns
 
-			utt = re.sub(replacingRegEx, replaceBy, utt, count=1)
+	def _setMorColumns(self, columns):
+		"""Internal use. Sets COLUMN_WORDS and COLUMN_MOR_UNITS
 
-		# deletes all [=! some_comment] and keeps whats inside <>
-		# i.e <you get your dog> [=! imitates] => you get your dog
-		# replacingRegEx = r"(?:\<([^\<\>]*)\>|(\w+))\s*?\[=!\s[^\<\>]*\]"
-		replacingRegEx = r"(?:\<(&?=?[\w\s'@,\-&\(\)]*)\>|(\S*))\s*?\[=!\s[\s\w]*\]"
-		prog = re.compile(replacingRegEx)
-		while prog.search(utt):
-			m = prog.search(utt)
-			replaceBy = ""
+		Args:
+			columns (ChaColumns): Columns of this file
 
-			if m.group(1):
-				replaceBy = m.group(1)
-			elif m.group(2):
-				replaceBy = m.group(2)
+		Returns:
+			ChaColumns: columns
+		"""
+		starts = np.zeros(len(self.lines), dtype=np.int64)
+		ends = np.zeros(len(self.lines), dtype=np.int64)
 
-			utt = re.sub(replacingRegEx, replaceBy, utt, count=1)
-		
-		# remove []		
-		utt = re.sub(r"\[[^\/]*?\]", "", utt)
+		for i, l in enumerate(self.lines):
+			mor = l.get(TIER_MOR)
+			if isinstance(mor, MorTier):
+				starts[i] = mor.start
+				ends[i] = mor.end
 
-		utt = utt.split(" ")
+		# words: MOR units that are not in dontCount, using a cumulative sum over the whole file
+		dontCount = [ MOR_SYMBOLS.intern(c) for c in ["cm", "?"] ]
+		categorias = np.frombuffer(self.morStorage.categorias, dtype=np.int32).copy()
+		isWord = np.concatenate( ( [0], np.cumsum( ~np.isin(categorias, dontCount) ) ) )
 
-		# Remove words that starts with -
-		utt = list(filter( lambda w: len(w) and w[0] != "-", utt ))
-
-		# Commas are parsed by MOR
-		uttWithCommas = []
-		for w in utt:
-			if "," in w and len(w) > 0:
-				uttWithCommas.append( w[:w.find(",")] )
-				uttWithCommas.append(",")
-				
-				extra = w[(w.find(",")+1):]
-				if len(extra) > 0:
-					uttWithCommas.append(extra)
-			else:
-				uttWithCommas.append(w)
-		utt = uttWithCommas
-
-		# "[/]" means repetition. This and next word won't be parsed by MOR
-		while "[/]" in utt:
-			i = utt.index("[/]")
-			if i-1 >= 0:
-				del utt[i-1:i+1]
-
-		for stopWord in STOP_WORDS:
-			while stopWord in utt:
-				i = utt.index(stopWord)
-				del utt[i]
-		
-		# WORD_XXX means transcriptor couldn't understand. This word won't be parsed by MOR
-		while WORD_XXX in utt:
-			i = utt.index(WORD_XXX)
-			del utt[i]
-		
-		while "(.)" in utt:
-			i = utt.index("(.)")
-			del utt[i]
+		columns[COLUMN_WORDS] = isWord[ends] - isWord[starts]
+		columns[COLUMN_MOR_UNITS] = ends - starts
+
+		return columns
+
+	def processMorToWords(self):
+		"""Adds a new field to each line containing a clean version
+		of the utterance that maps one to one with MOR tier
+
+		Returns:
+			list: Diagnostics (see processMorToWordsInLine) of the lines where words and MOR tier don't align
+		"""
+		diagnostics = []
+		for l in self.getLines():
+			diagnostic = self.processMorToWordsInLine(l)
+			if diagnostic is not None:
+				diagnostics.append(diagnostic)
+
+		return diagnostics
+
+	def processMorToWordsInLine(self,line):
+		"""Adds a new field to line containing a clean version
+		of the utterance that maps one to one with MOR tier
+
+		Args:
+			line (Line): The line to process
 
-		# Only keep words that start with a letter or a number different to 0
-		utt = list(filter( lambda w: len(w) and (w[0].isalpha() or w[0] in [",","'","("] or (w[0].isdigit() and w[0] != "0" )) , utt ))
+		Returns:
+			dict: None if words and MOR tier align. Otherwise LINE_NUMBER, LINE_UTTERANCE,
+			"words" and "morUnits" (number of each one) for finding out what failed
+		"""
+		words = MAIN_TIER_TOKENIZER.tokenize( line[LINE_UTTERANCE] )
+		line[LINE_MOR_TO_WORDS] = words
+
+		morUnits = len(line[TIER_MOR])
+		if len(words) != morUnits:
+			self.statistics.count(STATS_MOR_TO_WORDS_FAILURES)
+			return {
+				LINE_NUMBER : line[LINE_NUMBER],
+				LINE_UTTERANCE : line[LINE_UTTERANCE],
+				"words" : len(words),
+				"morUnits" : morUnits
+			}
 
-		line[LINE_MOR_TO_WORDS] = utt
+		return None
 
-		if len(line[LINE_MOR_TO_WORDS]) != len(line[TIER_MOR]):
-			print(f"MorToWord failed for line [{line[LINE_NUMBER]}]")
 	def morUnitToWord(self, line, morUnitIndex):
 		"""Returns the word from the utterance related to the MOR unit
 
 		Args:
-			line (dict): The line to process
+			line (Line): The line to process
 			morUnitIndex (int): The index of the mor unit
 
 		Returns:
@@ -544,19 +2479,12 @@ class ChaFile:
 		Returns:
 			dict: Number of utterances by addressee
 		"""
-		addressees = {}
+		columns = self.getColumns()
 
-		for l in self.getLines():
-			if ignoreEmptyUtterances and self.isUtteranceEmpty(l):
-				continue
-
-			addressee = l[LINE_ADDRESSEE]
-			if addressee in addressees:
-				addressees[addressee] += 1
-			else:
-				addressees[addressee] = 1
+		if ignoreEmptyUtterances:
+			return columns.byAddressee( where = ~columns[COLUMN_EMPTY] )
 
-		return addressees
+		return columns.byAddressee()
 
 	def countWordsByAddressee(self):
 		"""Count words grouped by addressee
@@ -565,99 +2493,114 @@ class ChaFile:
 			dict: Number of words grouped by addresee
 		"""
 		assert self.morFound, "MOR tier not found"
-		addressees = {}
-
-		for l in self.getLines():
-			c = self.countWordsInLine(l)
-
-			addressee = l[LINE_ADDRESSEE]
-			if addressee in addressees:
-				addressees[addressee] += c
-			else:
-				addressees[addressee] = c
 
-		return addressees
+		return self.getColumns().byAddressee(COLUMN_WORDS)
 
 	def countWordsInLine(self, line):
 		"""Number of words in the utterance
 
 		Args:
-			line (dict): A parsed utterance from getLines()
+			line (Line): A parsed utterance from getLines()
 
 		Returns:
 			int: Number of words in the utterance
 		"""
 		assert self.morFound, "MOR tier not found"
-		dontCount = ["cm", "?"] 
+		dontCount = { MOR_SYMBOLS.intern(c) for c in ["cm", "?"] }
 
 		c = 0
-		for morUnit in line[TIER_MOR]:
-			if morUnit != MISSING_VALUE and morUnit[MOR_UNIT_CATEGORIA] not in dontCount:
+		for categoria in line[TIER_MOR].categoriaIds():
+			if categoria not in dontCount:
 				c += 1
 
 		return c
 
-	def countNounsByAddressee(self):
+	def countNounsByAddressee(self, countCopAux = False, processLightVerbs = True):
 		"""Number of nouns grouped by addressee
 
+		Args:
+			countCopAux (bool, optional): Same as populateVerbs. Defaults to False.
+			processLightVerbs (bool, optional): Same as populateVerbs. Defaults to True.
+
 		Returns:
 			dict: Addressees and number of nouns
 		"""
-		self.populateNouns()
-
-		addressees = {}
-
-		for l in self.getLines():
-			c = len( l[LINE_NOUNS] )
-
-			addressee = l[LINE_ADDRESSEE]
-			if addressee in addressees:
-				addressees[addressee] += c
-			else:
-				addressees[addressee] = c
+		self.populateNouns(countCopAux=countCopAux, processLightVerbs=processLightVerbs)
 
-		return addressees
+		return self.getColumns(LINE_NOUNS).byAddressee(LINE_NOUNS)
 
-	def getNounsInLine(self, linea):
+	def getNounsInLine(self, linea, countCopAux = False, processLightVerbs = True):
 		"""Returns a list of indexes of nouns in the MOR tier
 
 		Args:
-			linea (dict): Utterance
+			linea (Line): Utterance
+			countCopAux (bool, optional): Same as populateVerbs. Defaults to False.
+			processLightVerbs (bool, optional): Same as populateVerbs. Defaults to True.
 
 		Returns:
 			list: List of indexes
 		"""
 		assert self.morFound, "MOR tier not found"
 		
-		if not self.processedVerbs:
-			#in english, sometimes MOR mark as noun a word that is a verb
-			self.populateVerbs()
+		#in english, sometimes MOR mark as noun a word that is a verb. LINE_VERBS is left as it is
+		if self.processedVerbs == (countCopAux, processLightVerbs):
+			verbs = linea[LINE_VERBS]
+		else:
+			verbs = self._findVerbsInLine( linea[TIER_MOR], self._getVerbCategoryIds(countCopAux), self._getLightVerbRules(processLightVerbs) )[0]
+
+		return self._getNounsInLine(linea, verbs)
+
+	def _getNounsInLine(self, linea, verbs):
+		"""Internal use. Same as getNounsInLine with the verbs of the line already found
+
+		Args:
+			linea (Line): Utterance
+			verbs (list): Indexes of the verbs of the line
 
+		Returns:
+			list: List of indexes
+		"""
 		nouns = []
 
 		if linea[TIER_MOR] != MISSING_VALUE: 	
-			for i, morUnit in enumerate(linea[TIER_MOR]):
-				if morUnit[MOR_UNIT_CATEGORIA] in CATEGORIAS_SUSTANTIVOS:
-					if not i in linea[LINE_VERBS]: #in english, sometimes MOR mark as noun a word that is a verb
+			categoriasSustantivos = { MOR_SYMBOLS.intern(c) for c in CATEGORIAS_SUSTANTIVOS }
+			verbs = set(verbs)
+			for i, categoria in enumerate(linea[TIER_MOR].categoriaIds()):
+				if categoria in categoriasSustantivos:
+					if not i in verbs: #in english, sometimes MOR mark as noun a word that is a verb
 						nouns.append(i)
 		
 		return nouns
 
-	def populateNouns(self):
-		"""Populate LINE_NOUNS for every line with the indexes of the MOR line where nouns are found
+	def populateNouns(self, countCopAux = False, processLightVerbs = True):
+		"""Populate LINE_NOUNS for every line with the indexes of the MOR line where nouns are found.
+		Words that are verbs are not nouns so they depend on the verb options. Nouns for each options are kept
+		and the lines are only gone through again for new options. LINE_VERBS is not changed: verbs for these
+		options are found apart if they are not the ones in the lines
+
+		Args:
+			countCopAux (bool, optional): Same as populateVerbs. Defaults to False.
+			processLightVerbs (bool, optional): Same as populateVerbs. Defaults to True.
 		"""
 		assert self.morFound, "MOR tier not found"
 
-		if self.processedNouns: return
-		
-		if not self.processedVerbs:
-			#in english, sometimes MOR mark as noun a word that is a verb
-			self.populateVerbs()
+		key = (countCopAux, processLightVerbs)
+		if self.processedNouns == key: return
 
-		for linea in self.getLines():
-			linea[LINE_NOUNS] = self.getNounsInLine(linea)
-		
-		self.processedNouns = True
+		#in english, sometimes MOR mark as noun a word that is a verb
+		annotations = self._getVerbAnnotations(countCopAux, processLightVerbs)
+		lines = self.getLines()
+
+		if LINE_NOUNS not in annotations:
+			annotations[LINE_NOUNS] = [ self._getNounsInLine(linea, verbs) for linea, verbs in zip(lines, annotations[LINE_VERBS]) ]
+
+		for linea, nouns in zip(lines, annotations[LINE_NOUNS]):
+			linea[LINE_NOUNS] = nouns
+
+		if self.columns is not None:
+			del self.columns[LINE_NOUNS]
+
+		self.processedNouns = key
 
 	def countAdjectivesByAddressee(self):
 		"""Number of adjectives grouped by addressee
@@ -668,23 +2611,12 @@ class ChaFile:
 		if not self.processedAdjectives:
 			self.populateAdjectives()
 
-		addressees = {}
-
-		for l in self.getLines():
-			c = len(l[LINE_ADJECTIVES])
-
-			addressee = l[LINE_ADDRESSEE]
-			if addressee in addressees:
-				addressees[addressee] += c
-			else:
-				addressees[addressee] = c
-
-		return addressees
+		return self.getColumns(LINE_ADJECTIVES).byAddressee(LINE_ADJECTIVES)
 	def getAdjectivesInLine(self, linea):
 		"""Returns a list of indexes of adjectives in the MOR tier
 
 		Args:
-			linea (dict): Utterance
+			linea (Line): Utterance
 
 		Returns:
 			list: List of indexes
@@ -693,12 +2625,17 @@ class ChaFile:
 		adjetivos = []
 
 		if linea[TIER_MOR] != MISSING_VALUE: 	
-			for i, morUnit in enumerate(linea[TIER_MOR]):
-				if morUnit[MOR_UNIT_CATEGORIA] in CATEGORIAS_ADJETIVOS:
+			categoriasAdjetivos = { MOR_SYMBOLS.intern(c) for c in CATEGORIAS_ADJETIVOS }
+			part = MOR_SYMBOLS.intern("part")
+			cop = MOR_SYMBOLS.intern("cop")
+
+			categorias = linea[TIER_MOR].categoriaIds()
+			for i, categoria in enumerate(categorias):
+				if categoria in categoriasAdjetivos:
 					adjetivos.append(i)
 				elif (	self.language == LANGUAGE_SPANISH and i>0 and 
-						morUnit[MOR_UNIT_CATEGORIA] == "part" and
-						linea[TIER_MOR][i-1][MOR_UNIT_CATEGORIA] == "cop"):
+						categoria == part and
+						categorias[i-1] == cop):
 					adjetivos.append(i)
 
 				# en español: si es part y el anterior es cop y no termina en [ando, endo] es adjetivo
@@ -718,199 +2655,113 @@ class ChaFile:
 		self.processedAdjectives = True
 
 	def populateVerbs(self, countCopAux = False, processLightVerbs = True):
-		"""Populate LINE_VERBS for every line with the indexes of the MOR tier where verbs are found
+		"""Populate LINE_VERBS for every line with the indexes of the MOR tier where verbs are found.
+		Verbs for each options are kept so going back to options used before doesn't go through the lines again
 
 		Args:
 			countCopAux (bool, optional): Should we count cop and aux as verbs ?. Defaults to False.
 			processLightVerbs (bool, optional): Should we process light verbs. Defaults to True.
 		"""
-		if self.processedVerbs: return
+		key = (countCopAux, processLightVerbs)
+		if self.processedVerbs == key: return
 
-		for l in self.getLines():
-			self.getVerbsInLine(l, countCopAux, processLightVerbs)
-		
-		self.processedVerbs = True
-
-	def _processLightVerbs(self, lineaMor, verbos):
-		"""Internal use. Language dependent. Process light verbs to be skipped when counting verbs
-
-		Args:
-			lineaMor (dict): MOR tier for an utterance. Note that it is a dict, not a list
-			verbos (list): List of verbs
-
-		Returns:
-			list: MOR tier without light verbs
-		"""
-		if self.language == LANGUAGE_SPANISH:
-			# V1 SÍ AUX: ir a, tener que, poder, haber, estar, dejar de, deber, acabar de,
-			# terminar de, haber que, estar por, empezar a, empezar por, comenzar a, poner a, volver a
-
-			#1) Cuando es auxiliar + infinitivos, contar el infinitivo
-			#2) Cuando es auxiliar + gerundio, contar el gerundio
-			#3) Cuando es auxiliar + participio, contar el participio
-
-			raices = [
-				[["i"],["a"]],
-				[["tene"],["que"]],
-				[["pode"]],
-				[["habe"]],
-				[["esta"]],
-				[["debe"]],
-				[["habe"],["que"]],
-				[["esta"],["por"]],
-				
-				#[["deja"],["de"]],    #estos que comenté son los que cambiamos cuando hicimos aclew completo
-				
-				#[["acaba"],["de"]],
-				#[["termina"],["de"]],
-
-				#[["empeza"],["a"]],
-				#[["empeza"],["por"]],
-
-				#[["comienzo"],["a"]],
-				#[["comenza"],["a"]],
-
-				#[["pone"],["a"]],
-				#[["volve"],["a"]]
-			]
-
-			siguiente_palabra_de_auxiliar = [ "inf", "ger", "part" ]
-
-			#4) Cuando es copulativo + gerundio contar el gerundio
-			#5) Cuando es copulativo + participio contar el participio.
-
-			criteriosCategoria = [
-					[ ["cop"],["ger","part"] ]
-			]
-
-			#6) No contar el copula o auxiliar si está solo (1versión) / contar el cópula o el auxiliar si esta sólo (2 versión)
-			#countCopAux = False # Hago los dos mas abajo
-
-			#7) En los casos de 2 o 3 Verbos (verbos conjugado, infinitivo, gerundio o participio), contar el que no es ni auxiliar, ni copula.
-			#estoy contando frase verbal + verbo final
-
-			#8) si hay 2 o más verbos conjugados coordinados en una emisión se toman todos.
-
-			#1) 2) y 3) auxiliares    aux + (inf,ger,part)
-
-			for raiz in raices:
-				criteriaType = [ MOR_UNIT_LEXEMA for c in raiz ]
-				criteria = raiz + [siguiente_palabra_de_auxiliar]
-				criteriaType.append(MOR_UNIT_CATEGORIA)
-				morIndexes = self._checkCriteria( list(lineaMor.values()), criteria, criteriaType )
-				# existe el patron
-				while len(morIndexes) > 0:
-					#agarro la última palabra y la agrego como verbo
-					trueIndex = list(lineaMor.keys())[ morIndexes[-1] ]
-					verbos.append( trueIndex )
-
-					trueIndexesToDelete = []
-					for morIndex in morIndexes:
-						trueIndexesToDelete.append( list(lineaMor.keys())[ morIndex ] )
-					for i in trueIndexesToDelete:
-						del lineaMor[ i ]
-
-					criteriaType = [ MOR_UNIT_LEXEMA for c in raiz ]
-					criteria = raiz + [siguiente_palabra_de_auxiliar]
-					criteriaType.append(MOR_UNIT_CATEGORIA)
-					morIndexes = self._checkCriteria( list(lineaMor.values()), criteria, criteriaType )
-
-			#cop + (ger | part)
-			for criterio in criteriosCategoria:
-				morIndexes = self._checkCriteria( list(lineaMor.values()), criterio, MOR_UNIT_CATEGORIA )
-				while len(morIndexes) > 0:
-					# aca habría que mirar si el segundo (trueIndex) termina en ando o endo, en tal caso
-					# se hace como se está haciendo, en caso contrario habría que retirarlo, es adjetivo,
-					# entonces también habría que tocar la parte de adjetivos 
-					trueIndex = list(lineaMor.keys())[ morIndexes[1] ]
-					verbos.append( trueIndex )
-
-					trueIndexesToDelete = []
-					for morIndex in morIndexes:
-						trueIndexesToDelete.append( list(lineaMor.keys())[ morIndex ] )
-					for i in trueIndexesToDelete:
-						del lineaMor[ i ]
-
-					morIndexes = self._checkCriteria( list(lineaMor.values()), criterio, MOR_UNIT_CATEGORIA )
-		elif self.language == LANGUAGE_ENGLISH:		
-			criterias = [
-				[["part|go"], ["to"], ["n", *CATEGORIAS_VERBOS]],
-				[["part|go"], ["n", *CATEGORIAS_VERBOS]], #gonna
-				[["go"], [*CATEGORIAS_VERBOS]],
-				[["have"], ["to"], [*CATEGORIAS_VERBOS]],
-				[["do"], [*CATEGORIAS_VERBOS]],
-				[["do"],["not"],[*CATEGORIAS_VERBOS]],
-				[["use"], ["to"], [*CATEGORIAS_VERBOS]],
-
-
-
-				# [["like"], ["to"], [*CATEGORIAS_VERBOS]], # se decidió no agregarla
-				# [["want"], ["to"], [*CATEGORIAS_VERBOS]], # se decidió no agregarla
-				# [["try"], ["to"], [*CATEGORIAS_VERBOS]], # se decidió no agregarla
-			]
-
-			for criteria in criterias:
-				criteriaType = [ MOR_UNIT_LEXEMA if "|" not in c[0] else MOR_UNIT_CATEGORIA_LEXEMA for c in criteria ]
-				del criteriaType[-1]
-				criteriaType.append(MOR_UNIT_CATEGORIA)
-
-				morIndexes = self._checkCriteria( list(lineaMor.values()), criteria, criteriaType )
-				# existe el patron
-				while len(morIndexes) > 0:
-					#agarro la última palabra y la agrego como verbo
-					trueIndex = list(lineaMor.keys())[ morIndexes[-1] ]
-					verbos.append( trueIndex )
-
-					trueIndexesToDelete = []
-					for morIndex in morIndexes:
-						trueIndexesToDelete.append( list(lineaMor.keys())[ morIndex ] )
-					for i in trueIndexesToDelete:
-						del lineaMor[ i ]
-
-					criteriaType = [ MOR_UNIT_LEXEMA if "|" not in c else MOR_UNIT_CATEGORIA_LEXEMA for c in criteria ]
-					del criteriaType[-1]
-					criteriaType.append(MOR_UNIT_CATEGORIA)
-					morIndexes = self._checkCriteria( list(lineaMor.values()), criteria, criteriaType )
-			
-			# Don't count LET'S as a verb
-			stopWords = [
-				{MOR_UNIT_CATEGORIA: 'v', MOR_UNIT_LEXEMA: 'let', MOR_UNIT_EXTRA: '~pro:obj|us'}
-			]
-
-			trueIndexesToDelete = []
-			for i in lineaMor:
-				morUnit = lineaMor[i]
-				if morUnit in stopWords:
-					trueIndexesToDelete.append(i)
-			for i in trueIndexesToDelete:
-				del lineaMor[ i ]
-			
-		return lineaMor
+		annotations = self._getVerbAnnotations(countCopAux, processLightVerbs)
 
-	def getVerbsInLine(self, linea, countCopAux = False, processLightVerbs = True ):
-		"""Gets verbs in line and store them in LINE_VERBS
+		if self.columns is not None:
+			del self.columns[LINE_VERBS]
+
+		lightVerbs = annotations[LINE_LIGHT_VERBS]
+		for i, (l, verbs) in enumerate(zip(self.getLines(), annotations[LINE_VERBS])):
+			l[LINE_VERBS] = verbs
+			if i in lightVerbs:
+				l[LINE_LIGHT_VERBS] = True
+			elif LINE_LIGHT_VERBS in l:
+				del l[LINE_LIGHT_VERBS]
+
+		self.processedVerbs = key
+
+	def _getLightVerbRules(self, processLightVerbs):
+		"""Internal use. Light verb rules of the language
 
 		Args:
-			linea (dict): Utterance from getLines()
-			countCopAux (bool, optional): Should we count cop and aux. Defaults to False.
-			processLightVerbs (bool, optional): Should we skip light verbs. Defaults to True.
+			processLightVerbs (bool): Same as populateVerbs
 
 		Returns:
-			list: Array of indexes to verbs
+			LightVerbRules: Rules or None if light verbs are not processed (or there are no rules for the language)
 		"""
-		verbos = []
-		# no se borra nada del MOR original
-		lineaMor={}
-		for i, m in enumerate(linea[TIER_MOR]):
-			lineaMor[i] = m
+		if not processLightVerbs:
+			return None
 
-		if processLightVerbs:
-			assert self.language != None, "language not set"
-			lineaMor = self._processLightVerbs(lineaMor, verbos)
+		assert self.language != None, "language not set"
+		return LIGHT_VERB_RULES.get(self.language)
 
-		if len(lineaMor) != len(linea[TIER_MOR]):
-			linea[LINE_LIGHT_VERBS] = True
+	def _getVerbAnnotations(self, countCopAux, processLightVerbs):
+		"""Internal use. Verbs of every line for some options, found once and kept in posAnnotations.
+		Lines are not changed
+
+		Args:
+			countCopAux (bool): Same as populateVerbs
+			processLightVerbs (bool): Same as populateVerbs
+
+		Returns:
+			dict: LINE_VERBS (verbs of each line), LINE_LIGHT_VERBS (indexes of the lines with light verbs)
+				and LINE_NOUNS once populateNouns found them
+		"""
+		key = (countCopAux, processLightVerbs)
+		annotations = self.posAnnotations.get(key)
+		if annotations is not None:
+			return annotations
+
+		rules = self._getLightVerbRules(processLightVerbs)
+		lines = self.getLines()
+
+		tiers = [ l[TIER_MOR] for l in lines ]
+		notEmpty = [ i for i, mor in enumerate(tiers) if len(mor) > 0 ]
+		tierStarts = np.array( [ tiers[i].start for i in notEmpty ], dtype=np.int64 )
+		tierEnds = np.array( [ tiers[i].end for i in notEmpty ], dtype=np.int64 )
+
+		# verbs of every line at once. Lines where a light verb rule could match are processed one by one
+		verbCategoryIds = self._getVerbCategoryIds(countCopAux)
+		isVerb = np.isin( np.frombuffer(self.morStorage.categorias, dtype=np.int32), list(verbCategoryIds) )
+		verbIndexes = np.flatnonzero(isVerb)
+		verbFrom = np.searchsorted(verbIndexes, tierStarts).tolist()
+		verbTo = np.searchsorted(verbIndexes, tierEnds).tolist()
+		verbIndexes = verbIndexes.tolist()
+
+		if rules is not None:
+			# lazy MOR tiers are stored in the order they were read so tiers are sorted first
+			order = np.argsort(tierStarts, kind="stable")
+			toProcess = np.empty(len(order), dtype=bool)
+			toProcess[order] = rules.getLinesToProcess(self.morStorage, tierStarts[order], tierEnds[order])
+			toProcess = toProcess.tolist()
+
+		verbs = [ [] for l in lines ]
+		lightVerbs = set()
+		for j, i in enumerate(notEmpty):
+			if rules is not None and toProcess[j]:
+				verbs[i], found = self._findVerbsInLine(tiers[i], verbCategoryIds, rules)
+				if found:
+					lightVerbs.add(i)
+			else:
+				start = tiers[i].start
+				verbs[i] = [ v - start for v in verbIndexes[ verbFrom[j] : verbTo[j] ] ]
+		
+		annotations = {
+			LINE_VERBS : verbs,
+			LINE_LIGHT_VERBS : lightVerbs
+		}
+		self.posAnnotations[key] = annotations
+		return annotations
 
+	def _getVerbCategoryIds(self, countCopAux):
+		"""Internal use. Categories counted as verbs once light verbs were processed
+
+		Args:
+			countCopAux (bool): Should we count cop and aux
+
+		Returns:
+			set: MOR_SYMBOLS ids
+		"""
 		#verbos normales
 		verbosIndividualesAContar = CATEGORIAS_VERBOS.copy()
 
@@ -921,21 +2772,49 @@ class ChaFile:
 		if self.language == LANGUAGE_ENGLISH:
 			verbosIndividualesAContar.remove("inf") #esto saca el to
 
-		morIndexes = self._checkCriteria( list(lineaMor.values()), [ verbosIndividualesAContar ], MOR_UNIT_CATEGORIA )
-		while len(morIndexes) > 0:
-			trueIndex = list(lineaMor.keys())[ morIndexes[0] ]
-			verbos.append( trueIndex )
+		return set( MOR_SYMBOLS.intern(c) for c in verbosIndividualesAContar )
+
+	def _findVerbsInLine(self, mor, verbCategoryIds, rules):
+		"""Internal use. Verbs of one MOR tier
+
+		Args:
+			mor (MorTier): MOR tier
+			verbCategoryIds (set): Result of _getVerbCategoryIds
+			rules (LightVerbRules): Rules for the language or None for not processing light verbs
+
+		Returns:
+			tuple: (sorted indexes of the verbs, True if light verbs were found)
+		"""
+		if rules is not None:
+			verbos, remaining = rules.apply(mor)
+		else:
+			verbos, remaining = [], range(len(mor))
+
+		# no se borra nada del MOR original
+		lightVerbs = len(remaining) != len(mor)
+
+		categorias = mor.categoriaIds()
+		verbos.extend( i for i in remaining if categorias[i] in verbCategoryIds )
+
+		verbos.sort()
+		return verbos, lightVerbs
 
-			trueIndexesToDelete = []
-			for morIndex in morIndexes:
-				trueIndexesToDelete.append( list(lineaMor.keys())[ morIndex ] )
-			for i in trueIndexesToDelete:
-				del lineaMor[ i ]
+	def getVerbsInLine(self, linea, countCopAux = False, processLightVerbs = True ):
+		"""Gets verbs in line and store them in LINE_VERBS
+
+		Args:
+			linea (Line): Utterance from getLines()
+			countCopAux (bool, optional): Should we count cop and aux. Defaults to False.
+			processLightVerbs (bool, optional): Should we skip light verbs. Defaults to True.
 
-			morIndexes = self._checkCriteria( list(lineaMor.values()), [ verbosIndividualesAContar ], MOR_UNIT_CATEGORIA )
+		Returns:
+			list: Array of indexes to verbs
+		"""
+		verbos, lightVerbs = self._findVerbsInLine( linea[TIER_MOR], self._getVerbCategoryIds(countCopAux), self._getLightVerbRules(processLightVerbs) )
 
+		if lightVerbs:
+			linea[LINE_LIGHT_VERBS] = True
 		linea[LINE_VERBS] = verbos
-		linea[LINE_VERBS].sort()
 		
 		return verbos
 
@@ -947,21 +2826,9 @@ class ChaFile:
 		Returns:
 			dict: Addressees and number of verbs
 		"""
-		addressees = {}
-
-		if not self.processedVerbs:
-			self.populateVerbs(countCopAux=countCopAux, processLightVerbs=processLightVerbs)
+		self.populateVerbs(countCopAux=countCopAux, processLightVerbs=processLightVerbs)
 
-		for l in self.getLines():
-			c = len( l[LINE_VERBS] )
-
-			addressee = l[LINE_ADDRESSEE]
-			if addressee in addressees:
-				addressees[addressee] += c
-			else:
-				addressees[addressee] = c
-
-		return addressees
+		return self.getColumns(LINE_VERBS).byAddressee(LINE_VERBS)
 	
 	def count(self, what=LINE_UTTERANCE, addressee=ADDRESSEE_ALL, countType=COUNT_TYPE_TOKENS, countCopAux = False, processLightVerbs = True):
 		"""Count tokens or types for any word or for nouns, verbs or adjectives
@@ -977,13 +2844,46 @@ class ChaFile:
 			int: count
 		"""
 
+		c = self._countIds(what, addressee, countCopAux, processLightVerbs)
+		
+		if countType == COUNT_TYPE_TOKENS:
+			return sum(c.values())
+		else:
+			return len(c.keys())
+
+	def countByType(self, what=LINE_UTTERANCE, addressee=ADDRESSEE_ALL, countCopAux = False, processLightVerbs = True):
+		"""Same as count but returns the number of tokens of each type
+
+		Args:
+			what ([type]): Same as count
+			addressee ([type], optional): Same as count
+			countCopAux (bool, optional): Same as count
+			processLightVerbs (bool, optional): Same as count
+
+		Returns:
+			dict: Type and number of tokens. Types are "<categoria>|<lexema><extra>" for LINE_UTTERANCE or the lexeme otherwise
+		"""
+		c = self._countIds(what, addressee, countCopAux, processLightVerbs)
+
+		if what == LINE_UTTERANCE:
+			return { MOR_SYMBOLS[v[0]] + "|" + MOR_SYMBOLS[v[1]] + MOR_SYMBOLS[v[2]] : n for v, n in c.items() }
+
+		return { MOR_SYMBOLS[v] : n for v, n in c.items() }
+
+	def _countIds(self, what, addressee, countCopAux, processLightVerbs):
+		"""Internal use. Tokens of each type for count and countByType. Types are MOR_SYMBOLS ids
+
+		Returns:
+			dict: Type and number of tokens
+		"""
+
 		if what not in [ LINE_VERBS, LINE_NOUNS, LINE_ADJECTIVES, LINE_UTTERANCE ]:
 			raise Exception("'what' argument should be LINE_VERBS, LINE_NOUNS or LINE_ADJECTIVES or LINE_UTTERANCE")
 
 		if what == LINE_VERBS:
 			self.populateVerbs(countCopAux=countCopAux, processLightVerbs=processLightVerbs)
 		elif what == LINE_NOUNS:
-			self.populateNouns()
+			self.populateNouns(countCopAux=countCopAux, processLightVerbs=processLightVerbs)
 		elif what == LINE_ADJECTIVES:
 			self.populateAdjectives()
 		
@@ -993,15 +2893,16 @@ class ChaFile:
 			nonlocal c
 
 			if what != LINE_UTTERANCE:
+				lexemas = l[TIER_MOR].lexemaIds()
 				for index in l[what]:
-					v = l[TIER_MOR][index][MOR_UNIT_LEXEMA]
+					v = lexemas[index]
 					if v in c:
 						c[v] += 1
 					else:
 						c[v] = 1
 			else:
-				for morUnit in l[TIER_MOR]:
-					v = morUnit[MOR_UNIT_CATEGORIA] + "|" + morUnit[MOR_UNIT_LEXEMA] + morUnit[MOR_UNIT_EXTRA]
+				mor = l[TIER_MOR]
+				for v in zip(mor.categoriaIds(), mor.lexemaIds(), mor.extraIds()):
 					if v in c:
 						c[v] += 1
 					else:
@@ -1010,55 +2911,102 @@ class ChaFile:
 		lines = self.getLines(addressee)
 		for l in lines:
 			add( l )
-		
-		if countType == COUNT_TYPE_TOKENS:
-			return sum(c.values())
-		else:
-			return len(c.keys())
 
-	def findLinesByMorCriteria(self, criteria, criteriaType=MOR_UNIT_CATEGORIA):
+		return c
+
+	def findLinesByMorCriteria(self, criteria, criteriaType=MOR_UNIT_CATEGORIA, addressee=ADDRESSEE_ALL):
 		"""Finds utterances that follow a criteria
 
 		Args:
-			criteria (list): Criteria. Example: [ ["part_of_speech-1"], [ [ "part_of_speech-1","part_of_speech-2 ] ] ]. 
-			An utterance will match if it contains two adjacent words: one with "part_of_speech-1" and the second one "part_of_speech-1" or "part_of_speech-2"
+			criteria (list or MorPattern): Criteria. Example: [ ["part_of_speech-1"], [ [ "part_of_speech-1","part_of_speech-2 ] ] ]. 
+			An utterance will match if it contains two adjacent words: one with "part_of_speech-1" and the second one "part_of_speech-1" or "part_of_speech-2".
+			Use compileMorCriteria or MorPattern for reusing the same criteria in many searches
 			criteriaType (str or list, optional): Search for part-of-speech (categoria léxica) or lexeme. If using a list it must have the same number of elements as criteria. Defaults to MOR_UNIT_CATEGORIA. MOR_UNIT_CATEGORIA_LEXEMA matches "<part_of_speech>|<lexeme>"
+			addressee (str, optional): ADDRESSEE_ALL, ADDRESSEE_CHILD_DIRECTED, ADDRESSEE_CHILD_PRODUCED or ADDRESSEE_OVER_HEARD. Defaults to ADDRESSEE_ALL.
 
 		Returns:
-			list: List of dict with line and matched criteria
+			list: List of dict with line, first matched criteria ("matchedCriteria") and every match ("matches")
 		"""
 		results = []
 
 		assert self.morFound, "MOR tier not found"
-		assert isinstance( criteria, list ) and len(criteria) > 0 and isinstance( criteria[0], list ), "invalid criteria, expected: [ [], ...]"
-
-		for line in self.lines:
-			if "mor" in line:
-				matchedCriteria = self._checkCriteria(line["mor"], criteria, criteriaType)
-				if len(matchedCriteria) > 0:
-					result = {
-						"line" : line,
-						"matchedCriteria" : []
-					}
-
-					for morUnitIndex in matchedCriteria:
-						result["matchedCriteria"].append( line["mor"][morUnitIndex] )
+		if not isinstance(criteria, MorPattern):
+			assert isinstance( criteria, list ) and len(criteria) > 0 and isinstance( criteria[0], list ), "invalid criteria, expected: [ [], ...]"
+
+		index = self.getMorIndex() #parses MOR tiers before compiling (see applyMorCriteriaInLine)
+		pattern = self.compileMorCriteria(criteria, criteriaType)
+
+		starts = index.findStarts(pattern, addressee = addressee)
+		lineNumbers = index.lineNumbers[ index.unitLines[starts] ].tolist()
+		positions = index.unitPositions[starts].tolist()
+
+		result = None
+		for lineNumber, position in zip(lineNumbers, positions):
+			line = self.linesByNumber[LINE_NUMBER][lineNumber]
+			mor = line["mor"]
+			match = [ mor[morUnitIndex] for morUnitIndex in range(position, position + len(pattern)) ]
+
+			if result is None or result["line"] is not line:
+				result = {
+					"line" : line,
+					"matchedCriteria" : match,
+					"matches" : []
+				}
+				results.append(result)
+			result["matches"].append(match)
 
-					results.append(result)
 		return results
 
-	def applyMorCriteriaInLine(self, line, criteria, criteriaType = MOR_UNIT_CATEGORIA):
+	def getMorIndex(self):
+		"""Inverted index of the MOR units of this file, used by findLinesByMorCriteria. It is built the first time
+
+		Returns:
+			MorIndex: Index
+		"""
+		if self.morIndex is None:
+			lines = [ l for l in self.lines if TIER_MOR in l and len(l[TIER_MOR]) > 0 ]
+
+			tierStarts = np.array( [ l[TIER_MOR].start for l in lines ], dtype=np.int64 )
+			lengths = np.array( [ len(l[TIER_MOR]) for l in lines ], dtype=np.int64 )
+			unitLines = np.repeat( np.arange(len(lines), dtype=np.int64), lengths )
+			unitPositions = np.arange( lengths.sum(), dtype=np.int64 ) - np.repeat( np.cumsum(lengths) - lengths, lengths )
+			storageIndexes = tierStarts[unitLines] + unitPositions
+
+			toChild = np.array( [ l[LINE_ADDRESSEE] == SPEAKER_TARGET_CHILD for l in lines ], dtype=bool )
+			byChild = np.array( [ l[LINE_SPEAKER] == SPEAKER_TARGET_CHILD for l in lines ], dtype=bool )
+
+			self.morIndex = MorIndex( np.frombuffer(self.morStorage.categorias, dtype=np.int32)[storageIndexes],
+									  np.frombuffer(self.morStorage.lexemas, dtype=np.int32)[storageIndexes],
+									  np.frombuffer(self.morStorage.extras, dtype=np.int32)[storageIndexes],
+									  unitLines, unitPositions,
+									  np.array( [ l[LINE_NUMBER] for l in lines ], dtype=np.int64 ),
+									  {
+										  ADDRESSEE_CHILD_DIRECTED : toChild,
+										  ADDRESSEE_CHILD_PRODUCED : byChild,
+										  ADDRESSEE_OVER_HEARD : ~toChild & ~byChild
+									  },
+									  fileNames = [ self.chaFilePath ] )
+
+		return self.morIndex
+
+	def applyMorCriteriaInLine(self, line, criteria, criteriaType = MOR_UNIT_CATEGORIA, allMatches = False):
 		"""Same as findLinesByMorCriteria but for one line
 
 		Args:
-			line (dict): Utterance
-			criteria (list): [description]
-			criteriaType (str or list, optional): [description]. Defaults to MOR_UNIT_CATEGORIA.
+			line (Line): Utterance
+			criteria (list or MorPattern): Same as findLinesByMorCriteria
+			criteriaType (str or list, optional): Same as findLinesByMorCriteria. Defaults to MOR_UNIT_CATEGORIA.
+			allMatches (bool, optional): Return every match instead of the first one. Defaults to False.
 
 		Returns:
-			list: List of indexes of the words matching the criteria
+			list: List of indexes of the words matching the criteria (a list of them for each match if allMatches)
 		"""
-		return self._checkCriteria( line["mor"], criteria, criteriaType )
+		mor = line["mor"] #parsed first (lazy tiers) so its MOR units are known when compiling
+		pattern = self.compileMorCriteria(criteria, criteriaType)
+
+		if allMatches:
+			return pattern.findAll(mor)
+		return pattern.search(mor)
 
 	def getLexicalDiversity(self, addressee=ADDRESSEE_ALL, metric=LEXICAL_DIVERSITY_HDD, extraParam = None):
 		"""Calculate lexical diversity metric
@@ -1069,33 +3017,87 @@ class ChaFile:
 			extraParam (_type_, optional): LEXICAL_DIVERSITY_MATTR has extra param window_size that defaults to 50. Defaults to None.
 
 		Returns:
-			_type_: _description_
+			float: Metric. The same as the lexical_diversity package using "<categoria>|<lexema><extra>" of every MOR unit of an utterance as a token
 		"""
-		lines = self.getLines(addressee)
-		
-		tokens = []
-		for l in lines:
-			token = ""
-			for morUnit in l[TIER_MOR]:
-				token += morUnit[MOR_UNIT_CATEGORIA] + "|" + morUnit[MOR_UNIT_LEXEMA] + morUnit[MOR_UNIT_EXTRA]
-			tokens.append(token)
-		
+		tokens = self._getLexicalDiversityTokens( self.getLines(addressee) )
+
 		result = -1
 		if metric == LEXICAL_DIVERSITY_HDD:
-			result = ld.hdd(tokens)
+			result = diversity.hdd(tokens)
 		elif metric == LEXICAL_DIVERSITY_MAAS:
-			result = ld.maas_ttr(tokens)
+			result = diversity.maas(tokens)
 		elif metric == LEXICAL_DIVERSITY_MTLD:
-			result = ld.mtld(tokens)
+			result = diversity.mtld(tokens)
 		elif metric == LEXICAL_DIVERSITY_MATTR:
 			if extraParam == None:
 				extraParam = 50 #default window_size 50
-			result = ld.mattr(tokens, extraParam) 
+			result = diversity.mattr(tokens, extraParam)
 		elif metric == LEXICAL_DIVERSITY_TTR:
-			result = ld.ttr(tokens)
+			result = diversity.ttr(tokens)
 		
 		return result
+
+	def _getLexicalDiversityTokens(self, lines):
+		"""Internal use. One token per utterance: utterances with the same MOR units get the same id.
+		Utterances are grouped by length so each group is a matrix of MOR units where equal rows are found sorting it
+
+		Args:
+			lines (list): Utterances
+
+		Returns:
+			numpy.ndarray: Token ids
+		"""
+		tiers = [ l[TIER_MOR] for l in lines ]
+		starts = np.array( [ mor.start for mor in tiers ], dtype=np.int64 )
+		lengths = np.array( [ len(mor) for mor in tiers ], dtype=np.int64 )
+		return self._getLexicalDiversityTokensOfTiers(starts, lengths)
+
+	def _getLexicalDiversityTokensOfTiers(self, starts, lengths):
+		"""Internal use. Same as _getLexicalDiversityTokens for MOR tiers given by where they start in the storage and their length
+
+		Args:
+			starts (numpy.ndarray): Storage index of the first MOR unit of each utterance
+			lengths (numpy.ndarray): MOR units of each utterance
+
+		Returns:
+			numpy.ndarray: Token ids
+		"""
+		tokens = np.zeros(len(starts), dtype=np.int64)
+		units = self._getMorUnitKeys()
+
+		nextId = 0
+		for length in np.unique(lengths).tolist():
+			rows = np.flatnonzero(lengths == length)
+			ids = np.zeros(len(rows), dtype=np.int64)
+
+			if length > 0:
+				matrix = units[ starts[rows, None] + np.arange(length) ]
+				order = np.lexsort(matrix.T[::-1])
+				matrix = matrix[order]
+				ids[order] = np.concatenate( ( [0], np.cumsum( np.any(matrix[1:] != matrix[:-1], axis=1) ) ) )
+
+			tokens[rows] = ids + nextId
+			nextId += int(ids.max()) + 1
+
+		return tokens
 	
+	def _getMorUnitKeys(self):
+		"""Internal use. One number for each MOR unit in the storage: equal (categoria, lexema, extra) get the same number
+
+		Returns:
+			numpy.ndarray: Keys
+		"""
+		storage = self.morStorage
+		symbols = len(MOR_SYMBOLS)
+		categorias = np.frombuffer(storage.categorias, dtype=np.int32).astype(np.int64)
+		lexemas = np.frombuffer(storage.lexemas, dtype=np.int32)
+		extras = np.frombuffer(storage.extras, dtype=np.int32)
+
+		if symbols ** 3 < 2 ** 63:
+			return ( categorias * symbols + lexemas ) * symbols + extras
+
+		return np.unique( np.stack( [ categorias, lexemas, extras ], axis=1 ), axis=0, return_inverse=True )[1].ravel()
+
 	def getLinguisticProductivity(self, addressee=ADDRESSEE_ALL, metric=LINGUISTIC_PRODUCTIVITY_MLU):
 		"""Calculates MLU metric. Note that results can be very different from CLAN
 
@@ -1118,71 +3120,40 @@ class ChaFile:
 		return (count_utts, count_mor, count_mor/count_utts)
 		
 	def isUtteranceEmpty(self, line):
-		"""Returns True if the utterance is empty based on a word criteria
+		"""Returns True if the utterance is empty based on a word criteria (see setEmptyWords).
+		The result is kept in the line so it is computed only once
 
 		Args:
-			line (dict): A line
+			line (Line): A line
 
 		Returns:
 			bool: True if the utterance is considered empty. False otherwise
 		"""
+		empty = line.empty
+		if empty is None:
+			# regex first so lazy MOR tiers are only parsed when needed
+			empty = self.emptyRegex.search(line[LINE_UTTERANCE]) is not None and ( TIER_MOR not in line or len(line[TIER_MOR]) == 0 )
+			line.empty = empty
+		return empty
 
-		if len(line[TIER_MOR]) == 0:
-			considerEmptyWords = []
-
-			if self.language == LANGUAGE_SPANISH:
-				considerEmptyWords = [
-					"ríe",
-					"rie",
-					"llora",
-					"besa",
-					"tose",
-					"silba",
-					"silva",
-					"aplaude",
-					"camina",
-					"llorisquea",
-					"chasquea",
-					"sopla",
-					"lloriqueo",
-					"zapatea",
-					"bosteza",
-					"suspira"
-				]
-			elif self.language == LANGUAGE_ENGLISH:
-				considerEmptyWords = [
-					"laughs",
-					"whistles",
-					"cries",
-					"sobs",
-					"giggles",
-					"chuckles",
-					"whines",
-					"yawns",
-					"squeals",
-					"kisses",
-					"toots",
-					"claps",
-					"blowskisses",
-					"wagglestongue",
-					"clickstongue",
-					"clicks",
-					"sighs"
-				]
-
-			for w in considerEmptyWords:
-				if w in line[LINE_UTTERANCE]:
-					return True
-
-			emptyUtt = line[LINE_UTTERANCE].replace("0", "")
-			emptyUtt = emptyUtt.replace(".", "")
-			emptyUtt = emptyUtt.strip()
-			if emptyUtt == "":
-				return True
+	def setEmptyWords(self, words = None):
+		"""Utterances without MOR that have any of these words are considered empty. Also those with only 0 and .
 
-			return False
-		
-		return False
+		Args:
+			words (list, optional): Words. Defaults to None (EMPTY_WORDS for the current language).
+		"""
+		self.emptyWords = words
+
+		if words is None:
+			words = EMPTY_WORDS.get(self.language, [])
+
+		# one regex for every word plus the utterances with only 0 and .
+		self.emptyRegex = re.compile( "|".join( [ r"\A[0.\s]*\Z" ] + [ re.escape(w) for w in words ] ) )
+
+		for l in self.lines:
+			l.empty = None
+		self.columns = None
+		self.turns = None
 	
 	def getTurnsBySpeaker( self, addressee, allowIntervining = True ):
 		"""Get utterances grouped by speakers turns
@@ -1194,117 +3165,56 @@ class ChaFile:
 		Returns:
 			dict: Utterances grouped by speakers turns
 		"""
+		turnos = self._getTurns( addressee, allowIntervining )
+		return { speaker : [ turno[:] for turno in turnos[speaker] ] for speaker in turnos }
 
-		TURN_CDS_MAX_INTERVENING_CHILD = 1 # cuantas intervenciones del CHI
-		TURN_CDS_MAX_INTERVENING_OTHER = 3 # cuantas intervenciones de otros hablantes
-		TURN_ADS_MAX_INTERVENING_OTHER = 3 # cuantas intervenciones de otros hablantes
-		TURN_MAX_TIME = 5000 #ms 
-
-		speakers = self.getSpeakers()
-
-		def endTurno():
-			nonlocal turnos, turno, speaker
-			nonlocal qtyIntervencionChild, qtyIntervencionOther
-			
-			turnos[speaker].append(turno)
-			turno = []
-
-			qtyIntervencionChild = 0
-			qtyIntervencionOther = 0
+	def _getTurns( self, addressee, allowIntervining ):
+		"""Internal use. Turns of every configuration are computed in one pass the first time any of them is needed
 
-		turnos = {}
+		Args:
+			addressee (str): Same as getTurnsBySpeaker
+			allowIntervining (bool): Same as getTurnsBySpeaker
 
+		Returns:
+			dict: Same as getTurnsBySpeaker. Don't modify it
+		"""
 		if addressee == ADDRESSEE_CHILD_DIRECTED: ### Turnos dirigidos a target child
-			target = SPEAKER_TARGET_CHILD
-
-			for speaker in speakers:
-				if speaker in [SPEAKER_CODE] :
-					continue
-
-				turnos[speaker] = []
-				turno = []
-
-				qtyIntervencionChild = 0
-				qtyIntervencionOther = 0
-				
-				for l in self.getLines():
-					if self.isUtteranceEmpty(l):
-						continue
-
-					if not turno: # nuevo turno
-						if l[LINE_SPEAKER] == speaker and l[LINE_ADDRESSEE] == target:
-							turno.append(l)
-					else: # turno existente
-						tiempoActual = tiempoAnterior = None
-
-						if LINE_BULLET in l and LINE_BULLET in turno[-1]:
-							tiempoActual = l[LINE_BULLET][0]
-							tiempoAnterior = turno[-1][LINE_BULLET][1]
-						
-						if tiempoActual and (tiempoActual - tiempoAnterior >= TURN_MAX_TIME):
-							endTurno()
-						else:
-							if l[LINE_SPEAKER] == speaker: #el hablante es correcto
-								if l[LINE_ADDRESSEE] == target:
-									turno.append(l)
-								else:
-									endTurno()
-							else: #el hablante cambió
-								if l[LINE_SPEAKER] == SPEAKER_TARGET_CHILD:
-									qtyIntervencionChild += 1
-									if qtyIntervencionChild > TURN_CDS_MAX_INTERVENING_CHILD:
-										endTurno()
-								else:
-									qtyIntervencionOther += 1
-									if qtyIntervencionOther > TURN_CDS_MAX_INTERVENING_OTHER:
-										endTurno()
-		
+			key = (ADDRESSEE_CHILD_DIRECTED, True)
 		elif addressee == ADDRESSEE_ADULT: ### Turnos entre adultxs
-			target = SPEAKER_ADULT
+			key = (ADDRESSEE_ADULT, bool(allowIntervining))
+		else:
+			raise Exception("'addressee' argument should be ADDRESSEE_CHILD_DIRECTED or ADDRESSEE_ADULT")
+
+		if self.turns is None:
+			detectors = self._getTurnDetectors()
 
-			for speaker in speakers:
-				if speaker in [SPEAKER_TARGET_CHILD, SPEAKER_OTHER_CHILD, SPEAKER_CODE] :
+			for l in self.getLines():
+				if self.isUtteranceEmpty(l):
 					continue
+				for detector in detectors.values():
+					detector.feed(l)
 
-				turnos[speaker] = []
-				turno = []
+			# unfinished turns are not counted
+			self.turns = { k : detector.turnos for k, detector in detectors.items() }
 
-				qtyIntervencionOther = 0
-				
-				for l in self.getLines():
-					if self.isUtteranceEmpty(l):
-						continue
+		return self.turns[key]
 
-					if not turno: # nuevo turno
-						if l[LINE_SPEAKER] == speaker and l[LINE_ADDRESSEE] == target:
-							turno.append(l)
-					else: # turno existente
-						tiempoActual = tiempoAnterior = None
-
-						if LINE_BULLET in l and LINE_BULLET in turno[-1]:
-							tiempoActual = l[LINE_BULLET][0]
-							tiempoAnterior = turno[-1][LINE_BULLET][1]
-						
-						if tiempoActual and (tiempoActual - tiempoAnterior >= TURN_MAX_TIME):
-							endTurno()
-						else:
-							if l[LINE_SPEAKER] == speaker: #el hablante es correcto
-								if l[LINE_ADDRESSEE] == target: #si habla con el chico u otro se corta el turno
-									turno.append(l)
-								else:
-									endTurno()
-							else: #el hablante cambió (sea el chico o no)
-								if allowIntervining:
-									qtyIntervencionOther += 1
-									if qtyIntervencionOther > TURN_ADS_MAX_INTERVENING_OTHER:
-										endTurno()
-								else:
-									endTurno()
-		
-		else:
-			raise Exception("'addressee' argument should be ADDRESSEE_CHILD_DIRECTED or ADDRESSEE_ADULT")
-						
-		return turnos
+	def _getTurnDetectors(self):
+		"""Internal use. A TurnDetector for each configuration. Non empty lines are fed to all of them in order
+
+		Returns:
+			dict: (addressee, allowIntervining) -> TurnDetector
+		"""
+		speakers = self.getSpeakers()
+		adults = [ s for s in speakers if s not in [SPEAKER_TARGET_CHILD, SPEAKER_OTHER_CHILD, SPEAKER_CODE] ]
+
+		return {
+			(ADDRESSEE_CHILD_DIRECTED, True) : TurnDetector( [ s for s in speakers if s not in [SPEAKER_CODE] ], SPEAKER_TARGET_CHILD,
+															  TURN_CDS_MAX_INTERVENING_CHILD, TURN_CDS_MAX_INTERVENING_OTHER ),
+			# the target child counts as any other speaker. Without intervening utterances any other speaker ends the turn
+			(ADDRESSEE_ADULT, True) : TurnDetector( adults, SPEAKER_ADULT, None, TURN_ADS_MAX_INTERVENING_OTHER ),
+			(ADDRESSEE_ADULT, False) : TurnDetector( adults, SPEAKER_ADULT, None, 0 )
+		}
 	
 	def countTurns( self, addressee, allowIntervining = True ):
 		"""Count turns by addressee
@@ -1316,7 +3226,7 @@ class ChaFile:
 		Returns:
 			int: Turn count
 		"""
-		turns = self.getTurnsBySpeaker(addressee, allowIntervining)
+		turns = self._getTurns(addressee, allowIntervining)
 		count = 0
 
 		for speaker in turns:
@@ -1324,97 +3234,214 @@ class ChaFile:
 
 		return count
 
-	def _checkCriteria(self, mor, criteria, criteriaType):
-		"""Internal use. Checks the MOR tier for the criteria (just once)
+	def summary(self, addressees = SUMMARY_ADDRESSEES, metrics = None, countCopAux = False, processLightVerbs = True):
+		"""Every metric for every addressee at once. Lines are gone through once (emptiness, turns, MOR tiers and
+		the verbs, nouns and adjectives of each line) and each metric is computed for all addressees using NumPy masks
+		over the per line values. Verbs, nouns and adjectives are populated first if they weren't (see populateVerbs)
 
 		Args:
-			mor (list): MOR tier
-			criteria (list): Same as findLinesByMorCriteria
-			criteriaType (str or list): Same as findLinesByMorCriteria
+			addressees (list, optional): ADDRESSEE constants. Defaults to SUMMARY_ADDRESSEES.
+			metrics (list, optional): SUMMARY_UTTERANCES (same as countUtterances), LINE_UTTERANCE, LINE_VERBS, LINE_NOUNS, LINE_ADJECTIVES (same as count, tokens and types),
+				LINGUISTIC_PRODUCTIVITY_MLU, LEXICAL_DIVERSITY constants and SUMMARY_TURNS (same as countTurns, only for ADDRESSEE_CHILD_DIRECTED and ADDRESSEE_ADULT).
+				Defaults to None which means SUMMARY_METRICS (SUMMARY_METRICS_WITHOUT_MOR if MOR tier was not found).
+			countCopAux (bool, optional): Same as count. Defaults to False.
+			processLightVerbs (bool, optional): Same as count. Defaults to True.
 
 		Returns:
-			list: List of indexes of the words matching the criteria
+			dict: Flat record, i.e. { SUMMARY_FILE : "file", "utterances_cds" : 10, "verbos_tokens_cds" : 4, "verbos_types_cds" : 2, "mlu_cds" : 2.5, ... }.
+			Keys are "<metric>_<addressee>" or "<metric>_<COUNT_TYPE>_<addressee>". MLU also has "mlu_utterances_<addressee>" and "mlu_morphemes_<addressee>"
 		"""
-		if mor == MISSING_VALUE:
-			return []
-
-		matchedCriteria = []
-		currentCriteria = 0
-		found = False
-
-		for morUnitIndex in range(len(mor)):
-			morUnit = mor[morUnitIndex]
-
-			if morUnit == MISSING_VALUE:
-				continue
-
-			found = False
-			for c in criteria[currentCriteria]:
-				isAMatch = False
-				currentCriteriaType = criteriaType
-
-				if isinstance(criteriaType, list):
-					currentCriteriaType = criteriaType[currentCriteria]
-				
-				if currentCriteriaType == MOR_UNIT_CATEGORIA_LEXEMA:
-					if not "|" in c:
-						raise Exception("Criteria type is MOR_UNIT_CATEGORIA_LEXEMA but criteria doesn't include | symbol")
-					
-					arrCriteria = c.split("|")
-
-					isAMatch = morUnit[ MOR_UNIT_LEXEMA ] == arrCriteria[1] and morUnit[ MOR_UNIT_CATEGORIA ] == arrCriteria[0]
-				else:
-					isAMatch = morUnit[ currentCriteriaType ] == c
-					
-				if isAMatch:
-					matchedCriteria.append(morUnitIndex)
-					currentCriteria += 1
-					found = True
-					break
-
-			if not found and currentCriteria > 0:
-				matchedCriteria = []
-				currentCriteria = 0
+		if metrics is None:
+			metrics = SUMMARY_METRICS if self.morFound else SUMMARY_METRICS_WITHOUT_MOR
+
+		lexicalDiversity = {
+			LEXICAL_DIVERSITY_TTR : diversity.ttr,
+			LEXICAL_DIVERSITY_MATTR : diversity.mattr,
+			LEXICAL_DIVERSITY_MAAS : diversity.maas,
+			LEXICAL_DIVERSITY_HDD : diversity.hdd,
+			LEXICAL_DIVERSITY_MTLD : diversity.mtld
+		}
+		categories = [ LINE_VERBS, LINE_NOUNS, LINE_ADJECTIVES ]
+
+		for metric in metrics:
+			if metric not in [ SUMMARY_UTTERANCES, SUMMARY_TURNS, LINE_UTTERANCE, LINGUISTIC_PRODUCTIVITY_MLU ] + categories and metric not in lexicalDiversity:
+				raise Exception(f"unknown metric '{metric}'")
+		for addressee in addressees:
+			if addressee not in [ ADDRESSEE_ALL, ADDRESSEE_CHILD_DIRECTED, ADDRESSEE_CHILD_PRODUCED, ADDRESSEE_OVER_HEARD, ADDRESSEE_ADULT ]:
+				raise Exception(f"unknown addressee '{addressee}'")
+
+		useMor = any( m not in SUMMARY_METRICS_WITHOUT_MOR for m in metrics )
+		if useMor:
+			assert self.morFound, "MOR tier not found"
+
+		categories = [ c for c in categories if c in metrics ]
+		if LINE_VERBS in categories:
+			self.populateVerbs(countCopAux=countCopAux, processLightVerbs=processLightVerbs)
+		if LINE_NOUNS in categories:
+			self.populateNouns(countCopAux=countCopAux, processLightVerbs=processLightVerbs)
+		if LINE_ADJECTIVES in categories:
+			self.populateAdjectives()
 
+		# turns are found in the same pass unless they were already found
+		detectors = self._getTurnDetectors() if SUMMARY_TURNS in metrics and self.turns is None else None
+		useEmpty = detectors is not None or SUMMARY_UTTERANCES in metrics
+
+		# the only pass over the lines
+		lines = self.lines
+		toChild = np.zeros(len(lines), dtype=bool)
+		byChild = np.zeros(len(lines), dtype=bool)
+		empty = np.zeros(len(lines), dtype=bool)
+		starts = np.zeros(len(lines), dtype=np.int64)
+		lengths = np.zeros(len(lines), dtype=np.int64)
+		categoryLines = { c : [] for c in categories } # line of each verb, noun or adjective
+		categoryUnits = { c : [] for c in categories } # its MOR unit in the storage
+
+		for i, l in enumerate(lines):
+			toChild[i] = l.addressee == SPEAKER_TARGET_CHILD
+			byChild[i] = l.speaker == SPEAKER_TARGET_CHILD
+
+			if useEmpty:
+				empty[i] = self.isUtteranceEmpty(l)
+				if detectors is not None and not empty[i]:
+					for detector in detectors.values():
+						detector.feed(l)
+
+			if useMor:
+				mor = l[TIER_MOR]
+				starts[i] = mor.start
+				lengths[i] = len(mor)
+
+				for c in categories:
+					indexes = l[c]
+					categoryLines[c].extend( [i] * len(indexes) )
+					categoryUnits[c].extend( mor.start + j for j in indexes )
+
+		masks = {
+			ADDRESSEE_ALL : np.ones(len(lines), dtype=bool),
+			ADDRESSEE_CHILD_DIRECTED : toChild,
+			ADDRESSEE_CHILD_PRODUCED : byChild,
+			ADDRESSEE_OVER_HEARD : ~toChild & ~byChild,
+			ADDRESSEE_ADULT : np.zeros(len(lines), dtype=bool) # getLines has no adult lines, only turns
+		}
+
+		if useMor:
+			lexemas = np.frombuffer(self.morStorage.lexemas, dtype=np.int32)
+			for c in categories:
+				categoryLines[c] = np.array(categoryLines[c], dtype=np.int64)
+				categoryUnits[c] = lexemas[ np.array(categoryUnits[c], dtype=np.int64) ]
+
+			# every MOR unit of every line for LINE_UTTERANCE
+			unitLines = np.repeat( np.arange(len(lines)), lengths )
+			unitKeys = self._getMorUnitKeys()[ starts[unitLines] + np.arange(lengths.sum()) - np.repeat( np.cumsum(lengths) - lengths, lengths ) ]
+
+		if detectors is not None:
+			# unfinished turns are not counted
+			self.turns = { k : detector.turnos for k, detector in detectors.items() }
+
+		if any( m in lexicalDiversity for m in metrics ):
+			tokens = self._getLexicalDiversityTokensOfTiers(starts, lengths)
+
+		record = { SUMMARY_FILE : self.filename }
+
+		for metric in metrics:
+			for addressee in addressees:
+				mask = masks[addressee]
+				key = f"{metric}_{addressee}"
+
+				if metric == SUMMARY_UTTERANCES:
+					record[key] = int( np.count_nonzero( mask & ~empty ) )
+				elif metric == LINE_UTTERANCE:
+					record[f"{metric}_{COUNT_TYPE_TOKENS}_{addressee}"] = int( lengths[mask].sum() )
+					record[f"{metric}_{COUNT_TYPE_TYPES}_{addressee}"] = len( np.unique( unitKeys[ mask[unitLines] ] ) )
+				elif metric in categories:
+					inMask = mask[ categoryLines[metric] ]
+					record[f"{metric}_{COUNT_TYPE_TOKENS}_{addressee}"] = int( np.count_nonzero(inMask) )
+					record[f"{metric}_{COUNT_TYPE_TYPES}_{addressee}"] = len( np.unique( categoryUnits[metric][inMask] ) )
+				elif metric == LINGUISTIC_PRODUCTIVITY_MLU:
+					utterances = int( np.count_nonzero( mask & (lengths > 0) ) )
+					morphemes = int( lengths[mask].sum() )
+					record[f"{metric}_{SUMMARY_UTTERANCES}_{addressee}"] = utterances
+					record[f"{metric}_{SUMMARY_MORPHEMES}_{addressee}"] = morphemes
+					record[key] = morphemes / utterances if utterances > 0 else None
+				elif metric in lexicalDiversity:
+					record[key] = lexicalDiversity[metric]( tokens[mask] )
+				elif metric == SUMMARY_TURNS:
+					if addressee in [ ADDRESSEE_CHILD_DIRECTED, ADDRESSEE_ADULT ]:
+						record[key] = self.countTurns(addressee)
+
+		return record
+
+	def compileMorCriteria(self, criteria, criteriaType = MOR_UNIT_CATEGORIA):
+		"""Compiles criteria so it can be reused for many searches. Criteria already compiled are cached
 
-			if currentCriteria == len(criteria):
-				return matchedCriteria
+		Args:
+			criteria (list or MorPattern): Same as findLinesByMorCriteria. A MorPattern is returned as is
+			criteriaType (str or list, optional): Same as findLinesByMorCriteria. Defaults to MOR_UNIT_CATEGORIA.
 
-		return []
+		Returns:
+			MorPattern: Compiled criteria
+		"""
+		if isinstance(criteria, MorPattern):
+			return criteria
+
+		key = repr( (criteria, criteriaType) )
+		pattern = self.criteriaCache.get(key)
+		if pattern is None or pattern.isStale():
+			pattern = MorPattern(criteria, criteriaType)
+			self.criteriaCache[key] = pattern
+		return pattern
 	
 	def _parseMor(self, morContent, lineNumber):
-		"""Internal use. Parse MOR tier
+		"""Internal use. Parse MOR tier and store it in self.morStorage
 
 		Args:
 			morContent (string): Content of the MOR tier
 			lineNumber (int): Line number
 
 		Returns:
-			list: Parsed MOR tier
+			MorTier: Parsed MOR tier
 		"""
 		morContent = morContent.split(" ")
 
-		arrMorData = []
+		storage = self.morStorage
+		start = len(storage)
+		morUnitCache = self.morUnitCache
 
 		for morUnit in morContent:
 			lstMorUnit = []
 
 			if "^" in morUnit:
-				if lineNumber not in self.morAmbiguousLines:
-					self.morAmbiguousLines.append(lineNumber)
-				
+				# the line was added to morAmbiguousLines by _buildLine
 				lstMorUnit = morUnit.split("^")
 				morUnit = lstMorUnit[0]
 				lstMorUnit = lstMorUnit[1:]
 
-			parsedMorUnit = self._parseMorUnit(morUnit)
-			if parsedMorUnit != {}:
+			# the same MOR units repeat all over the file so they are parsed only once
+			ids = morUnitCache.get(morUnit)
+			if ids is None:
+				parsedMorUnit = self._parseMorUnit(morUnit)
+				if parsedMorUnit is None:
+					ids = False #malformed
+				elif parsedMorUnit != {}:
+					ids = ( MOR_SYMBOLS.intern(parsedMorUnit[MOR_UNIT_CATEGORIA]),
+							MOR_SYMBOLS.intern(parsedMorUnit[MOR_UNIT_LEXEMA]),
+							MOR_SYMBOLS.intern(parsedMorUnit[MOR_UNIT_EXTRA]) )
+				else:
+					ids = ()
+				morUnitCache[morUnit] = ids
+
+			if ids is False:
+				# counted here and not in _parseMorUnit so cached units are counted too
+				self.statistics.count(STATS_MALFORMED_MOR_UNITS)
+			elif ids:
 				if len(lstMorUnit) > 0 :
-					parsedMorUnit[MOR_UNIT_AMBIGUOUS] = lstMorUnit
+					storage.ambiguous[ len(storage) ] = lstMorUnit
 
-				arrMorData.append( parsedMorUnit )
+				storage.categorias.append(ids[0])
+				storage.lexemas.append(ids[1])
+				storage.extras.append(ids[2])
 
-		return arrMorData
+		return MorTier(storage, start, len(storage))
 
 	def _parseMorUnit(self, morUnit):
 		"""Internal use. Parse a MOR unit (one word)
@@ -1423,54 +3450,53 @@ class ChaFile:
 			morUnit (string): One word as described by MOR
 
 		Returns:
-			dict: A dict representation of the MOR unit
+			dict: A dict representation of the MOR unit, empty if it is skipped (stop words, punctuation)
+				or None if it is malformed
 		"""
 		if morUnit in MOR_STOP_WORDS:
 			return {}
 		
-		MOR_REGEX = r"([A-zÀ-ú:#\?']*)\|([A-zÀ-ú]*)(.*)"
-
-		matches = re.match(MOR_REGEX, morUnit)
-		if matches != None: #no agarra ni . ! ? 
-			if len(matches.groups()) == 3:
-				morCategoria = matches.group(1)
-				morLexema = matches.group(2)
-				morExtra = matches.group(3)
-
-				for stopWord in MOR_STOP_WORDS:
-					if type(stopWord) is list:
-						if morLexema == stopWord[1] and morCategoria == stopWord[0]:
-							if len(stopWord) == 2:
-								return {}
-							else:
-								if stopWord[2] in morExtra:
-									return {}
+		matches = MOR_UNIT_REGEX.match(morUnit)
+		if matches is None:
+			#no agarra ni . ! ? 
+			if MOR_PUNCTUATION_REGEX.match(morUnit) is None:
+				self.log.warning(f"Warning: Malformed mor unit \"{morUnit}\"", f"malformed mor unit \"{morUnit}\"")
+				return None
+			return {}
+
+		morCategoria = matches.group(1)
+		morLexema = matches.group(2)
+		morExtra = matches.group(3)
+
+		for stopWord in MOR_STOP_WORDS:
+			if type(stopWord) is list:
+				if morLexema == stopWord[1] and morCategoria == stopWord[0]:
+					if len(stopWord) == 2:
+						return {}
 					else:
-						if morLexema == stopWord:
+						if stopWord[2] in morExtra:
 							return {}
+			else:
+				if morLexema == stopWord:
+					return {}
 
-				#reemplazo de palabras que está agarrando mal el MOR
-				if morLexema in MOR_REPLACEMENTS:
-					morLexema = MOR_REPLACEMENTS[morLexema]
+		#reemplazo de palabras que está agarrando mal el MOR
+		if morLexema in MOR_REPLACEMENTS:
+			morLexema = MOR_REPLACEMENTS[morLexema]
 
-				parsedMorUnit = {
-					MOR_UNIT_CATEGORIA : morCategoria,
-					MOR_UNIT_LEXEMA : morLexema,
-					MOR_UNIT_EXTRA : morExtra
-				}
+		parsedMorUnit = {
+			MOR_UNIT_CATEGORIA : morCategoria,
+			MOR_UNIT_LEXEMA : morLexema,
+			MOR_UNIT_EXTRA : morExtra
+		}
 
-				return parsedMorUnit
-			else:
-				log.log(f"Warning: Malformed mor unit \"{morUnit}\"")
-				return {}
-		else:
-			return {}
+		return parsedMorUnit
 
 	def _setAddressee(self, line):
 		"""Internal use. Set normalized addressee 
 
 		Args:
-			line (dict): Utterance
+			line (Line): Utterance
 		"""
 		addressee = SPEAKER_ADULT
 
@@ -1485,7 +3511,7 @@ class ChaFile:
 			if line[TIER_XDS] in ADDRESSEE_CORRESPOND:
 				addressee = ADDRESSEE_CORRESPOND[ line[TIER_XDS] ]
 			else:
-				log.log(f"Warning unknown addressee '{line[TIER_XDS]}' in line '{line[LINE_NUMBER]}'")
+				self.log.warning(f"Warning unknown addressee '{line[TIER_XDS]}' in line '{line[LINE_NUMBER]}'", f"unknown addressee '{line[TIER_XDS]}'")
 				addressee = ADDRESSEE_XDS_UNKNOWN
 
 		line[LINE_ADDRESSEE] = addressee
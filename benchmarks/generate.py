@@ -0,0 +1,267 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Writes synthetic CHA files for benchmarking: Spanish and English, with %mor, %gra, %xds or [+ CHI] tags and bullets.
+Utterances are built from templates filled with a Zipf distributed vocabulary so lexical diversity looks like a real corpus.
+The same seed always writes the same files
+
+	python generate.py corpus --sizes 1000 10000 100000 1000000
+"""
+
+import os
+import random
+import argparse
+from itertools import accumulate
+
+LANGUAGE_SPANISH = "spa"
+LANGUAGE_ENGLISH = "eng"
+LANGUAGES = [ LANGUAGE_SPANISH, LANGUAGE_ENGLISH ]
+
+ADDRESSEE_XDS = "xds" #addressee in a %xds tier
+ADDRESSEE_TAG = "tag" #addressee as [+ CHI] in the main tier
+ADDRESSEE_MODES = [ ADDRESSEE_XDS, ADDRESSEE_TAG ]
+
+SIZES = [ 1000, 10000, 100000, 1000000 ]
+
+# (word, MOR unit) by category. Most frequent first
+VOCABULARY = {
+	LANGUAGE_SPANISH : {
+		"n" : [ ("nene", "n|nene-m"), ("mamá", "n|mamá-f"), ("agua", "n|agua-f"), ("perro", "n|perro-m"), ("casa", "n|casa-f"),
+				("papá", "n|papá-m"), ("gato", "n|gato-m"), ("pelota", "n|pelota-f"), ("leche", "n|leche-f"), ("auto", "n|auto-m"),
+				("mano", "n|mano-f"), ("libro", "n|libro-m"), ("zapato", "n|zapato-m"), ("muñeca", "n|muñeca-f"), ("papa", "n|papa-f"),
+				("oso", "n|oso-m"), ("puerta", "n|puerta-f"), ("cama", "n|cama-f"), ("abuela", "n|abuela-f"), ("pan", "n|pan-m"),
+				("vaca", "n|vaca-f"), ("globo", "n|globo-m"), ("caballo", "n|caballo-m"), ("cuchara", "n|cuchara-f"), ("tren", "n|tren-m") ],
+		"v" : [ ("mirá", "v|mira-2S&IMP"), ("quiero", "v|quere-1S&PRES"), ("tenés", "v|tene-2S&PRES"), ("vamos", "v|i-1P&PRES"),
+				("dame", "v|da-2S&IMP~pro:clit|1S"), ("come", "v|come-3S&PRES"), ("hace", "v|hace-3S&PRES"), ("tomá", "v|toma-2S&IMP"),
+				("viene", "v|veni-3S&PRES"), ("juega", "v|juga-3S&PRES"), ("duerme", "v|dormi-3S&PRES"), ("busca", "v|busca-3S&PRES"),
+				("sacá", "v|saca-2S&IMP"), ("abrí", "v|abri-2S&IMP"), ("pone", "v|pone-3S&PRES"), ("llora", "v|llora-3S&PRES") ],
+		"inf" : [ ("comer", "inf|come-INF"), ("dormir", "inf|dormi-INF"), ("jugar", "inf|juga-INF"), ("ir", "inf|i-INF"),
+				("bañarse", "inf|baña-INF~pro:refl|se"), ("tomar", "inf|toma-INF"), ("buscar", "inf|busca-INF") ],
+		"adj" : [ ("lindo", "adj|lindo-m"), ("grande", "adj|grande"), ("rojo", "adj|rojo-m"), ("chiquito", "adj|chiquito-m"),
+				("rico", "adj|rico-m"), ("nuevo", "adj|nuevo-m"), ("sucio", "adj|sucio-m"), ("feo", "adj|feo-m") ],
+		"det" : [ ("el", "det:art|el-m"), ("la", "det:art|la-f"), ("un", "det:art|un-m"), ("este", "det:dem|este-m"), ("tu", "det:poss|tu") ],
+		"adv" : [ ("acá", "adv|acá"), ("no", "adv|no"), ("ahí", "adv|ahí"), ("más", "adv|más"), ("ya", "adv|ya"), ("bien", "adv|bien") ],
+		"co" : [ ("dale", "co|dale"), ("hola", "co|hola"), ("sí", "co|sí"), ("bueno", "co|bueno"), ("okay", "co|okay"), ("uy", "co|uy") ],
+		"pro" : [ ("yo", "pro:sub|yo"), ("vos", "pro:sub|vos"), ("eso", "pro:dem|eso"), ("esto", "pro:dem|esto") ],
+		"cop" : [ ("es", "cop|se-3S&PRES"), ("está", "cop|esta-3S&PRES") ],
+		"prep" : [ ("a", "prep|a"), ("con", "prep|con"), ("en", "prep|en"), ("para", "prep|para") ]
+	},
+	LANGUAGE_ENGLISH : {
+		"n" : [ ("baby", "n|baby"), ("mommy", "n|mommy"), ("water", "n|water"), ("doggy", "n|doggy"), ("ball", "n|ball"),
+				("daddy", "n|daddy"), ("kitty", "n|kitty"), ("juice", "n|juice"), ("milk", "n|milk"), ("car", "n|car"),
+				("hand", "n|hand"), ("book", "n|book"), ("shoe", "n|shoe"), ("dolly", "n|dolly"), ("cookie", "n|cookie"),
+				("bear", "n|bear"), ("door", "n|door"), ("bed", "n|bed"), ("grandma", "n|grandma"), ("bread", "n|bread"),
+				("cow", "n|cow"), ("balloon", "n|balloon"), ("horse", "n|horse"), ("spoon", "n|spoon"), ("train", "n|train") ],
+		"v" : [ ("look", "v|look"), ("want", "v|want"), ("have", "v|have"), ("go", "v|go"), ("give", "v|give"), ("eat", "v|eat"),
+				("make", "v|make"), ("take", "v|take"), ("come", "v|come"), ("play", "v|play"), ("sleep", "v|sleep"), ("find", "v|find"),
+				("get", "v|get"), ("open", "v|open"), ("put", "v|put"), ("cry", "v|cry") ],
+		"inf" : [ ("to eat", "inf|to v|eat"), ("to sleep", "inf|to v|sleep"), ("to play", "inf|to v|play"), ("to go", "inf|to v|go"),
+				("to take a bath", "inf|to v|take det:art|a n|bath"), ("to drink", "inf|to v|drink") ],
+		"adj" : [ ("nice", "adj|nice"), ("big", "adj|big"), ("red", "adj|red"), ("little", "adj|little"), ("yummy", "adj|yummy"),
+				("new", "adj|new"), ("dirty", "adj|dirty"), ("ugly", "adj|ugly") ],
+		"det" : [ ("the", "det:art|the"), ("a", "det:art|a"), ("this", "det:dem|this"), ("your", "det:poss|your") ],
+		"adv" : [ ("here", "adv|here"), ("there", "adv|there"), ("now", "adv|now"), ("again", "adv|again"), ("too", "adv|too") ],
+		"co" : [ ("okay", "co|okay"), ("hi", "co|hi"), ("yes", "co|yes"), ("no", "co|no"), ("oh", "co|oh"), ("wow", "co|wow") ],
+		"pro" : [ ("I", "pro:sub|I"), ("you", "pro:per|you"), ("it", "pro:per|it"), ("that", "pro:dem|that") ],
+		"cop" : [ ("is", "cop|be&3S"), ("are", "cop|be&PRES") ],
+		"prep" : [ ("to", "prep|to"), ("with", "prep|with"), ("in", "prep|in"), ("for", "prep|for") ]
+	}
+}
+
+# sequences of categories. Templates may repeat so the common ones are chosen more often
+TEMPLATES = [ "co", "co n", "v det n", "v det n", "det n cop adj", "pro v det n", "v adv", "pro v inf", "co v det n adv",
+			  "cop adj det n", "n", "v prep det n", "pro cop adj", "det adj n", "co co", "v pro", "adv v det n prep det n" ]
+
+# utterances that are not built from templates: retracings, replacements, ambiguities, light verbs and so on
+SPECIAL = {
+	LANGUAGE_SPANISH : [
+		("<no no> [/] no quiero xxx .", "adv|no v|quere-1S&PRES ."),
+		("qué lindo el auto [: coche] !", "pro:int|qué adj|lindo-m det:art|el-m n|coche-m !"),
+		("hay que bañarse .", "v|habe-3S&PRES pro:rel|que inf|baña-INF~pro:refl|se ."),
+		("tenés que dormir .", "v|tene-2S&PRES pro:rel|que inf|dormi-INF ."),
+		("es rojo^rojo .", "cop|se-3S&PRES adj|rojo-m^n|rojo-m ."),
+		("está cansado el perro .", "cop|esta-3S&PRES part|cansa-PP-m det:art|el-m n|perro-m ."),
+		("mirá mami , el gato .", "v|mira-2S&IMP n|mami-f cm|cm det:art|el-m n|gato-m ."),
+		("estoy comiendo papa .", "v|esta-1S&PRES ger|come-GER n|papa-f ."),
+		("puedo ir ?", "v|pode-1S&PRES inf|i-INF ?")
+	],
+	LANGUAGE_ENGLISH : [
+		("<no no> [/] no more xxx .", "co|no qn|more ."),
+		("look at the doggy [: dog] !", "v|look prep|at det:art|the n|dog !"),
+		("I'm gonna eat .", "pro:sub|I~aux|be&1S part|go-PRESP inf|to v|eat ."),
+		("you have to sleep .", "pro:per|you v|have inf|to v|sleep ."),
+		("she is running^run .", "pro:sub|she aux|be&3S part|run-PRESP^n:gerund|run-PRESP ."),
+		("let's go outside .", "v|let~pro:obj|us v|go adv|outside ."),
+		("okay , that's nice .", "co|okay cm|cm pro:dem|that~cop|be&3S adj|nice ."),
+		("do you want juice ?", "mod|do pro:per|you v|want n|juice ?"),
+		("daddy@s:spa is here .", "cop|be&3S adv|here .")
+	]
+}
+
+EMPTY = {
+	LANGUAGE_SPANISH : [ "&=ríe .", "0 .", "&=llora .", "xxx ." ],
+	LANGUAGE_ENGLISH : [ "&=laughs .", "0 .", "&=cries .", "xxx ." ]
+}
+
+SPEAKERS = {
+	LANGUAGE_SPANISH : [ "MOT", "MOT", "MOT", "FAT", "CHI", "CHI", "OCH", "SIL" ],
+	LANGUAGE_ENGLISH : [ "MOT", "MOT", "MOT", "FAT", "CHI", "CHI", "SIS" ]
+}
+
+XDS_CODES = "TTTTAAOCU" #%xds codes weighted by how common they are
+TAGS = [ "[+ CHI]", "[+ CHI]", "[+ CHI]", "[+ OCH]" ]
+
+class UtteranceGenerator:
+	"""Random utterances (main tier and %mor) of a language
+	"""
+
+	def __init__(self, language, random):
+		"""Constructor
+
+		Args:
+			language (str): LANGUAGE_SPANISH or LANGUAGE_ENGLISH
+			random (random.Random): Source of randomness
+		"""
+		self.random = random
+		self.vocabulary = VOCABULARY[language]
+		self.special = SPECIAL[language]
+		self.empty = EMPTY[language]
+		self.coordination = ("y", "coord|y") if language == LANGUAGE_SPANISH else ("and", "coord|and")
+
+		# Zipf: the word in rank r is chosen with probability proportional to 1 / r
+		self.weights = { category : list( accumulate( 1 / (rank + 1) for rank in range(len(words)) ) )
+						 for category, words in self.vocabulary.items() }
+
+	def fromTemplate(self):
+		"""Utterance from a random template
+
+		Returns:
+			tuple: (words, MOR units) without the final punctuation
+		"""
+		words = []
+		mor = []
+		for category in self.random.choice(TEMPLATES).split():
+			word, unit = self.random.choices( self.vocabulary[category], cum_weights = self.weights[category] )[0]
+			words.append(word)
+			mor.append(unit)
+		return ( " ".join(words), " ".join(mor) )
+
+	def next(self):
+		"""Next utterance
+
+		Returns:
+			tuple: (main tier, %mor tier or None for empty utterances)
+		"""
+		r = self.random.random()
+		if r < 0.1:
+			return ( self.random.choice(self.empty), None )
+		if r < 0.25:
+			return self.random.choice(self.special)
+
+		words, mor = self.fromTemplate()
+		if self.random.random() < 0.05:
+			# long utterance that has to be wrapped
+			moreWords, moreMor = self.fromTemplate()
+			words = f"{words} {self.coordination[0]} {moreWords}"
+			mor = f"{mor} {self.coordination[1]} {moreMor}"
+
+		punctuation = self.random.choice(".....?!")
+		return ( f"{words} {punctuation}", f"{mor} {punctuation}" )
+
+def writeChaFile(path, language, utterances, addresseeMode = ADDRESSEE_XDS, seed = 0):
+	"""Writes a synthetic CHA file
+
+	Args:
+		path (str): Where the file is written
+		language (str): LANGUAGE_SPANISH or LANGUAGE_ENGLISH
+		utterances (int): Number of utterances
+		addresseeMode (str, optional): ADDRESSEE_XDS or ADDRESSEE_TAG. Defaults to ADDRESSEE_XDS.
+		seed (int, optional): Random seed. Defaults to 0.
+	"""
+	r = random.Random(seed)
+	generator = UtteranceGenerator(language, r)
+	speakers = SPEAKERS[language]
+	time = 0
+
+	with open(path, "w", encoding = "utf-8") as f:
+		f.write("@UTF8\n@Begin\n")
+		f.write(f"@Languages:\t{language}\n")
+		f.write("@Participants:\tCHI Target_Child, MOT Mother, FAT Father\n")
+		f.write(f"@ID:\t{language}|synthetic|CHI|1;06.12|female|||Target_Child|||\n")
+		f.write(f"@ID:\t{language}|synthetic|MOT|||||Mother|||\n")
+		f.write(f"@ID:\t{language}|synthetic|FAT|||||Father|||\n")
+		f.write(f"@Media:\t{os.path.splitext(os.path.basename(path))[0]}, audio\n")
+
+		for _ in range(utterances):
+			speaker = r.choice(speakers)
+			words, mor = generator.next()
+
+			time += r.choice( [ 100, 200, 500, 1500, 6000 ] ) #pauses long enough to split turns too
+			duration = r.randint(300, 3000)
+
+			tag = ""
+			if addresseeMode == ADDRESSEE_TAG and speaker != "CHI" and r.random() < 0.7:
+				tag = " " + r.choice(TAGS)
+
+			line = f"*{speaker}:\t{words}{tag} \x15{time}_{time + duration}\x15"
+			if len(line) > 70:
+				cut = line.rfind(" ", 0, 60)
+				line = line[:cut] + "\n\t" + line[cut + 1:]
+			f.write(line + "\n")
+
+			if mor is not None:
+				f.write(f"%mor:\t{mor}\n")
+				if r.random() < 0.3:
+					f.write("%gra:\t1|2|SUBJ 2|0|ROOT 3|2|PUNCT\n")
+			if r.random() < 0.03:
+				f.write("%com:\tsynthetic comment\n")
+			if addresseeMode == ADDRESSEE_XDS:
+				f.write(f"%xds:\t{r.choice(XDS_CODES)}\n")
+
+			time += duration
+
+		f.write("@End\n")
+
+def getFileName(language, addresseeMode, utterances):
+	"""Name of a generated file, i.e. spa_xds_10000.cha
+	"""
+	return f"{language}_{addresseeMode}_{utterances}.cha"
+
+def generateCorpus(directory, sizes = SIZES, languages = LANGUAGES, addresseeModes = ADDRESSEE_MODES, overwrite = False):
+	"""Writes a file for each size, language and addressee mode. Existing files are kept unless overwrite
+
+	Args:
+		directory (str): Output directory. It is created if it doesn't exist
+		sizes (list, optional): Number of utterances of each file. Defaults to SIZES.
+		languages (list, optional): Defaults to LANGUAGES.
+		addresseeModes (list, optional): Defaults to ADDRESSEE_MODES.
+		overwrite (bool, optional): Write files again even if they exist. Defaults to False.
+
+	Returns:
+		list: Paths of the files
+	"""
+	os.makedirs(directory, exist_ok = True)
+
+	paths = []
+	for size in sizes:
+		for seed, language in enumerate(languages):
+			for mode in addresseeModes:
+				path = os.path.join( directory, getFileName(language, mode, size) )
+				if overwrite or not os.path.exists(path):
+					writeChaFile(path, language, size, mode, seed = seed * 10 + ADDRESSEE_MODES.index(mode))
+				paths.append(path)
+
+	return paths
+
+if __name__ == "__main__":
+	parser = argparse.ArgumentParser(description = "Writes synthetic CHA files for benchmarking")
+	parser.add_argument("directory", help = "Output directory")
+	parser.add_argument("--sizes", type = int, nargs = "+", default = SIZES, help = "Utterances of each file")
+	parser.add_argument("--languages", nargs = "+", default = LANGUAGES, choices = LANGUAGES)
+	parser.add_argument("--addressees", nargs = "+", default = ADDRESSEE_MODES, choices = ADDRESSEE_MODES,
+						help = "xds for a %%xds tier, tag for [+ CHI] tags in the main tier")
+	parser.add_argument("--overwrite", action = "store_true", help = "Write files that already exist again")
+	args = parser.parse_args()
+
+	for path in generateCorpus(args.directory, args.sizes, args.languages, args.addressees, args.overwrite):
+		print(path)
@@ -0,0 +1,209 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Times the main ChaFile functions over synthetic files (see generate.py) and saves time and peak memory as JSON.
+Comparing against the results of another version shows regressions
+
+	python run.py --sizes 1000 10000 100000 --output results.json
+	python run.py --compare results.json
+"""
+
+import os
+import sys
+import gc
+import json
+import time
+import platform
+import argparse
+import datetime
+import statistics
+import subprocess
+import tracemalloc
+
+import numpy as np
+
+sys.path.insert(0, os.path.join( os.path.dirname(os.path.abspath(__file__)), ".." ))
+
+from ChaFile import *
+import generate
+
+DEFAULT_SIZES = [ 1000, 10000, 100000 ]
+DEFAULT_CORPUS = os.path.join( os.path.dirname(os.path.abspath(__file__)), "corpus" )
+REGRESSION_THRESHOLD = 1.1 #slower than this ratio is reported as a regression
+
+def _newChaFile(path):
+	return ChaFile(path, verbose = False)
+
+def _count(cha):
+	for what in [ LINE_UTTERANCE, LINE_VERBS, LINE_NOUNS, LINE_ADJECTIVES ]:
+		for countType in [ COUNT_TYPE_TOKENS, COUNT_TYPE_TYPES ]:
+			cha.count(what, ADDRESSEE_CHILD_DIRECTED, countType)
+
+def _getLexicalDiversity(cha):
+	for metric in [ LEXICAL_DIVERSITY_TTR, LEXICAL_DIVERSITY_MAAS, LEXICAL_DIVERSITY_MATTR, LEXICAL_DIVERSITY_HDD, LEXICAL_DIVERSITY_MTLD ]:
+		cha.getLexicalDiversity(ADDRESSEE_CHILD_DIRECTED, metric)
+
+def _getTurnsBySpeaker(cha):
+	cha.getTurnsBySpeaker(ADDRESSEE_CHILD_DIRECTED)
+	cha.getTurnsBySpeaker(ADDRESSEE_ADULT)
+
+# name -> (setup, function). setup receives the path and its result is passed to function.
+# Every run gets a new ChaFile so results cached by a previous run are not used
+BENCHMARKS = {
+	"processLines" : ( lambda path: path, _newChaFile ),
+	"processMorToWords" : ( _newChaFile, lambda cha: cha.processMorToWords() ),
+	"populateVerbs" : ( _newChaFile, lambda cha: cha.populateVerbs() ),
+	"count" : ( _newChaFile, _count ),
+	"getLexicalDiversity" : ( _newChaFile, _getLexicalDiversity ),
+	"getTurnsBySpeaker" : ( _newChaFile, _getTurnsBySpeaker )
+}
+
+def measure(setup, function, path, repeat):
+	"""Runs function repeat times for timing and once more with tracemalloc for the peak memory.
+	Memory is measured apart since tracing allocations makes everything slower
+
+	Args:
+		setup (callable): Receives path. Not timed
+		function (callable): Receives the result of setup. Timed
+		path (str): CHA file
+		repeat (int): Number of timed runs
+
+	Returns:
+		dict: "times" (seconds of each run), "min", "median" and "peakMemory" (bytes allocated above what setup left)
+	"""
+	times = []
+	for _ in range(repeat):
+		argument = setup(path)
+		gc.collect()
+		start = time.perf_counter()
+		function(argument)
+		times.append( time.perf_counter() - start )
+		del argument
+
+	argument = setup(path)
+	gc.collect()
+	tracemalloc.start()
+	try:
+		tracemalloc.reset_peak()
+		baseline = tracemalloc.get_traced_memory()[0]
+		function(argument)
+		peak = tracemalloc.get_traced_memory()[1] - baseline
+	finally:
+		tracemalloc.stop()
+
+	return {
+		"times" : times,
+		"min" : min(times),
+		"median" : statistics.median(times),
+		"peakMemory" : peak
+	}
+
+def getVersion():
+	"""Describes the code being benchmarked
+
+	Returns:
+		dict: git commit (None if not a git repository), python, numpy and platform
+	"""
+	try:
+		commit = subprocess.run( [ "git", "rev-parse", "--short", "HEAD" ], capture_output = True, text = True, check = True,
+								 cwd = os.path.dirname(os.path.abspath(__file__)) ).stdout.strip()
+	except (OSError, subprocess.CalledProcessError):
+		commit = None
+
+	return {
+		"commit" : commit,
+		"parserVersion" : PARSER_VERSION,
+		"python" : platform.python_version(),
+		"numpy" : np.__version__,
+		"platform" : platform.platform()
+	}
+
+def run(paths, benchmarks = None, repeat = 3):
+	"""Runs benchmarks over every file
+
+	Args:
+		paths (list): CHA files
+		benchmarks (list, optional): Names from BENCHMARKS. Defaults to None (all of them).
+		repeat (int, optional): Timed runs of each benchmark. Defaults to 3.
+
+	Returns:
+		dict: "version", "date" and "results" (one record per file and benchmark)
+	"""
+	benchmarks = benchmarks if benchmarks else list(BENCHMARKS.keys())
+
+	results = []
+	for path in paths:
+		cha = _newChaFile(path)
+		info = {
+			"file" : os.path.basename(path),
+			"language" : cha.getLanguage(),
+			"lines" : len(cha.getLines())
+		}
+		del cha
+
+		for name in benchmarks:
+			setup, function = BENCHMARKS[name]
+			result = { "benchmark" : name, **info, **measure(setup, function, path, repeat) }
+			print( "{benchmark:20} {file:30} {median:9.4f}s {peakMemory:>14,} bytes".format(**result), flush = True )
+			results.append(result)
+
+	return {
+		"version" : getVersion(),
+		"date" : datetime.datetime.now().isoformat(timespec = "seconds"),
+		"results" : results
+	}
+
+def compare(previous, current, threshold = REGRESSION_THRESHOLD):
+	"""Prints the median time and peak memory of current relative to previous
+
+	Args:
+		previous (dict): Result of run
+		current (dict): Result of run
+		threshold (float, optional): Ratios above this are marked. Defaults to REGRESSION_THRESHOLD.
+
+	Returns:
+		list: (benchmark, file) of the regressions
+	"""
+	before = { (r["benchmark"], r["file"]) : r for r in previous["results"] }
+	regressions = []
+
+	print( "\n{} -> {}".format( previous["version"]["commit"], current["version"]["commit"] ) )
+	for r in current["results"]:
+		key = (r["benchmark"], r["file"])
+		if key not in before:
+			continue
+
+		timeRatio = r["median"] / before[key]["median"] if before[key]["median"] > 0 else float("inf")
+		memoryRatio = r["peakMemory"] / before[key]["peakMemory"] if before[key]["peakMemory"] > 0 else float("inf")
+		regression = timeRatio > threshold or memoryRatio > threshold
+		if regression:
+			regressions.append(key)
+
+		print( "{:20} {:30} time x{:.2f} memory x{:.2f}{}".format( *key, timeRatio, memoryRatio, "  <- regression" if regression else "" ) )
+
+	return regressions
+
+if __name__ == "__main__":
+	parser = argparse.ArgumentParser(description = "Times ChaFile over synthetic CHA files")
+	parser.add_argument("--corpus", default = DEFAULT_CORPUS, help = "Where synthetic files are generated (and reused)")
+	parser.add_argument("--sizes", type = int, nargs = "+", default = DEFAULT_SIZES, help = "Utterances of each file")
+	parser.add_argument("--languages", nargs = "+", default = generate.LANGUAGES, choices = generate.LANGUAGES)
+	parser.add_argument("--addressees", nargs = "+", default = generate.ADDRESSEE_MODES, choices = generate.ADDRESSEE_MODES)
+	parser.add_argument("--benchmarks", nargs = "+", default = None, choices = list(BENCHMARKS.keys()))
+	parser.add_argument("--repeat", type = int, default = 3, help = "Timed runs of each benchmark")
+	parser.add_argument("--output", default = None, help = "JSON file for the results")
+	parser.add_argument("--compare", default = None, help = "JSON results of a previous version")
+	args = parser.parse_args()
+
+	paths = generate.generateCorpus(args.corpus, args.sizes, args.languages, args.addressees)
+	results = run(paths, args.benchmarks, args.repeat)
+
+	if args.output:
+		with open(args.output, "w") as f:
+			json.dump(results, f, indent = 1)
+
+	if args.compare:
+		with open(args.compare) as f:
+			regressions = compare( json.load(f), results )
+		if len(regressions) > 0:
+			sys.exit(1)
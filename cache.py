@@ -0,0 +1,99 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Pickle based disk cache with a size cap. Least recently used entries are removed first.
+"""
+
+import os
+import pickle
+import tempfile
+
+class Cache():
+
+	EXTENSION = ".pickle"
+
+	def __init__(self, cachePath, maxSize = 1024**3):
+		"""
+			cachePath : directory where entries are stored. It is created if it doesn't exist
+			maxSize: size cap in bytes
+		"""
+		self.cachePath = cachePath
+		self.maxSize = maxSize
+
+		os.makedirs(self.cachePath, exist_ok = True)
+
+	def getPath(self, key):
+		return os.path.join(self.cachePath, key + Cache.EXTENSION)
+
+	def get(self, key):
+		"""
+			Returns the stored value or None if key is not cached (or the entry can't be read)
+		"""
+		path = self.getPath(key)
+
+		try:
+			with open(path, "rb") as f:
+				value = pickle.load(f)
+		except FileNotFoundError:
+			return None
+		except Exception:
+			# broken entry i.e. written by an incompatible version
+			self.delete(key)
+			return None
+
+		# modification time is used for knowing which entries were used last
+		try:
+			os.utime(path)
+		except OSError:
+			pass
+
+		return value
+
+	def set(self, key, value):
+		"""
+			Stores value. The file is written to a temporary file first so other processes never read half an entry
+		"""
+		fd, tmpPath = tempfile.mkstemp(dir = self.cachePath, suffix = ".tmp")
+		try:
+			with os.fdopen(fd, "wb") as f:
+				pickle.dump(value, f, protocol = pickle.HIGHEST_PROTOCOL)
+			os.replace(tmpPath, self.getPath(key))
+		except BaseException:
+			if os.path.exists(tmpPath):
+				os.remove(tmpPath)
+			raise
+
+		self.evict()
+
+	def delete(self, key):
+		try:
+			os.remove(self.getPath(key))
+		except OSError:
+			pass
+
+	def evict(self):
+		"""
+			Removes least recently used entries until the cache is smaller than maxSize
+		"""
+		entries = []
+		totalSize = 0
+
+		for name in os.listdir(self.cachePath):
+			if not name.endswith(Cache.EXTENSION):
+				continue
+			try:
+				stat = os.stat(os.path.join(self.cachePath, name))
+			except OSError:
+				continue
+			entries.append( (stat.st_mtime, stat.st_size, name) )
+			totalSize += stat.st_size
+
+		entries.sort()
+		for mtime, size, name in entries:
+			if totalSize <= self.maxSize:
+				break
+			try:
+				os.remove(os.path.join(self.cachePath, name))
+			except OSError:
+				pass
+			totalSize -= size
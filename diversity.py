@@ -0,0 +1,164 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Lexical diversity metrics over arrays of token ids using NumPy.
+Results are the same as the lexical_diversity package (lex_div) for the same tokens.
+"""
+
+import math
+
+import numpy as np
+
+def _asIds(tokens):
+	"""Internal use. Tokens as ids from 0 to the number of types - 1
+
+	Args:
+		tokens (array-like): Token ids (any integers)
+
+	Returns:
+		numpy.ndarray: Ids
+	"""
+	tokens = np.asarray(tokens)
+	if len(tokens) == 0:
+		return tokens.astype(np.int64)
+	return np.unique(tokens, return_inverse = True)[1].ravel()
+
+def ttr(tokens):
+	"""Type-token ratio
+
+	Args:
+		tokens (array-like): Token ids
+
+	Returns:
+		float: Types / tokens. 0 if there are no tokens
+	"""
+	ntokens = len(tokens)
+	if ntokens == 0:
+		return 0
+	return len(np.unique(tokens)) / ntokens
+
+def maas(tokens):
+	"""Maas TTR: (log(tokens) - log(types)) / log(tokens)^2
+
+	Args:
+		tokens (array-like): Token ids
+
+	Returns:
+		float: Maas index. 0 if there are less than two tokens
+	"""
+	ntokens = len(tokens)
+	if ntokens < 2:
+		return 0
+	ntypes = len(np.unique(tokens))
+	return (math.log10(ntokens) - math.log10(ntypes)) / math.pow(math.log10(ntokens), 2)
+
+def mattr(tokens, windowLength = 50):
+	"""Moving average TTR. The number of types of every window is computed at once:
+	a token adds one type to the windows that include it but not its previous occurrence
+
+	Args:
+		tokens (array-like): Token ids
+		windowLength (int, optional): Window length. Defaults to 50.
+
+	Returns:
+		float: Average TTR of the windows. TTR if there are not more tokens than windowLength
+	"""
+	ntokens = len(tokens)
+	if ntokens < windowLength + 1:
+		return ttr(tokens)
+
+	ids = _asIds(tokens)
+	positions = np.arange(ntokens)
+
+	# previous position of the same type, -1 for the first one
+	order = np.argsort(ids, kind = "stable")
+	previous = np.full(ntokens, -1, dtype = np.int64)
+	sameType = ids[order[1:]] == ids[order[:-1]]
+	previous[ order[1:][sameType] ] = order[:-1][sameType]
+
+	# token i adds a type to windows starting from first to last
+	nwindows = ntokens - windowLength + 1
+	first = np.maximum(previous + 1, positions - windowLength + 1)
+	last = np.minimum(positions, nwindows - 1)
+	valid = first <= last
+
+	changes = np.zeros(nwindows + 1, dtype = np.int64)
+	np.add.at(changes, first[valid], 1)
+	np.add.at(changes, last[valid] + 1, -1)
+	types = np.cumsum(changes[:-1])
+
+	# summed one by one, in order, as the reference implementation does
+	return sum( (types / float(windowLength)).tolist() ) / nwindows
+
+def hdd(tokens, sampleSize = 42):
+	"""HD-D (vocd-D like): sum over types of the probability of finding it at least once
+	in a random sample of sampleSize tokens, divided by sampleSize. Types with the same frequency share the computation
+
+	Args:
+		tokens (array-like): Token ids
+		sampleSize (int, optional): Sample size. Defaults to 42.
+
+	Returns:
+		float: HD-D. 0 if there are less tokens than sampleSize
+	"""
+	ntokens = len(tokens)
+	if ntokens < sampleSize:
+		return 0.0
+
+	frequencies = np.bincount( _asIds(tokens) )
+	frequencies, typesCount = np.unique(frequencies, return_counts = True)
+
+	# P(not found) = C(ntokens - f, sampleSize) / C(ntokens, sampleSize) = prod_i (1 - f / (ntokens - i))
+	fractions = np.minimum( frequencies[:, None] / (ntokens - np.arange(sampleSize))[None, :], 1.0 )
+	with np.errstate(divide = "ignore"):
+		logNotFound = np.log1p(-fractions).sum(axis = 1)
+	found = -np.expm1(logNotFound)
+
+	return float( np.sum( typesCount * found * (1 / sampleSize) ) )
+
+def _mtldFactors(ids, threshold, minLength):
+	"""Internal use. One pass of MTLD: a factor ends when TTR drops below threshold
+
+	Returns:
+		float: Tokens / factors
+	"""
+	# factor where each type was last seen, so nothing has to be cleared when a factor ends
+	seenIn = [-1] * (max(ids) + 1 if ids else 0)
+	factors = 0
+	factorLengths = 0
+	length = 0
+	types = 0
+	last = len(ids) - 1
+
+	for x, token in enumerate(ids):
+		if seenIn[token] != factors:
+			seenIn[token] = factors
+			types += 1
+		length += 1
+
+		if x == last:
+			factors += (1 - types / length) / (1 - threshold)
+			factorLengths += length
+		elif types / length < threshold and length >= minLength:
+			factors += 1
+			factorLengths += length
+			length = 0
+			types = 0
+
+	if factors == 0:
+		return 0
+	return factorLengths / factors
+
+def mtld(tokens, threshold = 0.72, minLength = 10):
+	"""Measure of textual lexical diversity (Jarvis & McCarthy). Average of a forward and a backward pass
+
+	Args:
+		tokens (array-like): Token ids
+		threshold (float, optional): TTR where a factor ends. Defaults to 0.72.
+		minLength (int, optional): Minimum tokens in a factor. Defaults to 10.
+
+	Returns:
+		float: MTLD
+	"""
+	ids = _asIds(tokens).tolist()
+	return ( _mtldFactors(ids, threshold, minLength) + _mtldFactors(ids[::-1], threshold, minLength) ) / 2
@@ -0,0 +1,248 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Exports utterances and MOR units to Parquet or Arrow files, i.e. for loading them with pandas.read_parquet().
+Tables are written in record batches of a bounded size so whole tables are never in memory. Needs pyarrow
+"""
+
+import os
+
+import numpy as np
+import pyarrow as pa
+import pyarrow.parquet as pq
+
+from ChaFile import *
+
+FORMAT_PARQUET = "parquet"
+FORMAT_ARROW = "arrow" #Arrow IPC file (also known as Feather v2)
+
+EXTENSIONS = { ".parquet" : FORMAT_PARQUET, ".arrow" : FORMAT_ARROW, ".feather" : FORMAT_ARROW }
+
+BATCH_SIZE = 64 * 1024 #rows of each record batch
+
+UTTERANCE_SCHEMA = pa.schema([
+	("file", pa.string()),
+	("line", pa.int32()), #LINE_NUMBER
+	("speaker", pa.string()),
+	("addressee", pa.string()),
+	("bulletStart", pa.int64()), #null if the line has no bullet
+	("bulletEnd", pa.int64()),
+	("utterance", pa.string())
+])
+
+MOR_UNIT_SCHEMA = pa.schema([
+	("file", pa.string()),
+	("line", pa.int32()), #LINE_NUMBER
+	("position", pa.int32()), #index in TIER_MOR
+	("category", pa.string()),
+	("lexeme", pa.string()),
+	("extra", pa.string()),
+	("verb", pa.bool_()),
+	("noun", pa.bool_()),
+	("adjective", pa.bool_())
+])
+
+def iterUtteranceBatches(cha, batchSize = BATCH_SIZE, fileName = None):
+	"""Utterances of a file as record batches with UTTERANCE_SCHEMA
+
+	Args:
+		cha (ChaFile): Parsed file
+		batchSize (int, optional): Maximum rows of each batch. Defaults to BATCH_SIZE.
+		fileName (str, optional): Value of the file column. Defaults to None (the file name without extension).
+
+	Yields:
+		pyarrow.RecordBatch: Batch
+	"""
+	fileName = cha.filename if fileName is None else fileName
+	lines = cha.getLines()
+
+	for first in range(0, len(lines), batchSize):
+		batch = lines[first : first + batchSize]
+		bullets = [ l.get(LINE_BULLET) for l in batch ]
+
+		yield pa.RecordBatch.from_arrays([
+			pa.array( [fileName] * len(batch), pa.string() ),
+			pa.array( [ l.number for l in batch ], pa.int32() ),
+			pa.array( [ l.speaker for l in batch ], pa.string() ),
+			pa.array( [ l.addressee for l in batch ], pa.string() ),
+			pa.array( [ b[0] if b else None for b in bullets ], pa.int64() ),
+			pa.array( [ b[1] if b else None for b in bullets ], pa.int64() ),
+			pa.array( [ l.utterance for l in batch ], pa.string() )
+		], schema = UTTERANCE_SCHEMA)
+
+def iterMorUnitBatches(cha, batchSize = BATCH_SIZE, fileName = None, countCopAux = False, processLightVerbs = True):
+	"""MOR units of a file as record batches with MOR_UNIT_SCHEMA. Nothing is yielded if the file has no MOR tier
+
+	Args:
+		cha (ChaFile): Parsed file
+		batchSize (int, optional): Maximum rows of each batch. Defaults to BATCH_SIZE.
+		fileName (str, optional): Value of the file column. Defaults to None (the file name without extension).
+		countCopAux (bool, optional): Same as ChaFile.populateVerbs, for the verb and noun columns. Defaults to False.
+		processLightVerbs (bool, optional): Same as ChaFile.populateVerbs. Defaults to True.
+
+	Yields:
+		pyarrow.RecordBatch: Batch
+	"""
+	if not cha.morFound:
+		return
+
+	fileName = cha.filename if fileName is None else fileName
+
+	cha.populateVerbs(countCopAux=countCopAux, processLightVerbs=processLightVerbs)
+	cha.populateNouns(countCopAux=countCopAux, processLightVerbs=processLightVerbs)
+	cha.populateAdjectives()
+
+	storage = cha.morStorage
+	lines = []
+	units = 0
+	for l in cha.getLines():
+		mor = l[TIER_MOR]
+		if len(mor) == 0:
+			continue
+
+		lines.append(l)
+		units += len(mor)
+		if units >= batchSize:
+			yield from _getMorUnitBatches(lines, storage, fileName, batchSize)
+			lines = []
+			units = 0
+
+	if len(lines) > 0:
+		yield from _getMorUnitBatches(lines, storage, fileName, batchSize)
+
+def _getMorUnitBatches(lines, storage, fileName, batchSize):
+	"""Internal use. MOR units of some lines, sliced in batches of batchSize rows at most
+
+	Yields:
+		pyarrow.RecordBatch: Batch
+	"""
+	tiers = [ l[TIER_MOR] for l in lines ]
+	starts = np.array( [ mor.start for mor in tiers ], dtype=np.int64 )
+	lengths = np.array( [ len(mor) for mor in tiers ], dtype=np.int64 )
+	offsets = np.concatenate( ( [0], np.cumsum(lengths)[:-1] ) ) #first row of each line
+
+	# row -> index in the storage and in its line
+	rows = np.arange(lengths.sum())
+	positions = rows - np.repeat(offsets, lengths)
+	indexes = positions + np.repeat(starts, lengths)
+
+	flags = []
+	for what in [ LINE_VERBS, LINE_NOUNS, LINE_ADJECTIVES ]:
+		isWhat = np.zeros(len(rows), dtype=bool)
+		isWhat[ [ offset + i for offset, l in zip(offsets.tolist(), lines) for i in l[what] ] ] = True
+		flags.append(isWhat)
+
+	symbols = pa.array(MOR_SYMBOLS.strings, pa.string())
+	def getStrings(ids):
+		return symbols.take( pa.array( np.frombuffer(ids, dtype=np.int32)[indexes] ) )
+
+	batch = pa.RecordBatch.from_arrays([
+		pa.array( [fileName] * len(rows), pa.string() ),
+		pa.array( np.repeat( [ l.number for l in lines ], lengths ).astype(np.int32) ),
+		pa.array( positions.astype(np.int32) ),
+		getStrings(storage.categorias),
+		getStrings(storage.lexemas),
+		getStrings(storage.extras),
+		*[ pa.array(f) for f in flags ]
+	], schema = MOR_UNIT_SCHEMA)
+
+	for first in range(0, batch.num_rows, batchSize):
+		yield batch.slice(first, batchSize)
+
+def writePart(cha, utterancesPath = None, morUnitsPath = None, batchSize = BATCH_SIZE, fileName = None, countCopAux = False, processLightVerbs = True):
+	"""Writes the tables of one file to Arrow files, batch by batch. Used by the worker processes
+	of ChaCorpus.export so batches don't have to be sent back (see appendPart)
+
+	Args:
+		cha (ChaFile): Parsed file
+		utterancesPath (str, optional): Output for the utterances. Defaults to None (not written).
+		morUnitsPath (str, optional): Output for the MOR units. Defaults to None (not written).
+		batchSize, fileName, countCopAux, processLightVerbs: Same as iterMorUnitBatches
+	"""
+	if utterancesPath:
+		with TableWriter(utterancesPath, UTTERANCE_SCHEMA, FORMAT_ARROW) as writer:
+			writer.write( iterUtteranceBatches(cha, batchSize, fileName) )
+	if morUnitsPath:
+		with TableWriter(morUnitsPath, MOR_UNIT_SCHEMA, FORMAT_ARROW) as writer:
+			writer.write( iterMorUnitBatches(cha, batchSize, fileName, countCopAux, processLightVerbs) )
+
+def appendPart(path, writer):
+	"""Copies the batches of a file written by writePart to writer, one at a time. The file is memory mapped
+
+	Args:
+		path (str): Arrow file
+		writer (TableWriter): Output
+	"""
+	with pa.memory_map(path) as source:
+		reader = pa.ipc.open_file(source)
+		writer.write( reader.get_batch(i) for i in range(reader.num_record_batches) )
+
+class TableWriter:
+	"""Writes record batches to a Parquet or Arrow file as they come. The format is taken from the extension
+	"""
+
+	def __init__(self, path, schema, format = None):
+		"""Constructor
+
+		Args:
+			path (str): Output file
+			schema (pyarrow.Schema): UTTERANCE_SCHEMA or MOR_UNIT_SCHEMA
+			format (str, optional): FORMAT_PARQUET or FORMAT_ARROW. Defaults to None (from the extension, Parquet if unknown).
+		"""
+		if format is None:
+			format = EXTENSIONS.get( os.path.splitext(path)[1].lower(), FORMAT_PARQUET )
+
+		if format == FORMAT_PARQUET:
+			self.writer = pq.ParquetWriter(path, schema)
+		elif format == FORMAT_ARROW:
+			self.writer = pa.ipc.new_file(path, schema)
+		else:
+			raise Exception(f"unknown format '{format}'")
+
+	def write(self, batches):
+		for batch in batches:
+			self.writer.write_batch(batch)
+
+	def close(self):
+		self.writer.close()
+
+	def __enter__(self):
+		return self
+
+	def __exit__(self, *args):
+		self.close()
+
+def exportTables(chaFiles, utterancesPath = None, morUnitsPath = None, format = None, batchSize = BATCH_SIZE,
+				 countCopAux = False, processLightVerbs = True, **options):
+	"""Writes the utterances and MOR units of one or many files. Files given as paths are parsed
+	one at a time so only one of them is in memory
+
+	Args:
+		chaFiles (ChaFile, str or list): ChaFile objects or paths to CHA files
+		utterancesPath (str, optional): Output for the utterances table. Defaults to None (not written).
+		morUnitsPath (str, optional): Output for the MOR units table. Defaults to None (not written).
+		format (str, optional): Same as TableWriter. Defaults to None.
+		batchSize (int, optional): Maximum rows of each record batch. Defaults to BATCH_SIZE.
+		countCopAux (bool, optional): Same as iterMorUnitBatches. Defaults to False.
+		processLightVerbs (bool, optional): Same as iterMorUnitBatches. Defaults to True.
+		**options: ChaFile constructor options for the paths
+	"""
+	if isinstance(chaFiles, (ChaFile, str)):
+		chaFiles = [ chaFiles ]
+
+	utterances = TableWriter(utterancesPath, UTTERANCE_SCHEMA, format) if utterancesPath else None
+	morUnits = TableWriter(morUnitsPath, MOR_UNIT_SCHEMA, format) if morUnitsPath else None
+
+	try:
+		for cha in chaFiles:
+			if isinstance(cha, str):
+				cha = ChaFile(cha, verbose = False, **options)
+
+			if utterances:
+				utterances.write( iterUtteranceBatches(cha, batchSize) )
+			if morUnits:
+				morUnits.write( iterMorUnitBatches(cha, batchSize, None, countCopAux, processLightVerbs) )
+	finally:
+		for writer in [ utterances, morUnits ]:
+			if writer:
+				writer.close()
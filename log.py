@@ -4,26 +4,46 @@
 Created on Mon Apr 29 12:13:50 2019
 
 @author: leandro
+
+Messages for the log file are put in a queue and written by a thread in batches. Each batch is written
+with a single append so processes sharing the log file (i.e. a process pool) don't mix their lines
 """
 
 import os
+import queue
 import datetime
+import threading
+from multiprocessing import util
+
+MAX_REPEATED_WARNINGS = 5 #the same warning is shown this many times at most
+STOP_TIMEOUT = 5 #seconds to wait for the writer thread to write what is left when a Log is finished
+
+_STOP = None #put in the queue to stop the writer thread
 
 class Log():
 
 	logPath = None
 
-	def __init__(self, logPath = None, settings = None, printToTerminal = True):
+	def __init__(self, logPath = None, settings = None, printToTerminal = True, maxRepeatedWarnings = MAX_REPEATED_WARNINGS):
 		"""
 			logPath : path to log file
 			settings: dict object with variables and values that represent current run
+			printToTerminal: messages are printed too. Each Log has its own
+			maxRepeatedWarnings: times the same warning is shown before ignoring it
 		"""
 		self.logPath = logPath
 		self.printToTerminal = printToTerminal
+		self.maxRepeatedWarnings = maxRepeatedWarnings
+		self.warnings = {} #warning key -> times it was sent
+
+		self.queue = None
+		self.writer = None
+		self.pid = None #process where the writer thread runs
 
 		if self.logPath:
-			if not os.path.exists(os.path.dirname(logPath)):
-				os.makedirs(os.path.dirname(logPath))
+			directory = os.path.dirname(logPath)
+			if directory and not os.path.exists(directory):
+				os.makedirs(directory, exist_ok = True)
 
 			with open(self.logPath, "w+") as f:
 				f.write( "[{}] Created\n".format(datetime.datetime.now()) )
@@ -36,17 +56,104 @@ class Log():
 		self.printToTerminal = v
 
 	def log(self, what):
+		# printed right away so it keeps its order with the rest of the output
 		if self.printToTerminal:
 			print(what)
 
 		if self.logPath:
-			with open(self.logPath, "a+") as f:
-				f.write(what)
-				f.write("\n")
+			self._getQueue().put(what + "\n")
+
+	def warning(self, what, key = None):
+		"""
+			Same as log but only the first maxRepeatedWarnings warnings with the same key are logged
+			key: warnings with the same key count as the same one i.e. when what has a line number. Defaults to what
+		"""
+		if key is None:
+			key = what
+
+		times = self.warnings.get(key, 0) + 1
+		self.warnings[key] = times
+
+		if times < self.maxRepeatedWarnings:
+			self.log(what)
+		elif times == self.maxRepeatedWarnings:
+			self.log(what + " (repeated {} times, the next ones won't be logged)".format(times))
 
 	def debug(self, what):
 		print("[DEBUG] " + what)
 
+	def flush(self):
+		"""
+			Waits until every message was written to the log file (or dropped if it can't be written)
+		"""
+		if self.queue is not None and self.pid == os.getpid() and self.writer.is_alive():
+			self.queue.join()
+
 	def end(self):
-		with open(self.logPath, "a+") as f:
-			f.write( "\n[{}] Finished\n".format(datetime.datetime.now()) )
+		if self.logPath:
+			self._getQueue().put( "\n[{}] Finished\n".format(datetime.datetime.now()) )
+			self.flush()
+
+	def _getQueue(self):
+		"""
+			Queue of the writer thread. It is started with the first message of each process
+			since threads are not copied to forked processes
+		"""
+		if self.pid != os.getpid():
+			self.pid = os.getpid()
+			self.queue = queue.Queue()
+			# the thread and the finalizer don't reference self so the Log can be collected (and its thread stopped)
+			self.writer = threading.Thread(target = Log._write, args = (self.logPath, self.queue), daemon = True)
+			self.writer.start()
+
+			# also run by pool workers which exit without calling atexit functions
+			util.Finalize(self, Log._stop, args = (self.pid, self.queue, self.writer), exitpriority = 10)
+
+		return self.queue
+
+	@staticmethod
+	def _stop(pid, messages, writer):
+		"""
+			Stops the writer thread once the messages before it are written. Run when the Log is collected or at exit
+		"""
+		if pid != os.getpid():
+			return #copy of the finalizer of the parent process, its thread is not running here
+
+		messages.put(_STOP)
+		writer.join(STOP_TIMEOUT)
+
+	@staticmethod
+	def _write(logPath, messages):
+		"""
+			Writer thread. Takes every message waiting in the queue and appends them at once.
+			Messages are marked as done even if they can't be written so flush() never waits forever
+		"""
+		try:
+			fd = os.open(logPath, os.O_WRONLY | os.O_APPEND | os.O_CREAT)
+		except OSError:
+			fd = None #i.e. no permission. Messages are dropped
+
+		try:
+			stop = False
+			while not stop:
+				batch = [ messages.get() ]
+				while True:
+					try:
+						batch.append( messages.get_nowait() )
+					except queue.Empty:
+						break
+
+				stop = _STOP in batch
+				try:
+					if fd is not None:
+						data = memoryview( "".join( m for m in batch if m is not _STOP ).encode("utf-8") )
+						while len(data) > 0:
+							data = data[ os.write(fd, data): ]
+				except Exception:
+					pass #i.e. disk full. Messages are lost
+				finally:
+					for _ in batch:
+						messages.task_done()
+		finally:
+			if fd is not None:
+				os.close(fd)
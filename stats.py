@@ -0,0 +1,121 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Wall time and calls of each parsing stage plus counters of things worth knowing about (malformed MOR units and so on).
+Stages are timed by wrapping functions only when instrumentation is on, so nothing is paid when it's off
+"""
+
+import time
+
+class Stats():
+
+	def __init__(self):
+		self.times = {} #stage -> seconds
+		self.calls = {} #stage -> number of calls
+		self.counters = {} #name -> count
+
+	def wrap(self, stage, function):
+		"""Same function but its time and calls are added to stage. Times are inclusive:
+		a stage called from another one is counted in both
+
+		Args:
+			stage (str): Stage name
+			function (callable): Function to time
+
+		Returns:
+			callable: Timed function
+		"""
+		times = self.times
+		calls = self.calls
+		perfCounter = time.perf_counter
+
+		def timed(*args, **kwargs):
+			start = perfCounter()
+			try:
+				return function(*args, **kwargs)
+			finally:
+				times[stage] = times.get(stage, 0.0) + perfCounter() - start
+				calls[stage] = calls.get(stage, 0) + 1
+
+		return timed
+
+	def wrapGenerator(self, stage, function):
+		"""Same as wrap for generator functions. Only the time spent producing each item is counted
+		(not the time the consumer spends between items) and calls are the number of items
+
+		Args:
+			stage (str): Stage name
+			function (callable): Generator function to time
+
+		Returns:
+			callable: Timed generator function
+		"""
+		times = self.times
+		calls = self.calls
+		perfCounter = time.perf_counter
+
+		def timed(*args, **kwargs):
+			iterator = function(*args, **kwargs)
+			while True:
+				start = perfCounter()
+				try:
+					item = next(iterator)
+				except StopIteration:
+					times[stage] = times.get(stage, 0.0) + perfCounter() - start
+					return
+				times[stage] = times.get(stage, 0.0) + perfCounter() - start
+				calls[stage] = calls.get(stage, 0) + 1
+				yield item
+
+		return timed
+
+	def count(self, name, n = 1):
+		"""Adds n to a counter
+		"""
+		self.counters[name] = self.counters.get(name, 0) + n
+
+	def merge(self, other):
+		"""Adds the times, calls and counters of other to these ones
+
+		Args:
+			other (Stats): i.e. stats of another file
+
+		Returns:
+			Stats: self
+		"""
+		for mine, theirs in [ (self.times, other.times), (self.calls, other.calls), (self.counters, other.counters) ]:
+			for k, v in theirs.items():
+				mine[k] = mine.get(k, 0) + v
+		return self
+
+	def copy(self):
+		return Stats().merge(self)
+
+	@staticmethod
+	def concatenate(stats):
+		"""Totals of many Stats, i.e. one for each file of a corpus
+
+		Args:
+			stats (list): Stats
+
+		Returns:
+			Stats: New Stats with the totals
+		"""
+		total = Stats()
+		for s in stats:
+			total.merge(s)
+		return total
+
+	def toDict(self):
+		"""
+			Returns { "times" : {...}, "calls" : {...}, "counters" : {...} }
+		"""
+		return { "times" : dict(self.times), "calls" : dict(self.calls), "counters" : dict(self.counters) }
+
+	def __str__(self):
+		lines = []
+		for stage in sorted(self.times, key = self.times.get, reverse = True):
+			lines.append( "{:20} {:10.4f}s {:>12,} calls".format(stage, self.times[stage], self.calls.get(stage, 0)) )
+		for name in sorted(self.counters):
+			lines.append( "{:20} {:>12,}".format(name, self.counters[name]) )
+		return "\n".join(lines)
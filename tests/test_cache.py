@@ -0,0 +1,22 @@
+import os
+
+from ChaFile import *
+
+def writeChaFile(path):
+	path.write_text("@UTF8\n@Begin\n@Languages:\tspa\n*MOT:\tvamos a comer .\n%mor:\tv|i&PRES-1P prep|a inf|come .\n@End\n", encoding="utf-8")
+	return str(path)
+
+def test_languageIsPartOfTheKey(tmp_path):
+	path = writeChaFile(tmp_path / "a.cha")
+	cacheDir = str(tmp_path / "cache")
+
+	spanish = ChaFile(path, verbose=False, cacheDir=cacheDir)
+	english = ChaFile(path, verbose=False, cacheDir=cacheDir, language=LANGUAGE_ENGLISH)
+
+	assert spanish._getCacheKey()[0] != english._getCacheKey()[0]
+	assert spanish.getLanguage() == LANGUAGE_SPANISH
+	assert english.getLanguage() == LANGUAGE_ENGLISH
+
+	# loaded from the cache, each with its own language
+	assert ChaFile(path, verbose=False, cacheDir=cacheDir).count(LINE_VERBS) == spanish.count(LINE_VERBS) == 1
+	assert ChaFile(path, verbose=False, cacheDir=cacheDir, language=LANGUAGE_ENGLISH).getLanguage() == LANGUAGE_ENGLISH
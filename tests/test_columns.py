@@ -0,0 +1,42 @@
+import pickle
+
+import numpy as np
+import pytest
+
+from ChaCorpus import *
+
+def writeChaFile(path, utterances, addressee):
+	lines = [ "@UTF8", "@Begin", "@Languages:\tspa" ]
+	for i in range(utterances):
+		lines += [ f"*MOT:\tmirá el perro {i} .", "%mor:\tv|mira-2S&IMP det:art|el-m n|perro-m .", "%xds:\t" + addressee ]
+	lines += [ "*CHI:\tmamá .", "%mor:\tn|mamá .", "%xds:\tA" ]
+	path.write_text( "\n".join(lines + [ "@End" ]) + "\n", encoding="utf-8" )
+	return str(path)
+
+def test_columnsCanBePickled(tmp_path):
+	cha = ChaFile( writeChaFile(tmp_path / "a.cha", 5, "T"), verbose=False )
+	columns = cha.getColumns()
+
+	copy = pickle.loads( pickle.dumps(columns) )
+	for name in [ COLUMN_WORDS, COLUMN_MOR_UNITS, COLUMN_EMPTY ]:
+		assert np.array_equal( copy[name], cha.getColumns()[name] )
+
+@pytest.mark.parametrize("processes", [ 1, 2 ])
+def test_corpusColumns(tmp_path, processes):
+	paths = [ writeChaFile(tmp_path / f"{i}.cha", 3 + i, [ "T", "C" ][i % 2]) for i in range(3) ]
+
+	columns = ChaCorpus(paths, processes = processes).getColumns(LINE_VERBS, LINE_NOUNS)
+
+	files = []
+	for p in paths:
+		cha = ChaFile(p, verbose=False)
+		cha.populateVerbs()
+		cha.populateNouns()
+		files.append( cha.getColumns(LINE_VERBS, LINE_NOUNS) )
+	expected = ChaColumns.concatenate(files)
+
+	assert len(columns) == len(expected) == 3 + 4 + 5 + 3
+	for name in [ LINE_VERBS, LINE_NOUNS, COLUMN_WORDS, COLUMN_EMPTY ]:
+		assert columns.byAddressee(name) == expected.byAddressee(name)
+		assert columns.bySpeaker(name) == expected.bySpeaker(name)
+	assert columns.byFile(LINE_VERBS) == { p : 3 + i for i, p in enumerate(paths) }
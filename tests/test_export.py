@@ -0,0 +1,36 @@
+import os
+import glob
+
+import pytest
+
+pa = pytest.importorskip("pyarrow")
+pq = pytest.importorskip("pyarrow.parquet")
+
+from ChaCorpus import *
+import export
+
+def writeChaFile(path, utterances):
+	lines = [ "@UTF8", "@Begin", "@Languages:\tspa" ]
+	for i in range(utterances):
+		lines += [ f"*MOT:\tmirá el perro {i} . \x15{i * 1000}_{i * 1000 + 500}\x15", "%mor:\tv|mira-2S&IMP det:art|el-m n|perro-m .", "%xds:\tT" ]
+	path.write_text( "\n".join(lines + [ "@End" ]) + "\n", encoding="utf-8" )
+	return str(path)
+
+@pytest.mark.parametrize("processes", [ 1, 2 ])
+def test_corpusExportMatchesFiles(tmp_path, processes):
+	paths = [ writeChaFile(tmp_path / f"{i}.cha", 50 + i * 10) for i in range(3) ]
+
+	corpus = ChaCorpus(paths, processes = processes)
+	corpus.export( str(tmp_path / "u.parquet"), str(tmp_path / "m.arrow"), batchSize = 16 )
+
+	utterances = pq.read_table(tmp_path / "u.parquet")
+	morUnits = pa.ipc.open_file( str(tmp_path / "m.arrow") ).read_all()
+
+	assert utterances.column("file").to_pylist() == [ p for p in paths for _ in range( len(ChaFile(p, verbose=False).getLines()) ) ]
+	assert morUnits.num_rows == 3 * utterances.num_rows
+	assert all( b.num_rows <= 16 for b in morUnits.to_batches() )
+	assert morUnits.column("verb").to_pylist()[:3] == [ True, False, False ]
+	assert morUnits.column("noun").to_pylist()[:3] == [ False, False, True ]
+
+	# no temporary parts left
+	assert sorted( os.listdir(tmp_path) ) == sorted( [ "0.cha", "1.cha", "2.cha", "u.parquet", "m.arrow" ] )
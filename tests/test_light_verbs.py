@@ -0,0 +1,29 @@
+import pytest
+
+from ChaFile import *
+
+def writeChaFile(path, mor, language = "eng"):
+	path.write_text("@UTF8\n@Begin\n@Languages:\t" + language + "\n*MOT:\tutterance .\n%mor:\t" + mor + "\n@End\n", encoding="utf-8")
+	return str(path)
+
+# (language, MOR tier, verbs, light verbs found) as given by the code before the rule engine (getVerbsInLine with _checkCriteria)
+CASES = [
+	# "going to eat and going to sleep": only the first "going to V" is a light verb,
+	# the second one is matched by "part|go V" with "to" as the verb and "sleep" is counted too
+	( "eng", "part|go-PRESP inf|to v|eat coord|and part|go-PRESP inf|to v|sleep .", [2, 5, 6], True ),
+	( "eng", "v|have inf|to v|eat coord|and v|have inf|to v|sleep .", [2, 6], True ),
+	# a unit that breaks a match is not checked against the first step again
+	( "eng", "mod|do mod|do v|go .", [2], False ),
+	( "spa", "cop|esta-3S v|esta-1S ger|come-GER .", [1, 2], False ),
+	( "spa", "n|perro det|el v|debe v|debe inf|come .", [2, 3, 4], False ),
+	( "spa", "v|i v|i prep|a inf|come .", [0, 1, 3], False ),
+]
+
+@pytest.mark.parametrize("language, mor, verbs, lightVerbs", CASES)
+def test_sameVerbsAsBefore(tmp_path, language, mor, verbs, lightVerbs):
+	cha = ChaFile( writeChaFile(tmp_path / "a.cha", mor, language), verbose=False )
+	cha.populateVerbs()
+	line = cha.getLines()[0]
+
+	assert sorted(line[LINE_VERBS]) == verbs
+	assert (LINE_LIGHT_VERBS in line) == lightVerbs
@@ -0,0 +1,45 @@
+import os
+import gc
+import sys
+import weakref
+import subprocess
+
+from log import Log
+
+ROOT = os.path.join( os.path.dirname(os.path.abspath(__file__)), ".." )
+
+def test_messagesAreWritten(tmp_path):
+	path = str(tmp_path / "a.log")
+	log = Log(path, printToTerminal = False)
+	log.log("first")
+	log.warning("second")
+	log.flush()
+
+	with open(path) as f:
+		assert f.read().endswith("first\nsecond\n")
+
+def test_unwritableLogDoesNotHang(tmp_path):
+	path = str(tmp_path / "a.log")
+	script = ( "import os, sys; sys.path.insert(0, {!r})\n"
+			   "from log import Log\n"
+			   "log = Log({!r}, printToTerminal = False)\n"
+			   "os.remove({!r}); os.mkdir({!r})\n" #the writer can't open a directory
+			   "log.log('lost')\n"
+			   "log.flush()\n" ).format(ROOT, path, path, path)
+
+	# the process must finish even though the message can't be written (exit runs the finalizer too)
+	subprocess.run( [ sys.executable, "-c", script ], check = True, timeout = 30 )
+
+def test_logIsCollected(tmp_path):
+	log = Log( str(tmp_path / "a.log"), printToTerminal = False )
+	log.log("message")
+	log.flush()
+	writer = log.writer
+	reference = weakref.ref(log)
+
+	del log
+	gc.collect()
+
+	assert reference() is None
+	writer.join(5)
+	assert not writer.is_alive()
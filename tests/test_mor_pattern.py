@@ -0,0 +1,29 @@
+from ChaFile import *
+
+def writeChaFile(path, mor):
+	path.write_text("@UTF8\n@Begin\n@Languages:\teng\n*MOT:\tlook the dog .\n%mor:\t" + mor + "\n@End\n", encoding="utf-8")
+	return str(path)
+
+def test_unknownCriteriaAreNotAddedToSymbols(tmp_path):
+	cha = ChaFile( writeChaFile(tmp_path / "a.cha", "v|look det|the n|dog ."), verbose=False )
+	line = cha.getLines()[0]
+	size = len(MOR_SYMBOLS)
+
+	criteria = [ ["det"], ["zzunknowncategory"] ]
+	assert cha.findLinesByMorCriteria(criteria) == []
+	assert not cha.applyMorCriteriaInLine(line, criteria)
+	assert cha.applyMorCriteriaInLine(line, [ ["det|zzunknownlexeme"] ], MOR_UNIT_CATEGORIA_LEXEMA, allMatches=True) == []
+	assert len(MOR_SYMBOLS) == size
+
+	# an unknown option of a step doesn't stop the known ones from matching
+	assert len(cha.findLinesByMorCriteria( [ ["det"], ["zzunknowncategory", "n"] ] )) == 1
+	assert len(MOR_SYMBOLS) == size
+
+def test_cachedCriteriaMatchSymbolsParsedLater(tmp_path):
+	cha = ChaFile( writeChaFile(tmp_path / "a.cha", "v|look det|the n|dog ."), verbose=False )
+	criteria = [ ["zzlatercategory"] ]
+	assert cha.findLinesByMorCriteria(criteria) == []
+
+	later = ChaFile( writeChaFile(tmp_path / "b.cha", "zzlatercategory|dog ."), verbose=False )
+	later.criteriaCache = cha.criteriaCache
+	assert len(later.findLinesByMorCriteria(criteria)) == 1
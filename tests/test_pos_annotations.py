@@ -0,0 +1,41 @@
+from ChaFile import *
+
+def writeChaFile(path):
+	path.write_text("@UTF8\n@Begin\n@Languages:\teng\n"
+		"*MOT:\tI am going to run .\n%mor:\tpro:sub|I aux|be&1S part|go-PRESP inf|to v|run .\n"
+		"*MOT:\tthe dog is nice .\n%mor:\tdet|the n|dog cop|be&3S adj|nice .\n@End\n", encoding="utf-8")
+	return str(path)
+
+def getVerbs(cha):
+	return [ ( list(l[LINE_VERBS]), LINE_LIGHT_VERBS in l ) for l in cha.getLines() ]
+
+def test_populateNounsKeepsVerbs(tmp_path):
+	path = writeChaFile(tmp_path / "a.cha")
+
+	for options in [ (True, True), (False, False), (True, False) ]:
+		cha = ChaFile(path, verbose=False)
+		cha.populateVerbs(*options)
+		verbs = getVerbs(cha)
+
+		cha.populateNouns()
+		assert getVerbs(cha) == verbs
+		cha.getNounsInLine( cha.getLines()[0] )
+		assert getVerbs(cha) == verbs
+
+		expected = ChaFile(path, verbose=False)
+		expected.populateNouns()
+		assert [ l[LINE_NOUNS] for l in cha.getLines() ] == [ l[LINE_NOUNS] for l in expected.getLines() ]
+
+def test_nounsFollowTheirOwnOptions(tmp_path):
+	path = writeChaFile(tmp_path / "a.cha")
+	cha = ChaFile(path, verbose=False)
+	cha.populateVerbs()
+	defaults = getVerbs(cha)
+
+	for options in [ (True, True), (False, False) ]:
+		expected = ChaFile(path, verbose=False)
+		expected.populateNouns(*options)
+		cha.populateNouns(*options)
+
+		assert [ l[LINE_NOUNS] for l in cha.getLines() ] == [ l[LINE_NOUNS] for l in expected.getLines() ]
+		assert getVerbs(cha) == defaults
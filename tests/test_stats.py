@@ -0,0 +1,38 @@
+from ChaFile import *
+from log import MAX_REPEATED_WARNINGS
+
+def writeChaFile(path, mor):
+	path.write_text("@UTF8\n@Begin\n@Languages:\teng\n*MOT:\tlook the dog .\n%mor:\t" + mor + "\n@End\n", encoding="utf-8")
+	return str(path)
+
+def test_malformedMorUnitsAreCounted(tmp_path):
+	path = writeChaFile(tmp_path / "bad.cha", "v|look det|the @@bad n@x|dog garbage .")
+	cha = ChaFile(path, verbose=False, instrument=True)
+
+	assert cha.stats().counters[STATS_MALFORMED_MOR_UNITS] == 3
+	assert len(cha.getLines()[0][TIER_MOR]) == 2
+
+def test_everyMalformedMorUnitIsCounted(tmp_path):
+	path = tmp_path / "bad.cha"
+	path.write_text("@UTF8\n@Begin\n@Languages:\teng\n" + "*MOT:\tlook look .\n%mor:\tgarbage v|look garbage .\n" * 3 + "@End\n", encoding="utf-8")
+
+	assert ChaFile(str(path), verbose=False).stats().counters[STATS_MALFORMED_MOR_UNITS] == 6
+
+	cha = ChaFile(str(path), verbose=False, stream=True)
+	for line in cha.iterLines():
+		pass
+	assert cha.stats().counters[STATS_MALFORMED_MOR_UNITS] == 6
+
+def test_punctuationIsNotMalformed(tmp_path):
+	path = writeChaFile(tmp_path / "good.cha", "v|look det|the n|dog +... ? ! .")
+	cha = ChaFile(path, verbose=False)
+
+	assert cha.stats().counters[STATS_MALFORMED_MOR_UNITS] == 0
+
+def test_malformedWarningsAreLimitedByUnit(tmp_path, capsys):
+	mor = " ".join( [ f"bad{i}" for i in range(MAX_REPEATED_WARNINGS + 3) ] * 2 ) + " ."
+	ChaFile( writeChaFile(tmp_path / "bad.cha", mor), verbose=True )
+
+	out = capsys.readouterr().out
+	for i in range(MAX_REPEATED_WARNINGS + 3):
+		assert f'"bad{i}"' in out
@@ -0,0 +1,53 @@
+import os
+import sys
+import gc
+import tracemalloc
+
+from ChaFile import *
+
+sys.path.insert(0, os.path.join( os.path.dirname(os.path.abspath(__file__)), "..", "benchmarks" ))
+import generate
+
+def getRetainedMemory(path):
+	"""Bytes still allocated after streaming every line of path and dropping them
+	"""
+	gc.collect()
+	tracemalloc.start()
+	try:
+		cha = ChaFile(path, verbose=False, stream=True)
+		lines = 0
+		for line in cha.iterLines():
+			lines += TIER_MOR in line
+		gc.collect()
+		return tracemalloc.get_traced_memory()[0], lines
+	finally:
+		tracemalloc.stop()
+
+def test_streamingMemoryStaysFlat(tmp_path):
+	small = str(tmp_path / "small.cha")
+	large = str(tmp_path / "large.cha")
+	generate.writeChaFile(small, generate.LANGUAGE_SPANISH, 2000)
+	generate.writeChaFile(large, generate.LANGUAGE_SPANISH, 16000)
+
+	getRetainedMemory(small) # MOR_SYMBOLS is shared by every file so it's filled first
+	retainedSmall, linesSmall = getRetainedMemory(small)
+	retainedLarge, linesLarge = getRetainedMemory(large)
+
+	assert linesLarge > 7 * linesSmall
+	assert retainedLarge < 128 * 1024
+	assert retainedLarge < retainedSmall + 64 * 1024
+
+def test_iterLinesOfParsedFile(tmp_path):
+	path = str(tmp_path / "a.cha")
+	generate.writeChaFile(path, generate.LANGUAGE_SPANISH, 200)
+	cha = ChaFile(path, verbose=False)
+	units = len(cha.morStorage)
+	ambiguous = list(cha.morAmbiguousLines)
+	speakers = list(cha.speakers)
+
+	for _ in range(3):
+		assert list(cha.iterLines()) == cha.getLines()
+
+	assert len(cha.morStorage) == units
+	assert cha.morAmbiguousLines == ambiguous
+	assert cha.speakers == speakers
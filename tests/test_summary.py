@@ -0,0 +1,34 @@
+import os
+import sys
+
+from ChaFile import *
+
+sys.path.insert(0, os.path.join( os.path.dirname(os.path.abspath(__file__)), "..", "benchmarks" ))
+import generate
+
+def test_summaryGoesThroughTheLinesOnce(tmp_path, monkeypatch):
+	path = str(tmp_path / "a.cha")
+	generate.writeChaFile(path, generate.LANGUAGE_SPANISH, 300)
+	cha = ChaFile(path, verbose=False)
+	cha.populateVerbs()
+	cha.populateNouns()
+	cha.populateAdjectives()
+
+	calls = []
+	isUtteranceEmpty = cha.isUtteranceEmpty
+	monkeypatch.setattr( cha, "isUtteranceEmpty", lambda l: calls.append(l) or isUtteranceEmpty(l) )
+
+	record = cha.summary()
+
+	assert len(calls) == len(cha.getLines())
+	assert cha.columns is None
+
+	expected = ChaFile(path, verbose=False)
+	for addressee in SUMMARY_ADDRESSEES:
+		assert record[f"{SUMMARY_UTTERANCES}_{addressee}"] == expected.countUtterances(addressee)
+		assert record[f"{LINE_VERBS}_{COUNT_TYPE_TOKENS}_{addressee}"] == expected.count(LINE_VERBS, addressee)
+	for addressee in [ ADDRESSEE_CHILD_DIRECTED, ADDRESSEE_ADULT ]:
+		if addressee in SUMMARY_ADDRESSEES:
+			assert record[f"{SUMMARY_TURNS}_{addressee}"] == expected.countTurns(addressee)
+	assert cha.countTurns(ADDRESSEE_CHILD_DIRECTED) == expected.countTurns(ADDRESSEE_CHILD_DIRECTED)
+	assert len(calls) == len(cha.getLines()) #turns were kept